@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+
+import sys
+import os
+from datetime import datetime
+
+from backtesting.backtest import run_backtest, summarize
+from helpers.logger import setup_logger
+from helpers.backtester_args_parser import args_parser
+from strategies.strategy_factory import StrategyFactory
+from utils.utils import CONFIG_FILE, HIST_DATA_PATH, LOGS, REPORTS_DIR, create_dir, read_config
+
+def main(args):
+    try:
+        betting_strategy = args.betting_strategy.lower()
+        staking_strategy = args.staking_strategy.lower()
+
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        config = read_config(CONFIG_FILE)
+        strategies_list = config.get('strategies', [])
+        leagues = config.get('leagues', {})
+
+        if betting_strategy in strategies_list:
+            log_path = f'{LOGS}/{betting_strategy}/backtester'
+            create_dir(log_path)
+            logger = setup_logger('backtester', f'{log_path}/{today}_backtester.log')
+
+            logger.info(f'Starting bet_bot:backtester {betting_strategy} with {staking_strategy} staking')
+
+            match betting_strategy:
+                case 'match_ratings':
+                    pass
+                case _:
+                    raise ValueError('Unknown betting strategy selected')
+
+            strategy_factory = StrategyFactory()
+            strat_config = read_config(strategy_factory.get_config(betting_strategy))
+
+            if args.seasons:
+                seasons = args.seasons.split(',')
+            else:
+                seasons = sorted(el for el in os.listdir(HIST_DATA_PATH) if os.path.isdir(os.path.join(HIST_DATA_PATH, el)))
+
+            tasks = []
+            for season in seasons:
+                for league in leagues:
+                    file_path = os.path.join(HIST_DATA_PATH, f'{season}/{league}.csv')
+                    if not os.path.exists(file_path) or league not in strat_config:
+                        logger.warning(f'No historical data or config for {league} {season}')
+                        continue
+                    tasks.append((file_path, league, season))
+
+            logger.info(f'Backtesting {len(tasks)} league seasons')
+
+            start = datetime.now()
+            results = run_backtest(tasks, strat_config, staking_strategy, args.workers)
+            summary = summarize(results)
+
+            logger.info(f'Backtest completed in {(datetime.now() - start).total_seconds():.2f}s')
+            logger.info(f'Summary:\n{summary.to_string()}')
+
+            report_path = f'{REPORTS_DIR}/{betting_strategy}/backtests'
+            create_dir(report_path)
+
+            results.to_csv(f'{report_path}/{today}_{staking_strategy}_backtest.csv', index=False)
+            summary.to_csv(f'{report_path}/{today}_{staking_strategy}_backtest_summary.csv')
+        else:
+            print('Unknown betting strategy or empty strategies list from config')
+            exit(1)
+    except Exception as e:
+        e_type, e_object, e_traceback = sys.exc_info()
+        e_filename = os.path.split(
+            e_traceback.tb_frame.f_code.co_filename
+        )[1]
+        e_line_number = e_traceback.tb_lineno
+        logger.error(f'{e}, type: {e_type}, filename: {e_filename}, line: {e_line_number}')
+    else:
+        logger.info('Mission accomplished.')
+
+if __name__ == '__main__':
+    args = args_parser()
+    main(args)
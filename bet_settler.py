@@ -17,9 +17,11 @@ from jproperties import Properties
 from helpers.send_email import send_email
 from helpers.bet_settler_args_parser import args_parser
 from helpers.logger import setup_logger
-from helpers.session import SessionManager
+from helpers.session import HTTP_CACHE_FILE, SessionManager
+from db.results import append_results, get_results_teams, to_hist_data_date
 from strategies.strategy_factory import StrategyFactory
 from utils.utils import *
+from utils.name_resolver import NameResolver
 
 url = f"https://{RAPIDAPI_HOST}/v3/fixtures"
 
@@ -42,12 +44,13 @@ def main(args):
         strategies_list = config.get('strategies', [])
         leagues = config.get('leagues', {})
         season = config.get('season', '2024-2025')
+        ratings_from_results = config.get('ratings_from_results', False)
         base_dir = f'{BANKROLL_DIR}/{season}'
 
         if betting_strategy in strategies_list:
             getcontext().prec = 3
 
-            today_dt = datetime.now()
+            today_dt = datetime.strptime(REPLAY_DATE, '%Y-%m-%d') if REPLAY_DATE else datetime.now()
             today = today_dt.strftime('%Y-%m-%d')
 
             log_path = f"{LOGS}/{betting_strategy}/bet_settler/{season}"
@@ -66,7 +69,8 @@ def main(args):
             strat_config = read_config(config_path)
             
             updates = []
-            session = SessionManager().get_session()
+            session = SessionManager(session_file=None, cache_file=HTTP_CACHE_FILE).get_session()
+            name_resolver = NameResolver()
 
             subject = f'Settling bets for {today} with {betting_strategy} strategy'
             messages = []
@@ -83,6 +87,7 @@ def main(args):
             total_bets = []
 
             consolidated_starting = 0
+            updated_leagues = set()
 
             for league, league_id in leagues.items():
                 league_name = strat_config[league]['name']
@@ -97,6 +102,14 @@ def main(args):
                 bets = load_many(select_from_match_ratings_query, league, today)
                 total_bets.append(bets)
 
+                results, finished = [], []
+                # With ratings read from the results table every league's scores are needed, not only the ones we bet on
+                if len(bets) > 0 or ratings_from_results:
+                    results, finished = fetch_today_games_results(session, league_id, today, season, {bet[0] for bet in bets}, logger)
+
+                if ratings_from_results:
+                    record_results(league, season, finished, name_resolver, logger)
+
                 if len(bets) == 0:
                     messages.append(f"No bets to settle for {league_name}\n")
                     logger.warning(f"No bets to settle for {league_name}")
@@ -109,7 +122,6 @@ def main(args):
                 messages.append(f"{league_name} games\n {'-' * (len(league_name)+6)}\n")
 
                 logger.info(f"Bets for {league_name} on {today}: \n{bets_headlines}")
-                results = fetch_today_games_results(session, league_id, today, season, bets.keys(), logger)
 
                 # if len(bets) != len(results):
                 #     messages.append(f'Results length does not match bets length for {league}\n')
@@ -120,7 +132,8 @@ def main(args):
                 earnings = 0
                 sum_profit = 0
 
-                time.sleep(1)
+                if not REPLAY_DATE:
+                    time.sleep(1)
 
                 for result in results:
                     fthg, ftag, ftr, game_id = result
@@ -163,6 +176,7 @@ def main(args):
 
                 strat_config[league]['bankroll'] += earnings
                 strat_config[league]['bankroll'] = round(strat_config[league]['bankroll'], 2)
+                updated_leagues.add(league)
                 
                 messages.append(f"Final bankroll for {league_name}: ${strat_config[league]['bankroll']}\n")
                 logger.info(f"Final bankroll for {league_name}: ${strat_config[league]['bankroll']}")
@@ -186,8 +200,14 @@ def main(args):
 
                 logger.info(f'Deleting settled games from upcoming_games table for {league}')
                 delete_some(delete_some_from_upcoming_games_query, (league, today))
+
+            learned = name_resolver.get_learned()
+            if learned:
+                saved = name_resolver.save()
+                logger.warning(f'Learned {saved} team name match(es), review them in {PENDING_MAPPINGS_FILE} and copy the right ones to {MAPPINGS_FILE}: {learned}')
             
-            update_config(strat_config, config_path)
+            # Only the bankrolls settled here are merged, coefficients refitted meanwhile are kept
+            update_config({league: strat_config[league] for league in updated_leagues}, config_path, ['bankroll'])
 
             if len(total_bets) > 0:
                 file_path = f'{base_dir}/data/Consolidated_bankroll.csv'
@@ -230,9 +250,34 @@ def main(args):
     else:
         logger.info('Mission accomplished.')
 
+def record_results(league, season, finished, name_resolver: NameResolver, logger: Logger):
+    try:
+        teams = get_results_teams(league, season)
+
+        # Names are only resolvable against teams the historical data already knows
+        if len(teams) == 0:
+            logger.warning(f'No historical results loaded for {league} {season}, not recording {len(finished)} result(s)')
+            return 0
+
+        rows = []
+        for game_date, home, away, fthg, ftag, game_id in finished:
+            home_, away_ = name_resolver.to_hist_data(home, away, league, teams)
+            if home_ not in teams or away_ not in teams:
+                logger.warning(f'Unknown team in {home} - {away} for {league}, result not recorded')
+                continue
+            rows.append((game_date, home_, away_, fthg, ftag, game_id))
+
+        appended = append_results(league, season, rows)
+    except Exception as err:
+        logger.error(f"record_results(): Other error occurred: {err}")
+    else:
+        logger.info(f'Recorded {appended} new result(s) for {league}')
+        return appended
+
 def fetch_today_games_results(session: requests.Session, league, date, season, game_ids, logger: Logger):
     try:
         fixtures = []
+        finished = []
         params = {"league":league,"season":season.split('-')[0],"date": date,"timezone":"America/New_York"}
 
         response = session.get(url, headers=headers, params=params)
@@ -241,6 +286,8 @@ def fetch_today_games_results(session: requests.Session, league, date, season, g
 
         data = response.json()
 
+        get_archive(API_FOOTBALL_RESPONSES_DIR).record_response('fetch_today_games_results', league, data, response)
+
         fixtures = [
             (
                 int(fixture['goals']['home']),
@@ -250,6 +297,17 @@ def fetch_today_games_results(session: requests.Session, league, date, season, g
                 int(fixture['fixture']['id']),
             ) for fixture in data['response'] if int(fixture['fixture']['id']) in game_ids and fixture['fixture']['status']['long'] != 'Match Postponed'
         ]
+
+        finished = [
+            (
+                to_hist_data_date(fixture['fixture']['date']),
+                fixture['teams']['home']['name'],
+                fixture['teams']['away']['name'],
+                int(fixture['goals']['home']),
+                int(fixture['goals']['away']),
+                int(fixture['fixture']['id']),
+            ) for fixture in data['response'] if fixture['fixture']['status']['short'] in ('FT', 'AET', 'PEN')
+        ]
     except requests.HTTPError as http_err:
         logger.error(f"Login failed | HTTP error occurred: {http_err}")
     except RetryError as err:
@@ -260,7 +318,7 @@ def fetch_today_games_results(session: requests.Session, league, date, season, g
     else:
         logger.info(f"Games to settle: {fixtures}")
     finally:
-        return fixtures
+        return fixtures, finished
 
 if __name__ == '__main__':
     args = args_parser() 
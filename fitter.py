@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+
+import sys
+import os
+from datetime import datetime
+
+from backtesting.fitting import fit_leagues, write_coeffs
+from helpers.logger import setup_logger
+from helpers.fitter_args_parser import args_parser
+from strategies.strategy_factory import StrategyFactory
+from utils.utils import CONFIG_FILE, HIST_DATA_PATH, LOGS, create_dir, read_config
+
+def main(args):
+    try:
+        betting_strategy = args.betting_strategy.lower()
+
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        config = read_config(CONFIG_FILE)
+        strategies_list = config.get('strategies', [])
+        leagues = config.get('leagues', {})
+
+        if betting_strategy in strategies_list:
+            log_path = f'{LOGS}/{betting_strategy}/fitter'
+            create_dir(log_path)
+            logger = setup_logger('fitter', f'{log_path}/{today}_fitter.log')
+
+            logger.info(f'Starting bet_bot:fitter {betting_strategy}')
+
+            match betting_strategy:
+                case 'match_ratings':
+                    pass
+                case _:
+                    raise ValueError('Unknown betting strategy selected')
+
+            strategy_factory = StrategyFactory()
+            config_path = strategy_factory.get_config(betting_strategy)
+
+            if args.seasons:
+                seasons = args.seasons.split(',')
+            else:
+                seasons = sorted(el for el in os.listdir(HIST_DATA_PATH) if os.path.isdir(os.path.join(HIST_DATA_PATH, el)))
+
+            tasks = {}
+            for league in leagues:
+                file_paths = [(os.path.join(HIST_DATA_PATH, f'{season}/{league}.csv'), season) for season in seasons]
+                file_paths = [(file_path, season) for file_path, season in file_paths if os.path.exists(file_path)]
+                if len(file_paths) == 0:
+                    logger.warning(f'No historical data for {league}')
+                    continue
+                tasks[league] = file_paths
+
+            start = datetime.now()
+            coeffs = fit_leagues(tasks, args.window, args.workers)
+
+            logger.info(f'Fitted {len(coeffs)} leagues in {(datetime.now() - start).total_seconds():.2f}s')
+            for league, fitted in coeffs.items():
+                logger.info(f"{league} ({fitted['games']} games): home: {fitted['home']} | away: {fitted['away']}")
+
+            if not args.dry_run:
+                write_coeffs(coeffs, config_path)
+                logger.info(f'Coefficients written to {config_path}')
+        else:
+            print('Unknown betting strategy or empty strategies list from config')
+            exit(1)
+    except Exception as e:
+        e_type, e_object, e_traceback = sys.exc_info()
+        e_filename = os.path.split(
+            e_traceback.tb_frame.f_code.co_filename
+        )[1]
+        e_line_number = e_traceback.tb_lineno
+        logger.error(f'{e}, type: {e_type}, filename: {e_filename}, line: {e_line_number}')
+    else:
+        logger.info('Mission accomplished.')
+
+if __name__ == '__main__':
+    args = args_parser()
+    main(args)
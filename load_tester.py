@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+
+import sys
+import os
+from datetime import datetime
+
+from helpers.logger import setup_logger
+from helpers.load_tester_args_parser import args_parser
+from loadtest.harness import run_load_test
+from utils.utils import LOGS, REPORTS_DIR, create_dir
+
+def main(args):
+    try:
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        log_path = f'{LOGS}/loadtests'
+        create_dir(log_path)
+        logger = setup_logger('load_tester', f'{log_path}/{today}_load_tester.log')
+
+        latency = tuple(float(el) / 1000 for el in args.latency.split(','))
+        if len(latency) == 1:
+            latency = latency * 2
+
+        logger.info(f'Starting bet_bot:load_tester with {args.leagues} league(s) x {args.games} game(s), latency {latency}, error rate {args.error_rate}, drift {args.drift}')
+
+        report, totals = run_load_test(args.leagues, args.games, logger, latency=latency, error_rate=args.error_rate, drift=args.drift, pacing=args.pacing, staking_strategy=args.staking_strategy.lower(), seed=args.seed)
+
+        logger.info(f'Totals: {totals}')
+        logger.info(f'Report:\n{report.to_string(float_format="{:.2f}".format)}')
+
+        output = args.output
+        if not output:
+            report_path = f'{REPORTS_DIR}/loadtests'
+            create_dir(report_path)
+            output = f"{report_path}/{datetime.now().strftime('%Y-%m-%d_%H%M%S')}_{args.leagues}x{args.games}_load_test.csv"
+
+        report.to_csv(output, index_label='stage')
+        logger.info(f'Report written to {output}')
+    except Exception as e:
+        e_type, e_object, e_traceback = sys.exc_info()
+        e_filename = os.path.split(
+            e_traceback.tb_frame.f_code.co_filename
+        )[1]
+        e_line_number = e_traceback.tb_lineno
+        logger.error(f'{e}, type: {e_type}, filename: {e_filename}, line: {e_line_number}')
+    else:
+        logger.info('Mission accomplished.')
+
+if __name__ == '__main__':
+    args = args_parser()
+    main(args)
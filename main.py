@@ -5,29 +5,36 @@ import os
 import sys
 
 from datetime import datetime
-from decimal import getcontext, Decimal
 
 from jproperties import Properties
+from pandas import DataFrame
 
+from bot.bankroll_ledger import BankrollLedger
 from bot.betting_bot import BettingBot
 from helpers.main_args_parser import args_parser
 from helpers.send_email import send_email
 from helpers.logger import setup_logger
+from helpers.session import HTTP_CACHE_FILE, SessionManager
 
 from bot.betting_bot_factory import BettingBotFactory
 from strategies.strategy_factory import StrategyFactory
+from strategies.match_ratings import MISC_PATH, export_team_ratings, get_rating_index, get_results_rating_index
+from db.results import load_hist_results
 from utils.utils import *
+from utils.name_resolver import NameResolver
+from db.run_journal import RunJournal
+from db.db_utils import get_connection
+from db.migrations import migrate
 
 configs = Properties()
 with open(SQL_PROPERTIES, 'rb') as config_file:
     configs.load(config_file)
 
-insert_new_bets_query = configs.get('INSERT_INTO_MATCH_RATINGS').data.replace('\"', '')
+upsert_bets_query = configs.get('UPSERT_INTO_MATCH_RATINGS').data.replace('\"', '')
 select_upcoming_games_query = configs.get('SELECT_TEAMS_FROM_UPCOMING_GAMES').data.replace('\"', '')
-delete_from_match_ratings_query = configs.get('DELETE_SOME_FROM_MATCH_RATINGS').data.replace('\"', '')
 check_match_ratings_query = configs.get('CHECK_MATCH_RATINGS').data.replace('\"', '')
 
-today = datetime.now().strftime('%Y-%m-%d')
+today = REPLAY_DATE or datetime.now().strftime('%Y-%m-%d')
 
 def main(args):
     try:
@@ -39,8 +46,14 @@ def main(args):
         leagues = config.get('leagues', {})
         season = config.get('season', '2024-2025')
         strategies_list = config.get('strategies', [])
+        engine = config.get('engine', 'numpy')
+        export_hist_data = config.get('export_transformed_hist_data', False)
+        ratings_from_results = config.get('ratings_from_results', False)
         logged_in = False
         betting_bot = None
+        bet_writer = None
+        strat_config = None
+        updated_leagues = set()
 
         if betting_strategy in strategies_list:
             log_path = f'{LOGS}/{betting_strategy}/main/{season}'
@@ -48,6 +61,11 @@ def main(args):
             logger = setup_logger('main', f'{log_path}/{today}_main.log')
 
             logger.info(f'Starting bet_bot:main {betting_strategy} {staking_strategy} {bookmaker}')
+
+            # The schema is only ever changed here, at the start of the betting run, the other jobs just connect
+            applied = migrate(get_connection())
+            if applied:
+                logger.info(f'Applied schema migrations: {applied}')
             
             # process = subprocess.run(f'cd {BETTING_CRAWLER_PATH} && scrapy crawl historical_data', shell=True, capture_output=True, text=True)
 
@@ -64,10 +82,10 @@ def main(args):
             logger.info(f'Config: Leagues: {list(leagues.keys())} | Season: {season}')
 
             bets = []
+            # Every bet row is committed as soon as its status is known, a crash later in the run keeps it
+            bet_writer = get_writer(upsert_bets_query)
             status = 'FAILED'
 
-            getcontext().prec = 3
-
             betting_bot_factory = BettingBotFactory()
             betting_bot = betting_bot_factory.select_betting_bot(bookmaker)
             logged_in = betting_bot.login(credentials[bookmaker], logger)
@@ -77,10 +95,17 @@ def main(args):
             
             logger.info(f'Succesfully logged into {bookmaker}')
 
+            ledger = BankrollLedger(betting_bot, logger)
+
             strategy_factory = StrategyFactory()
+            name_resolver = NameResolver()
+            # One session for every league, its pool and response cache are shared by the fixture requests
+            session = SessionManager(session_file=None, cache_file=HTTP_CACHE_FILE).get_session()
             config_path = strategy_factory.get_config(betting_strategy)
             strat_config = read_config(config_path)
 
+            journal = RunJournal(today, bookmaker, betting_strategy, resume=args.resume)
+
             subject = f'Placing bets on {today} for {betting_strategy} strategy with {bookmaker}'
             messages = []
 
@@ -93,25 +118,49 @@ def main(args):
             for league, league_id in leagues.items():
                 league_name = strat_config[league]['name']
 
-                if not fetch_upcoming_games(league_id, league, today, season, logger):
+                if journal.is_league_done(league):
+                    logger.info(f'{league_name} already completed by an earlier run, skipping')
+                    messages.append(f'{league_name} already completed by an earlier run\n')
+                    continue
+
+                if not fetch_upcoming_games(session, league_id, league, today, season, logger):
                     logger.info(f'No game(s) found for {league_name}')
                     messages.append(f'No game(s) found for {league_name}\n')
                     continue
 
-                data = read_csv_file(os.path.join(HIST_DATA_PATH, f'{season}/{league}.csv'))
+                hist_data_path = os.path.join(HIST_DATA_PATH, f'{season}/{league}.csv')
+                data = read_hist_data(hist_data_path)
 
                 if len(data) == 0:
                     logger.warning(f'Failed to retrieve historical data for {league_name}')
                     messages.append(f'Failed to retrieve historical data for {league_name}\n')
                     continue
+
+                if ratings_from_results:
+                    # The CSV is only loaded when it changed, settled results appended since then are kept
+                    loaded = load_hist_results(data, league, season, hist_data_path)
+                    if loaded:
+                        logger.info(f'Loaded {loaded} historical results for {league_name}')
+                    rating_index = get_results_rating_index(league, season)
+                else:
+                    rating_index = get_rating_index(data, league, season)
+
+                if export_hist_data:
+                    try:
+                        if export_team_ratings(data, league, season, f'{MISC_PATH}/{betting_strategy}', hist_data_path):
+                            logger.info(f'Exported transformed historical data for {league_name}')
+                    except Exception as e:
+                        logger.warning(f'Failed to export transformed historical data for {league_name}: {e}')
                 
                 games = load_many(select_upcoming_games_query, today, league)
 
-                ids = execute(check_match_ratings_query, (league, today))
+                ids = load_many(check_match_ratings_query, league, today)
                 bets_ids = {bet[0]: bet[1] for bet in ids} if ids else {}
                 logger.info(f'IDs and statuses of bets already placed: {bets_ids}')
 
-                starting_bk = curr_bal = round(strat_config[league]['bankroll'], 2)
+                # On resume the league keeps its original starting bankroll and continues from its last placed bet
+                starting_bk = journal.start_league(league, round(strat_config[league]['bankroll'], 2))
+                curr_bal = journal.get_bankroll(league, starting_bk)
                 consolidated_starting += starting_bk
 
                 logger.info(f"Starting bankroll for {league_name}: ${starting_bk}")
@@ -124,6 +173,7 @@ def main(args):
 
                     betting_bot.simulate_human_behavior()
                     games_url = betting_bot.get_game_urls(bookmaker_ids[league], logger, today=today, teams=teams)
+                    games_index = name_resolver.index_games(games_url)
 
                     messages.append(f"{league_name} games")
                     messages.append(f"{'-' * (len(league_name)+6)}\n")
@@ -134,6 +184,8 @@ def main(args):
                     continue
 
                 consolidated = 0
+                fixtures = []
+                pending = []
 
                 for game in games:
                     if game[0] in bets_ids.keys():
@@ -143,37 +195,78 @@ def main(args):
                             messages.append(f"Bet for {game[3]} - {game[4]} already placed")
                             continue
                         elif bet_status == 'FAILED':
-                            delete_some(delete_from_match_ratings_query, (game[0],))
+                            # The new attempt's row replaces this one through the upsert
                             logger.info(f"Bet for {game[3]} - {game[4]} failed will re-attempt it")
                             messages.append(f"Bet for {game[3]} - {game[4]} failed will re-attempt it")
                         else:
                             logger.info(f"Bet for {game[3]} - {game[4]} was not placed because {bet_status}")
                             messages.append(f"Bet for {game[3]} - {game[4]} was not placed because {bet_status}")
                             continue
-                    
-                    home_, away_ = map_from_rapidapi_to_bookmaker(game[3], game[4], league, bookmaker)
 
-                    urls = list(filter(lambda game_: game_['home']==home_ and game_['away']==away_, games_url))
+                    if journal.is_interrupted(league, game[0]):
+                        logger.warning(f"Placement for {game[3]} - {game[4]} was interrupted, check {bookmaker} before re-attempting it")
+                        messages.append(f"Placement for {game[3]} - {game[4]} was interrupted, check {bookmaker} before re-attempting it")
+                        continue
+                    
+                    game_url = name_resolver.find_game(games_index, game[3], game[4], league, bookmaker)
 
-                    if len(urls) == 0:
+                    if game_url is None:
                         logger.info(f"No url for {game[3]} - {game[4]}, skipping")
                         messages.append(f"No url for {game[3]} - {game[4]}, skipping")
                         continue
 
-                    game_url = urls[0]
-                    home_odds, draw_odds, away_odds = betting_bot.check_odds(game_url['url'], logger, game_id=game[0])
+                    journal.record(league, game[0], 'matched', {'id': game_url['id']})
+                    pending.append((game, game_url))
+
+                odds = betting_bot.check_odds_many([game_url for _, game_url in pending], logger)
+
+                for game, game_url in pending:
+                    home_odds, draw_odds, away_odds = odds.get(game_url['id'], (0., 0., 0.))
+                    journal.record(league, game[0], 'priced', {'odds': [home_odds, draw_odds, away_odds]})
                     logger.info(f"{bookmaker} odds for {game[3]} - {game[4]}: H: {home_odds:.2f} | D: {draw_odds:.2f} | A: {away_odds:.2f}")
 
-                    home_proba, draw_proba, away_proba = round(float(Decimal(1./home_odds)), 4), round(float(Decimal(1./draw_odds)), 4), round(float(Decimal(1./away_odds)), 4)
+                    home_proba, draw_proba, away_proba = round(1./home_odds, 4), round(1./draw_odds, 4), round(1./away_odds, 4)
                     logger.info(f"{bookmaker} implied proba for {game[3]} - {game[4]}: H: {home_proba*100:.2f}% | D: {draw_proba*100:.2f}% | A: {away_proba*100:.2f}%")
 
                     vig = calculate_vig(home_proba, draw_proba, away_proba)*100
                     logger.info(f"{bookmaker} vig for {game[3]} - {game[4]}: {vig:.2f}%")
 
-                    strategy = strategy_factory.select_strategy(betting_strategy, data, league, strat_config, staking_strategy, home_odds=home_odds, draw_odds=draw_odds, away_odds=away_odds, season=season)
-                    
-                    home_, away_ = map_from_rapidapi_to_hist_data(game[3], game[4], league)
-                    values = strategy.compute(home_, away_, betting_strategy, logger)
+                    home_, away_ = name_resolver.to_hist_data(game[3], game[4], league, rating_index.history.keys())
+
+                    fixtures.append({
+                        'game': game,
+                        'game_url': game_url,
+                        'home': home_,
+                        'away': away_,
+                        'home_odds': home_odds,
+                        'draw_odds': draw_odds,
+                        'away_odds': away_odds,
+                        'home_proba': home_proba,
+                        'draw_proba': draw_proba,
+                        'away_proba': away_proba,
+                        'vig': vig
+                    })
+
+                slate = {}
+
+                if len(fixtures) > 0:
+                    strategy = strategy_factory.select_strategy(betting_strategy, data, league, strat_config, staking_strategy, season=season, rating_index=rating_index, engine=engine)
+                    slate_df = DataFrame([{key: fixture[key] for key in ('home', 'away', 'home_odds', 'draw_odds', 'away_odds')} for fixture in fixtures], index=[fixture['game'][0] for fixture in fixtures])
+                    slate = strategy.compute_batch(slate_df, betting_strategy, logger).to_dict('index')
+
+                    for game_id, values in slate.items():
+                        journal.record(league, game_id, 'scored', {key: values[key] for key in ('bet', 'bet_odds', 'stake', 'flag')})
+
+                    candidates = [(fixture['game_url'], slate[fixture['game'][0]]['bet'], slate[fixture['game'][0]]['bet_odds']) for fixture in fixtures if slate.get(fixture['game'][0], {}).get('flag') and fixture['game'][3] not in exclusion_list]
+                    betting_bot.prefetch_limits(candidates, logger, today=today)
+
+                for fixture in fixtures:
+                    game, game_url = fixture['game'], fixture['game_url']
+                    home_odds, draw_odds, away_odds = fixture['home_odds'], fixture['draw_odds'], fixture['away_odds']
+                    home_proba, draw_proba, away_proba = fixture['home_proba'], fixture['draw_proba'], fixture['away_proba']
+                    vig = fixture['vig']
+
+                    values = slate.get(game[0], {})
 
                     if not values:
                         logger.info(f"Computation for {game[3]} - {game[4]} failed because of an error in {betting_strategy} strategy module")
@@ -185,7 +278,7 @@ def main(args):
                     if game[3] in exclusion_list:
                         manual_exclusion = True
                     
-                    status = get_status(betting_bot, bookmaker, values, game_url, logger, manual_exclusion)
+                    status = get_status(betting_bot, ledger, bookmaker, values, game_url, logger, manual_exclusion, lambda stage, data, game_id=game[0]: journal.record(league, game_id, stage, data))
 
                     if status == 'SUCCESS':
                         placed += 1
@@ -232,8 +325,11 @@ def main(args):
                             final_values = ()
                     
                     strat_config[league]['bankroll'] = curr_bal
+                    updated_leagues.add(league)
 
                     bets.append(final_values)
+                    bet_writer.write(final_values)
+                    journal.record(league, game[0], 'placed', {'status': status, 'stake': values['stake'], 'bankroll': curr_bal})
 
                     logger.info(f"{game[3]} - {game[4]}: Bet: {values['bet']} | Odds: {values['bet_odds']} | Stake: ${values['stake']} | Status: {status}")
                     messages.append(f"{game[3]} - {game[4]}: Bet: {values['bet']} | Odds: {values['bet_odds']} | Stake: ${values['stake']} | Status: {status}\n")
@@ -244,8 +340,16 @@ def main(args):
                 logger.info(f"Amount wagered for {league_name}: ${consolidated:.2f}")
                 messages.append(f"Final bankroll for {league_name}: ${strat_config[league]['bankroll']:.2f}\n")
                 logger.info(f"Final bankroll for {league_name}: ${strat_config[league]['bankroll']:.2f}")
+
+                if league in updated_leagues:
+                    update_config({league: strat_config[league]}, config_path, ['bankroll'])
+                journal.finish_league(league, {'bankroll': strat_config[league]['bankroll'], 'wagered': consolidated})
             
-            update_config(strat_config, config_path)
+            learned = name_resolver.get_learned()
+            if learned:
+                saved = name_resolver.save()
+                logger.warning(f'Learned {saved} team name match(es), review them in {PENDING_MAPPINGS_FILE} and copy the right ones to {MAPPINGS_FILE}: {learned}')
+                messages.append(f'Learned team name matches, review them in the pending mappings file: {learned}\n')
 
             if len(bets) > 0:
                 final_bk = consolidated_starting-total_staked
@@ -257,8 +361,6 @@ def main(args):
                 logger.info(f"Total amount wagered: ${total_staked:.2f}")
                 logger.info(f"Consolidated starting bankroll: ${consolidated_starting:.2f}")
                 logger.info(f"Consolidated ending bankroll: ${final_bk:.2f}")
-
-                execute_many(insert_new_bets_query, bets)
             
             messages.append(f'Total: {placed} bet(s) placed\n')
             logger.info(f'Total: {placed} bet(s) placed')
@@ -277,27 +379,48 @@ def main(args):
     else:
         logger.info('Mission accomplished.')
     finally:
-        if logged_in and betting_bot:
+        if bet_writer:
+            bet_writer.close()
+        if strat_config is not None and updated_leagues:
+            # Keep the bankroll of bets placed before a failure
+            update_config({league: strat_config[league] for league in updated_leagues}, config_path, ['bankroll'])
+        if logged_in and betting_bot and betting_bot.session_store is not None:
+            betting_bot.save_session(logger)
+        elif logged_in and betting_bot:
             logger.info('Logging out.')
             betting_bot.logout(logger)
+        if betting_bot:
+            logger.info(f'Pacing: slept {betting_bot.pacer.slept:.2f}s, saved {betting_bot.pacer.saved:.2f}s of idle time')
 
-def get_status(betting_bot: BettingBot, bookmaker, values, game_url, logger, manual_exclusion=False):
-    min_stake, max_stake = betting_bot.get_max_min_stake(game_url, values['bet'], values['bet_odds'], logger, today=today)
-    if values['stake'] >= min_stake and values['flag'] and not manual_exclusion:
-        betting_bot.simulate_human_behavior() 
-        curr_bal = betting_bot.check_balance(logger, today=today) 
-        if curr_bal > values['stake']:
-            betting_bot.simulate_human_behavior()
+def get_status(betting_bot: BettingBot, ledger: BankrollLedger, bookmaker, values, game_url, logger, manual_exclusion=False, on_stage=None):
+    on_stage = on_stage or (lambda stage, data: None)
+
+    # Stake limits only matter for bets we intend to place
+    if values['flag'] and not manual_exclusion:
+        min_stake, max_stake = betting_bot.get_limits(game_url, values['bet'], values['bet_odds'], logger, today=today)
+        on_stage('quoted', {'min_stake': min_stake, 'max_stake': max_stake})
+    else:
+        min_stake, max_stake = 0, 0
 
-            if values['stake'] > max_stake:
-                logger.info(f"Original stake of ${values['stake']} too high as per {bookmaker} limits. Updating to ${max_stake}")
-                values['stake'] = max_stake
+    if values['flag'] and not manual_exclusion and values['stake'] >= min_stake:
+        if values['stake'] > max_stake:
+            logger.info(f"Original stake of ${values['stake']} too high as per {bookmaker} limits. Updating to ${max_stake}")
+            values['stake'] = max_stake
 
+        if ledger.can_afford(values['stake']):
+            betting_bot.simulate_human_behavior()
+
+            on_stage('placing', {'stake': values['stake'], 'bet_odds': values['bet_odds']})
             success = betting_bot.place_bet(values['bet_odds'], values['stake'], values['bet'], game_url, min_stake, logger)
             if success:
+                ledger.debit(values['stake'])
                 status = 'SUCCESS'
+            else:
+                # The bet may or may not have gone through, trust the bookmaker's balance from here
+                ledger.reconcile()
+                status = 'FAILED'
         else:
-            raise ValueError(f"Balance of ${curr_bal} too low for stake ${values['stake']}")
+            raise ValueError(f"Balance of ${ledger.balance} too low for stake ${values['stake']}")
     elif not values['flag']:
         status = 'EXCLUDED'
     elif manual_exclusion:
@@ -3,17 +3,17 @@
 from logging import Logger
 import sys
 import os
-import sqlite3
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
 from jproperties import Properties
 
+from db.db_utils import get_connection
 from helpers.logger import setup_logger
 from helpers.reports_generator_args_parser import args_parser
 from helpers.send_email import send_email
-from utils.utils import DB_FILE, LOGS, REPORTS_DIR, SQL_PROPERTIES, CONFIG_FILE, create_dir, get_files_list, read_config
+from utils.utils import LOGS, REPORTS_DIR, SQL_PROPERTIES, CONFIG_FILE, create_dir, get_files_list, read_config
 
 configs = Properties()
 with open(SQL_PROPERTIES, 'rb') as config_file:
@@ -21,10 +21,9 @@ with open(SQL_PROPERTIES, 'rb') as config_file:
 
 # Function to load data from the database
 def load_data(query):
-    with sqlite3.connect(DB_FILE) as conn:
-        df = pd.read_sql_query(query, conn)
-        df['game_date'] = pd.to_datetime(df['game_date'])
-        df.set_index('game_date', inplace=True)
+    df = pd.read_sql_query(query, get_connection())
+    df['game_date'] = pd.to_datetime(df['game_date'])
+    df.set_index('game_date', inplace=True)
 
     return df
 
@@ -16,7 +16,19 @@ if [ ! -d "$TARGET_DIR" ]; then
     exit 1
 fi
 
-# Find and delete all files with the specified extension in the target directory and its subdirectories
-find "$TARGET_DIR" -type f -name "*.$FILE_EXT" -exec rm -f {} +
+# Archive segments are only readable through their index, the two always go together
+if [ "$FILE_EXT" == "idx" ]; then
+    echo "Error: .idx files index the .jsonl.gz archive segments, delete the segments instead."
+    exit 1
+fi
+
+if [ "$FILE_EXT" == "jsonl.gz" ]; then
+    find "$TARGET_DIR" -type f -name "*.jsonl.gz" | while read -r segment; do
+        rm -f "$segment" "${segment%.jsonl.gz}.idx" "$segment.lock"
+    done
+else
+    # Find and delete all files with the specified extension in the target directory and its subdirectories
+    find "$TARGET_DIR" -type f -name "*.$FILE_EXT" -exec rm -f {} +
+fi
 
 echo "All .$FILE_EXT files in $TARGET_DIR have been deleted."
@@ -0,0 +1,167 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from staking.staking_factory import StakingFactory
+from strategies.match_ratings import MatchRatingsStrategy, compute_probas, compute_team_ratings, compute_values, get_coeffs, round_columns, select_bets
+from utils.utils import HIST_DATA_COLUMNS, HIST_ODDS_COLUMNS, read_hist_data
+
+# Closing prices first, pre-closing prices when a file has no closing columns
+ODDS_COLUMNS = [('PSCH', 'PSCD', 'PSCA'), ('AvgCH', 'AvgCD', 'AvgCA'), ('PSH', 'PSD', 'PSA'), ('AvgH', 'AvgD', 'AvgA')]
+
+MATCH_RATINGS_COLUMNS = [
+    'game_id', 'game_date', 'home_team', 'away_team', 'season', 'league_code', 'league_name', 'round', 'home_rank', 'away_rank',
+    'fthg', 'ftag', 'ftr', 'bookmaker', 'bookmaker_game_id', 'home_odds', 'draw_odds', 'away_odds', 'home_proba', 'draw_proba', 'away_proba', 'vig',
+    'home_rating', 'away_rating', 'match_rating', 'hwto', 'tdo', 'awto', 'hwtp', 'dtp', 'awtp', 'hv', 'dv', 'av', 'h', 'd', 'a',
+    'bet', 'bet_odds', 'value', 'stake', 'status', 'bankroll', 'result', 'gl', 'profit', 'yield'
+]
+
+def load_hist_data(file_path: str):
+    data = read_hist_data(file_path, HIST_DATA_COLUMNS + HIST_ODDS_COLUMNS)
+    return data.dropna(subset=HIST_DATA_COLUMNS).reset_index(drop=True)
+
+def get_closing_odds(data: DataFrame):
+    odds = np.full((len(data), 3), np.nan)
+    source = np.full(len(data), None, dtype=object)
+
+    for columns in ODDS_COLUMNS:
+        if not set(columns).issubset(data.columns):
+            continue
+        candidates = data[list(columns)].to_numpy(dtype=float)
+        fill = np.isnan(odds).any(axis=1) & ~np.isnan(candidates).any(axis=1)
+        odds[fill] = candidates[fill]
+        source[fill] = columns[0][:-1]
+
+    return odds, source
+
+def backtest_league(file_path: str, league: str, season: str, league_config: dict, staking_strategy: str, window: int = 6):
+    data = load_hist_data(file_path)
+    n = len(data)
+
+    df = data[HIST_DATA_COLUMNS].assign(Match=np.arange(n)).set_index('Date')
+    ratings = compute_team_ratings(df, league, season, window)
+    home = ratings[ratings['Team'] == ratings['HomeTeam']].sort_values(by='Match')
+    away = ratings[ratings['Team'] == ratings['AwayTeam']].sort_values(by='Match')
+
+    # Rolling Average is shifted, so each rating only uses matches played before the fixture
+    home_ratings = home['Rolling Average'].to_numpy()
+    away_ratings = away['Rolling Average'].to_numpy()
+    odds, source = get_closing_odds(data)
+
+    keep = ~(np.isnan(home_ratings) | np.isnan(away_ratings) | np.isnan(odds).any(axis=1))
+    game_ids = np.arange(n)[keep]
+    data, odds, source = data[keep].reset_index(drop=True), odds[keep], source[keep]
+    home_ratings, away_ratings = home_ratings[keep], away_ratings[keep]
+    rounds = home['Round'].to_numpy()[keep]
+    match_ratings = home_ratings - away_ratings
+
+    home_win_coeffs, away_win_coeffs = get_coeffs({league: league_config}, league)
+    probas = compute_probas(match_ratings, home_win_coeffs, away_win_coeffs)
+    true_odds, values = compute_values(probas, odds)
+
+    fthg, ftag = data['FTHG'].to_numpy(dtype=int), data['FTAG'].to_numpy(dtype=int)
+    outcomes = np.where(fthg > ftag, 0, np.where(fthg < ftag, 2, 1))
+    game_dates = pd.to_datetime(data['Date'], dayfirst=True, format='mixed').dt.strftime('%Y-%m-%d').to_numpy()
+
+    slates = pd.Series(np.arange(len(data))).groupby(game_dates, sort=False).indices.values()
+    stakes, balances, _ = simulate(odds, values, outcomes, slates, league_config['bankroll'], staking_strategy)
+
+    bets, value, stake, flag = select_bets(stakes, values)
+    stake = stake.round(1)
+    bet_odds = odds[np.arange(len(odds)), bets]
+    implied = (1. / odds).round(4)
+    gl = np.where(bets == outcomes, stake * bet_odds, 0.)
+    profit = np.where(gl > 0, gl - stake, -stake)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        yield_ = np.where(stake > 0, profit / stake * 100, 0.)
+
+    results = DataFrame({
+        'game_id': game_ids,
+        'game_date': game_dates,
+        'home_team': data['HomeTeam'].to_numpy(),
+        'away_team': data['AwayTeam'].to_numpy(),
+        'season': season,
+        'league_code': league,
+        'league_name': league_config.get('name', league),
+        'round': rounds,
+        'home_rank': None,
+        'away_rank': None,
+        'fthg': fthg,
+        'ftag': ftag,
+        'ftr': np.array(MatchRatingsStrategy.possible_results)[outcomes],
+        'bookmaker': source,
+        'bookmaker_game_id': None,
+        'home_odds': odds[:, 0],
+        'draw_odds': odds[:, 1],
+        'away_odds': odds[:, 2],
+        'home_proba': implied[:, 0],
+        'draw_proba': implied[:, 1],
+        'away_proba': implied[:, 2],
+        'vig': np.maximum(1. - 1. / implied.sum(axis=1), 0.) * 100,
+        'home_rating': home_ratings,
+        'away_rating': away_ratings,
+        'match_rating': match_ratings,
+        'hwto': true_odds[:, 0],
+        'tdo': true_odds[:, 1],
+        'awto': true_odds[:, 2],
+        'hwtp': probas[:, 0],
+        'dtp': probas[:, 1],
+        'awtp': probas[:, 2],
+        'hv': values[:, 0],
+        'dv': values[:, 1],
+        'av': values[:, 2],
+        'h': stakes[:, 0],
+        'd': stakes[:, 1],
+        'a': stakes[:, 2],
+        'bet': np.array(MatchRatingsStrategy.possible_results)[bets],
+        'bet_odds': bet_odds,
+        'value': value,
+        'stake': stake,
+        'status': np.where(flag, 'SUCCESS', 'EXCLUDED'),
+        'bankroll': balances.round(2),
+        'result': np.where(flag, np.where(gl > 0, 'W', 'L'), 'NB'),
+        'gl': gl.round(2),
+        'profit': profit.round(2),
+        'yield': yield_.round(2)
+    })
+
+    return round_columns(results)[MATCH_RATINGS_COLUMNS]
+
+def simulate(odds: np.ndarray, values: np.ndarray, outcomes: np.ndarray, slates, bankroll: float, staking_strategy: str, **kwargs):
+    stakes = np.zeros_like(odds)
+    balances = np.zeros(len(odds))
+    staking_factory = StakingFactory()
+
+    # Every matchday is one slate: stakes are sized off the bankroll before kick-off
+    # and winnings are credited once the slate is settled, like main.py and bet_settler.py
+    for idx in slates:
+        slate_stakes = staking_factory.select_staking_strategy(bankroll, staking_strategy, odds=odds[idx], value=values[idx], **kwargs).compute_batch()
+        bets, _, stake, flag = select_bets(slate_stakes, values[idx])
+        placed = np.where(flag, stake.round(1), 0.)
+        won = np.where(bets == outcomes[idx], placed * odds[idx, bets], 0.)
+
+        stakes[idx] = slate_stakes
+        balances[idx] = bankroll - np.cumsum(placed)
+        bankroll = bankroll - placed.sum() + won.sum()
+
+    return stakes, balances, bankroll
+
+def run_backtest(tasks: List[Tuple[str, str, str]], strat_config: dict, staking_strategy: str, workers: int = None, window: int = 6):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(backtest_league, file_path, league, season, strat_config[league], staking_strategy, window) for file_path, league, season in tasks]
+        results = [future.result() for future in futures]
+
+    if len(results) == 0:
+        return DataFrame(columns=MATCH_RATINGS_COLUMNS)
+
+    return pd.concat(results, ignore_index=True)
+
+def summarize(results: DataFrame):
+    bets = results[results['status'] == 'SUCCESS']
+    summary = bets.groupby(['season', 'league_code']).agg(bets=('stake', 'count'), staked=('stake', 'sum'), profit=('profit', 'sum'), bankroll=('bankroll', 'last'))
+    summary['yield'] = (summary['profit'] / summary['staked'] * 100).round(2)
+    return summary.round(2)
@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+from backtesting.backtest import load_hist_data
+from backtesting.sweep import prior_rolling_sums
+from utils.utils import update_config
+
+def rating_frequencies(file_paths: List[Tuple[str, str]], league: str, window: int = 6):
+    ratings, outcomes = [], []
+
+    for file_path, season in file_paths:
+        data = load_hist_data(file_path)
+        home, away = prior_rolling_sums(data, league, season, [window])
+        fthg, ftag = data['FTHG'].to_numpy(dtype=int), data['FTAG'].to_numpy(dtype=int)
+        ratings.append(home[0] - away[0])
+        outcomes.append(np.where(fthg > ftag, 0, np.where(fthg < ftag, 2, 1)))
+
+    ratings, outcomes = np.concatenate(ratings), np.concatenate(outcomes)
+    keep = ~np.isnan(ratings)
+    ratings, outcomes = ratings[keep].astype(int), outcomes[keep]
+
+    # Match rating -> home/draw/away counts, one row per observed rating
+    values, inverse = np.unique(ratings, return_inverse=True)
+    counts = np.zeros((len(values), 3))
+    np.add.at(counts, (inverse, outcomes), 1)
+    games = counts.sum(axis=1)
+
+    return DataFrame({
+        'match_rating': values,
+        'games': games,
+        'home': counts[:, 0] / games * 100,
+        'draw': counts[:, 1] / games * 100,
+        'away': counts[:, 2] / games * 100
+    })
+
+def fit_league(file_paths: List[Tuple[str, str]], league: str, window: int = 6):
+    table = rating_frequencies(file_paths, league, window)
+
+    if len(table) < 3:
+        raise ValueError(f'Not enough match ratings to fit coefficients for {league}')
+
+    # Weighted by the number of games behind each frequency, so sparse extreme ratings don't dominate
+    weights = np.sqrt(table['games'].to_numpy())
+    x = table['match_rating'].to_numpy(dtype=float)
+    home = np.polyfit(x, table['home'].to_numpy(), 1, w=weights)
+    away = np.polyfit(x, table['away'].to_numpy(), 2, w=weights)
+
+    return {
+        'home': {'beta_coeff': round(float(home[0]), 4), 'constant': round(float(home[1]), 4)},
+        'away': {'beta_squared_coeff': round(float(away[0]), 4), 'beta_coeff': round(float(away[1]), 4), 'constant': round(float(away[2]), 4)},
+        'games': int(table['games'].sum())
+    }
+
+def fit_leagues(tasks: Dict[str, List[Tuple[str, str]]], window: int = 6, workers: int = None):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {league: executor.submit(fit_league, file_paths, league, window) for league, file_paths in tasks.items()}
+        return {league: future.result() for league, future in futures.items()}
+
+def write_coeffs(coeffs: Dict[str, dict], config_path: str):
+    # Only the coefficients are merged, bankroll updates made since the fit started are kept
+    return update_config(coeffs, config_path, ['home', 'away'])
@@ -0,0 +1,160 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from backtesting.backtest import HIST_DATA_COLUMNS, get_closing_odds, load_hist_data, simulate
+from strategies.match_ratings import compute_probas, compute_team_ratings, compute_values, select_bets
+
+SWEEP_COLUMNS = ['league_code', 'window', 'coeff_scale', 'frac_kelly', 'bets', 'staked', 'profit', 'yield', 'drawdown', 'rank']
+
+# Attached once per worker by init_worker, so grid points only ship a few scalars
+shared_arrays: Dict[str, np.ndarray] = {}
+
+def prior_rolling_sums(data: DataFrame, league: str, season: str, windows: List[int]):
+    n = len(data)
+    df = data[HIST_DATA_COLUMNS].assign(Match=np.arange(n)).set_index('Date')
+    ratings = compute_team_ratings(df, league, season)
+
+    # One cumulative sum per team, every window is then a single shifted difference
+    rating = ratings['Rating'].fillna(0.)
+    missing = ratings['Rating'].isna().astype(int)
+    teams = ratings['Team']
+    previous = rating.groupby(teams, sort=False, observed=True).cumsum() - rating
+    previous_missing = missing.groupby(teams, sort=False, observed=True).cumsum() - missing
+
+    is_home = (ratings['Team'] == ratings['HomeTeam']).to_numpy()
+    matches = ratings['Match'].to_numpy()
+    home = np.full((len(windows), n), np.nan)
+    away = np.full((len(windows), n), np.nan)
+
+    for i, window in enumerate(windows):
+        rolling = previous - previous.groupby(teams, sort=False, observed=True).shift(window)
+        rolling_missing = previous_missing - previous_missing.groupby(teams, sort=False, observed=True).shift(window)
+        rolling = rolling.where(rolling_missing == 0).to_numpy()
+        home[i, matches[is_home]] = rolling[is_home]
+        away[i, matches[~is_home]] = rolling[~is_home]
+
+    return home, away
+
+def load_sweep_data(tasks: List[Tuple[str, str, str]], windows: List[int]):
+    homes, aways, odds, outcomes, slates, keys = [], [], [], [], [], []
+    offset = 0
+
+    for file_path, league, season in tasks:
+        data = load_hist_data(file_path)
+        home, away = prior_rolling_sums(data, league, season, windows)
+        fthg, ftag = data['FTHG'].to_numpy(dtype=int), data['FTAG'].to_numpy(dtype=int)
+        game_dates = pd.to_datetime(data['Date'], dayfirst=True, format='mixed')
+
+        homes.append(home)
+        aways.append(away)
+        odds.append(get_closing_odds(data)[0])
+        outcomes.append(np.where(fthg > ftag, 0, np.where(fthg < ftag, 2, 1)))
+        slates.append(pd.factorize(game_dates)[0])
+        keys.append((league, season, offset, offset + len(data)))
+        offset += len(data)
+
+    arrays = {
+        'home': np.concatenate(homes, axis=1),
+        'away': np.concatenate(aways, axis=1),
+        'odds': np.concatenate(odds),
+        'outcomes': np.concatenate(outcomes).astype(np.int8),
+        'slates': np.concatenate(slates).astype(np.int32)
+    }
+    return arrays, keys
+
+def share_arrays(arrays: Dict[str, np.ndarray]):
+    blocks, specs = [], {}
+
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+
+    return blocks, specs
+
+def init_worker(specs: dict):
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        shared_arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        # Keep the mapping alive for the lifetime of the worker
+        shared_arrays[f'_{name}'] = block
+
+def max_drawdown(bankrolls: np.ndarray):
+    peaks = np.maximum.accumulate(bankrolls)
+    return float(((peaks - bankrolls) / peaks).max() * 100) if len(bankrolls) > 0 else 0.
+
+def evaluate(key: tuple, window_idx: int, coeff_scale: float, frac: float, league_config: dict, staking_strategy: str):
+    _, _, start, end = key
+    home = shared_arrays['home'][window_idx, start:end]
+    away = shared_arrays['away'][window_idx, start:end]
+    odds = shared_arrays['odds'][start:end]
+    outcomes = shared_arrays['outcomes'][start:end]
+    slate_ids = shared_arrays['slates'][start:end]
+
+    keep = ~(np.isnan(home) | np.isnan(away) | np.isnan(odds).any(axis=1))
+    odds, outcomes, slate_ids = odds[keep], outcomes[keep], slate_ids[keep]
+    match_ratings = home[keep] - away[keep]
+
+    home_win_coeffs = dict(league_config['home'], beta_coeff=league_config['home']['beta_coeff'] * coeff_scale)
+    away_win_coeffs = dict(
+        league_config['away'],
+        beta_coeff=league_config['away']['beta_coeff'] * coeff_scale,
+        beta_squared_coeff=league_config['away']['beta_squared_coeff'] * coeff_scale
+    )
+    probas = compute_probas(match_ratings, home_win_coeffs, away_win_coeffs)
+    _, values = compute_values(probas, odds)
+
+    order = np.argsort(slate_ids, kind='stable')
+    slates = np.split(order, np.flatnonzero(np.diff(slate_ids[order])) + 1) if len(order) > 0 else []
+    bankroll = league_config['bankroll']
+    stakes, _, final_bankroll = simulate(odds, values, outcomes, slates, bankroll, staking_strategy, frac=frac)
+
+    bets, _, stake, flag = select_bets(stakes, values)
+    stake = np.where(flag, stake.round(1), 0.)
+    won = np.where(bets == outcomes, stake * odds[np.arange(len(odds)), bets], 0.)
+
+    # Bankroll after each settled slate, starting from the league bankroll
+    settled = np.array([bankroll] + [0.] * len(slates))
+    for i, idx in enumerate(slates):
+        settled[i + 1] = settled[i] - stake[idx].sum() + won[idx].sum()
+
+    return int(flag.sum()), float(stake.sum()), float(won.sum() - stake.sum()), max_drawdown(settled)
+
+def run_sweep(tasks: List[Tuple[str, str, str]], strat_config: dict, staking_strategy: str, windows: List[int], coeff_scales: List[float], fracs: List[float], workers: int = None):
+    arrays, keys = load_sweep_data(tasks, windows)
+    blocks, specs = share_arrays(arrays)
+    grid = list(product(range(len(windows)), coeff_scales, fracs))
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(specs,)) as executor:
+            futures = {
+                (key[0], key[1], window_idx, coeff_scale, frac): executor.submit(evaluate, key, window_idx, coeff_scale, frac, strat_config[key[0]], staking_strategy)
+                for key in keys for window_idx, coeff_scale, frac in grid
+            }
+            rows = [(league, windows[window_idx], coeff_scale, frac, *future.result()) for (league, _, window_idx, coeff_scale, frac), future in futures.items()]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return rank_results(DataFrame(rows, columns=['league_code', 'window', 'coeff_scale', 'frac_kelly', 'bets', 'staked', 'profit', 'drawdown']))
+
+def rank_results(results: DataFrame):
+    if len(results) == 0:
+        return DataFrame(columns=SWEEP_COLUMNS)
+
+    summary = results.groupby(['league_code', 'window', 'coeff_scale', 'frac_kelly'], as_index=False).agg(
+        bets=('bets', 'sum'), staked=('staked', 'sum'), profit=('profit', 'sum'), drawdown=('drawdown', 'max')
+    )
+    summary['yield'] = np.where(summary['staked'] > 0, summary['profit'] / summary['staked'].where(summary['staked'] > 0) * 100, 0.)
+    summary = summary.sort_values(by=['league_code', 'yield', 'drawdown'], ascending=[True, False, True])
+    summary['rank'] = summary.groupby('league_code').cumcount() + 1
+
+    return summary[SWEEP_COLUMNS].round(2).reset_index(drop=True)
@@ -0,0 +1,38 @@
+from logging import Logger
+
+from bot.betting_bot import BettingBot
+
+class BankrollLedger:
+    def __init__(self, betting_bot: BettingBot, logger: Logger, reconcile_every: int = 10):
+        self.betting_bot = betting_bot
+        self.logger = logger
+        self.reconcile_every = reconcile_every
+        self.balance = None
+        self.placed = 0
+
+    def reconcile(self):
+        self.betting_bot.simulate_human_behavior()
+        remote = self.betting_bot.check_balance(self.logger)
+
+        if self.balance is not None and round(remote, 2) != round(self.balance, 2):
+            self.logger.warning(f'Ledger balance ${self.balance:.2f} differs from remote balance ${remote:.2f}, using remote')
+
+        self.balance = remote
+        self.placed = 0
+        return self.balance
+
+    def get_balance(self):
+        # Seeded with one balance call on first use, then refreshed every reconcile_every bets
+        if self.balance is None or self.placed >= self.reconcile_every:
+            self.reconcile()
+        return self.balance
+
+    def can_afford(self, stake: float):
+        return self.get_balance() > stake
+
+    def debit(self, stake: float):
+        if self.balance is None or stake >= self.balance:
+            raise ValueError(f'Balance of ${self.balance} too low for stake ${stake}')
+
+        self.balance -= stake
+        self.placed += 1
@@ -6,11 +6,12 @@ import random
 import requests
 from requests.exceptions import RetryError
 from bot.betting_bot import BettingBot
+from helpers.response_archive import get_archive
 
 from dotenv import load_dotenv
 import os
 
-from utils.utils import RESPONSES_DIR, create_dir, gen_hmac_sha512_hash, gen_pbkdf2_sha512_hash, gen_sha512_hash
+from utils.utils import RESPONSES_DIR, gen_hmac_sha512_hash, gen_pbkdf2_sha512_hash, gen_sha512_hash
 
 load_dotenv(override=True)
 
@@ -20,7 +21,7 @@ DEVICE_ID = os.environ['DEVICE_ID']
 today = datetime.datetime.now().strftime('%Y-%m-%d')
 
 class BateryWinBot(BettingBot):
-    def __init__(self, name):
+    def __init__(self, name, **kwargs):
         super().__init__(BATERY_WIN_API_URL)
         self.headers = {
             # 'Content-Type': 'application/json',
@@ -32,8 +33,8 @@ class BateryWinBot(BettingBot):
             "Sec-Ua-Platform": "Windows"
         }
         self.name = name
-        self.responses_directory_path = f'{RESPONSES_DIR}/{name}/{today}'
-        create_dir(self.responses_directory_path)
+        self.responses_directory_path = f'{RESPONSES_DIR}/{name}'
+        self.archive = get_archive(self.responses_directory_path)
     
     def login(self, credentials, logger: Logger, **kwargs):
         login_url = f"{self.base_url}/session/login/createProcess"
@@ -75,8 +76,7 @@ class BateryWinBot(BettingBot):
             response = self.session.post(login_url, data=payload, headers=self.headers)
             data = response.json()
 
-            with open(f'{self.responses_directory_path}/login.json', 'w') as f:
-                json.dump(data, f, indent=4)
+            self.archive.record_response('login', None, data, response, redact=True)
 
             response.raise_for_status()
 
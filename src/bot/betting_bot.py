@@ -1,16 +1,45 @@
 from abc import abstractmethod
 
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
+import threading
 import time
-import random
 
+from helpers.pacer import Pacer
+from helpers.rate_limiter import RateLimiter
+from helpers.replay import REPLAY_DATE
 from helpers.session import SessionManager
 
 class BettingBot:
-    def __init__(self, base_url):
+    # Per bookmaker concurrency and requests per second for slate wide calls
+    max_workers = 1
+    rate_limit = None
+    rate_burst = 1
+    # Randomized gap in seconds kept between paced requests to look like a human
+    pacing = (1, 3)
+    # Seconds a stored authenticated session is reused before logging in again
+    session_ttl = 60 * 60
+    # Seconds prefetched stake limits are trusted at placement time
+    limits_ttl = 30
+    # Requests safe to send again after a 401, a rejected bet placement is never resent blindly
+    replay_methods = ('GET',)
+
+    def __init__(self, base_url, session_file='session.pkl'):
         self.base_url = base_url
-        self.session_manager = SessionManager()
+        self.session_manager = SessionManager(session_file=session_file)
         self.session = self.session_manager.get_session()
+        # Replayed responses come from disk, there is nobody to throttle or look human to
+        self.rate_limiter = RateLimiter(self.rate_limit, self.rate_burst) if self.rate_limit and not REPLAY_DATE else None
+        self.pacer = Pacer(0., 0.) if REPLAY_DATE else Pacer(*self.pacing)
+        self.session_store = None
+        self.credentials = None
+        self.logger = None
+        self.auth_lock = threading.Lock()
+        self.auth_local = threading.local()
+        self.limits = {}
+        self.limits_lock = threading.Lock()
+        self.session.hooks['response'].append(self.pacer.on_response)
+        self.session.hooks['response'].append(self.on_unauthorized)
 
     @abstractmethod
     def login(self, credentials, logger: Logger, **kwargs):
@@ -28,6 +57,48 @@ class BettingBot:
     def check_odds(self, url, logger: Logger, **kwargs):
         raise NotImplementedError('Method is required!')
     
+    def check_odds_many(self, game_urls, logger: Logger, **kwargs):
+        def check_odds(game_url):
+            return self.check_odds(game_url.get('url'), logger, game_id=game_url['id'], home=game_url['home'], away=game_url['away'], **kwargs)
+
+        odds = self.run_concurrently(check_odds, game_urls)
+        return {game_url['id']: game_odds for game_url, game_odds in zip(game_urls, odds)}
+
+    def prefetch_limits(self, candidates, logger: Logger, **kwargs):
+        def get_limits(candidate):
+            game_info, selection, odds = candidate
+            return self.get_max_min_stake(game_info, selection, odds, logger, **kwargs)
+
+        limits = self.run_concurrently(get_limits, candidates)
+        fetched_at = time.monotonic()
+
+        with self.limits_lock:
+            for (game_info, selection, odds), (min_stake, max_stake) in zip(candidates, limits):
+                self.limits[(game_info['id'], selection, odds)] = (min_stake, max_stake, fetched_at)
+
+        logger.info(f'Prefetched stake limits for {len(candidates)} bet(s)')
+
+    def get_limits(self, game_info, selection, odds, logger: Logger, **kwargs):
+        with self.limits_lock:
+            limits = self.limits.pop((game_info['id'], selection, odds), None)
+
+        if limits is not None and time.monotonic() - limits[2] <= self.limits_ttl:
+            return limits[0], limits[1]
+
+        return self.get_max_min_stake(game_info, selection, odds, logger, **kwargs)
+
+    def run_concurrently(self, fn, items):
+        def call(item):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            return fn(item)
+
+        if len(items) == 0:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(call, items))
+
     @abstractmethod
     def get_max_min_stake(self, game_info, selection, odds, logger, **kwargs):
         raise NotImplementedError('Method is required!')
@@ -40,8 +111,71 @@ class BettingBot:
     def logout(self, logger: Logger, **kwargs):
         raise NotImplementedError('Method is required!')
 
+    @property
+    def authenticating(self):
+        # Per thread, so a login in one odds worker doesn't mask a 401 in another
+        return getattr(self.auth_local, 'active', False)
+
+    @authenticating.setter
+    def authenticating(self, value: bool):
+        self.auth_local.active = value
+
+    def get_auth_state(self):
+        return {}
+
+    def set_auth_state(self, state: dict):
+        pass
+
+    def save_session(self, logger: Logger):
+        if self.session_store is None:
+            return False
+
+        cookies = [{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path} for cookie in self.session.cookies]
+        self.session_store.save({'auth': self.get_auth_state(), 'cookies': cookies}, self.session_ttl)
+        logger.info(f'Session saved for {self.session_ttl}s')
+        return True
+
+    def restore_session(self, logger: Logger):
+        state = self.session_store.load() if self.session_store is not None else None
+
+        if state is None:
+            return False
+
+        for cookie in state['cookies']:
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+        self.set_auth_state(state['auth'])
+        logger.info('Reusing stored session')
+        return True
+
+    def on_unauthorized(self, response, *args, **kwargs):
+        if response.status_code != 401 or self.credentials is None or self.authenticating:
+            return response
+
+        request = response.request.copy()
+
+        with self.auth_lock:
+            # Another thread may already have logged in again since this request was sent
+            stale = any(request.headers.get(key) != value for key, value in self.headers.items() if key in request.headers)
+
+            if not stale:
+                self.logger.warning(f'Session rejected by {response.url}, logging in again')
+
+                if self.session_store is not None:
+                    self.session_store.clear()
+
+                if not self.login(self.credentials, self.logger, restore=False):
+                    return response
+
+        if request.method not in self.replay_methods:
+            return response
+
+        # Replay the rejected request with the fresh auth headers, a second 401 is returned as is
+        request.headers.update({key: value for key, value in self.headers.items() if key in request.headers})
+        request.hooks = {'response': [self.pacer.on_response]}
+        return self.session.send(request)
+
     def simulate_human_behavior(self):
-        time.sleep(random.uniform(1, 3))
+        self.pacer.wait()
 
     # def __del__(self):
     #     self.session_manager.save_session()
@@ -5,7 +5,7 @@ from bot.william_hill_bot import WilliamHillBot
 class BettingBotFactory(object):
     def select_betting_bot(self, choice: str = 'pinnacle', **kwargs):
         betting_bot = get_betting_bot(choice)
-        return betting_bot(choice)
+        return betting_bot(choice, **kwargs)
 
 def get_betting_bot(choice: str):
     if choice.lower() == 'pinnacle':
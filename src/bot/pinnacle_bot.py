@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 import json
 from logging import Logger
 import random
+import time
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
@@ -11,7 +12,9 @@ import requests
 from requests.exceptions import RetryError
 
 from bot.betting_bot import BettingBot
-from utils.utils import convert_odds, create_dir, extract_time, generate_uuid, DEVICE_UUID, RESPONSES_DIR
+from helpers.response_archive import get_archive
+from helpers.session_store import SessionStore
+from utils.utils import convert_odds, extract_time, generate_uuid, DEVICE_UUID, RESPONSES_DIR
 
 load_dotenv(override=True)
 
@@ -23,8 +26,16 @@ PINNACLE_API_KEY = os.environ['PINNACLE_API_KEY']
 today = datetime.now().strftime('%Y-%m-%d')
 
 class PinnacleBettingBot(BettingBot):
-    def __init__(self, name):
-        super().__init__(PINNACLE_GUEST_API_URL)
+    max_workers = 8
+    rate_limit = 10
+    rate_burst = 8
+    # Seconds a league market snapshot is trusted before falling back to per matchup requests
+    markets_ttl = 60
+
+    def __init__(self, name, **kwargs):
+        self.guest_api_url = kwargs.get('guest_api_url', PINNACLE_GUEST_API_URL)
+        self.api_url = kwargs.get('api_url', PINNACLE_API_URL)
+        super().__init__(self.guest_api_url, kwargs.get('session_file', 'session.pkl'))
         self.headers = {
             'Content-Type': 'application/json',
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -33,10 +44,25 @@ class PinnacleBettingBot(BettingBot):
             'x-device-uuid': DEVICE_UUID
         }
         self.name = name
-        self.responses_directory_path = f'{RESPONSES_DIR}/{self.name}/{today}'
-        create_dir(self.responses_directory_path)
+        self.responses_directory_path = f"{kwargs.get('responses_dir', RESPONSES_DIR)}/{self.name}"
+        self.archive = get_archive(self.responses_directory_path)
+        self.session_store = SessionStore.from_env(self.name) if kwargs.get('session_store', True) else None
+        self.markets = {}
+        self.matchup_leagues = {}
+        self.snapshots = {}
     
     def login(self, credentials, logger: Logger, **kwargs):
+        self.credentials = credentials
+        self.logger = logger
+
+        if kwargs.get('restore', True) and self.restore_session(logger):
+            if self.validate_session(logger):
+                return True
+            logger.warning('Stored session rejected, logging in again')
+            self.session_store.clear()
+
+        self.base_url = self.guest_api_url
+        self.headers.pop('X-Session', None)
         login_url = f"{self.base_url}/sessions"
         payload = {
             'username': credentials['username'],
@@ -47,15 +73,16 @@ class PinnacleBettingBot(BettingBot):
         payload = json.dumps(payload)
 
         try:
+            self.authenticating = True
             response = self.session.post(login_url, data=payload, headers=self.headers)
             data = response.json()
 
-            with open(f'{self.responses_directory_path}/login.json', 'w') as f:
-                json.dump(data, f, indent=4)
+            # The login body holds the credentials and the response the session token, both are left out of the archive
+            self.archive.record_response('login', None, data, response, redact=True)
 
             response.raise_for_status()
             self.headers['X-Session'] = data.get('token', '')
-            self.base_url = PINNACLE_API_URL
+            self.base_url = self.api_url
         except requests.HTTPError as http_err:
             logger.error(f"Login failed | HTTP error occurred: {http_err}")
         except RetryError as retry_err:
@@ -63,7 +90,29 @@ class PinnacleBettingBot(BettingBot):
         except Exception as err:
             logger.error(f"login(): Other error occurred: {err}")
         else:
+            self.save_session(logger)
             return True
+        finally:
+            self.authenticating = False
+
+    def validate_session(self, logger: Logger):
+        # A restored token may have been revoked server side, the balance call is the cheapest authenticated request
+        try:
+            self.authenticating = True
+            response = self.session.get(f"{self.base_url}/wallet/balance", headers=self.headers)
+            return response.status_code == 200
+        except Exception as err:
+            logger.error(f"validate_session(): Other error occurred: {err}")
+            return False
+        finally:
+            self.authenticating = False
+
+    def get_auth_state(self):
+        return {'token': self.headers.get('X-Session', ''), 'base_url': self.base_url}
+
+    def set_auth_state(self, state: dict):
+        self.headers['X-Session'] = state['token']
+        self.base_url = state['base_url']
     
     def check_balance(self, logger: Logger, **kwargs):
         try:
@@ -73,8 +122,7 @@ class PinnacleBettingBot(BettingBot):
             response = self.session.get(balance_url, headers=self.headers)
             data = response.json()
 
-            with open(f'{self.responses_directory_path}/check_balance.json', 'w') as f:
-                json.dump(data, f, indent=4)
+            self.archive.record_response('check_balance', None, data, response)
 
             response.raise_for_status()
             balance = float(data['amount'])
@@ -98,8 +146,7 @@ class PinnacleBettingBot(BettingBot):
             response = self.session.get(f'{self.base_url}/leagues/{league}/matchups', headers=self.headers, params=params)
             data = response.json()
 
-            with open(f'{self.responses_directory_path}/get_game_urls_{league}.json', 'w') as f:
-                json.dump({'data': data}, f, indent=4)
+            self.archive.record_response('get_game_urls', league, data, response)
 
             response.raise_for_status()
 
@@ -113,6 +160,9 @@ class PinnacleBettingBot(BettingBot):
             unique_games = {game['id']: game for game in today_games}
             games_filtered = list(unique_games.values())
             games_urls = [{'id': game['id'], 'startTime': game['startTime'], 'url': f"{self.base_url}/matchups/{game['id']}/markets/related/straight", 'home': game['participants'][0]['name'], 'away': game['participants'][1]['name']} for game in games_filtered]
+
+            if kwargs.get('snapshot', True) and len(games_urls) > 0:
+                self.load_markets(league, logger)
         except requests.HTTPError as http_err:
             logger.error(f"Failed to retrieve games for date {today} | HTTP error occurred: {http_err} ")
         except RetryError as retry_err:
@@ -123,16 +173,67 @@ class PinnacleBettingBot(BettingBot):
             logger.info(f'Games urls: {games_urls}')
             return games_urls
         
+    def load_markets(self, league, logger: Logger):
+        try:
+            loaded = False
+
+            response = self.session.get(f'{self.base_url}/leagues/{league}/markets/straight', headers=self.headers, params={'primaryOnly': 'false'})
+            data = response.json()
+
+            self.archive.record_response('load_markets', league, data, response)
+
+            response.raise_for_status()
+
+            markets = {}
+            for market in data:
+                if market.get('isAlternate', False):
+                    continue
+                limits = {limit['type']: float(limit['amount']) for limit in market.get('limits', [])}
+                for price in market['prices']:
+                    markets.setdefault((market['matchupId'], market['key'], price['designation']), {'price': price['price'], 'limits': limits})
+
+            # Replace the league's previous snapshot so suspended markets don't linger
+            stale = [key for key in self.markets if self.matchup_leagues.get(key[0]) == league]
+            for key in stale:
+                del self.markets[key]
+
+            self.markets.update(markets)
+            self.matchup_leagues.update({key[0]: league for key in markets})
+            self.snapshots[league] = time.monotonic()
+            loaded = True
+        except requests.HTTPError as http_err:
+            logger.error(f"Failed to load markets for league {league} | HTTP error occurred: {http_err} ")
+        except RetryError as retry_err:
+            logger.error(f"Failed to load markets for league {league} | Retry Error: {retry_err}")
+        except Exception as err:
+            logger.error(f"load_markets(): Other error occurred: {err}")
+        else:
+            logger.info(f'Loaded {len(markets)} prices for league {league}')
+        finally:
+            return loaded
+
+    def get_market(self, game_id, key, designation):
+        league = self.matchup_leagues.get(game_id, None)
+
+        if league is None or time.monotonic() - self.snapshots.get(league, float('-inf')) > self.markets_ttl:
+            return None
+
+        return self.markets.get((game_id, key, designation), None)
+
     def check_odds(self, url, logger: Logger, **kwargs):
         try:
             odds = 0., 0., 0.
             game_id = kwargs.get('game_id', random.randint(0, 999_999))
 
+            markets = [self.get_market(game_id, 's;0;m', designation) for designation in ('home', 'draw', 'away')]
+            if all(market is not None for market in markets):
+                odds = tuple(float(convert_odds(market['price'], 'american', 'decimal')) for market in markets)
+                return odds
+
             response = self.session.get(url, headers=self.headers)
             data = response.json()
 
-            with open(f'{self.responses_directory_path}/check_odds_{game_id}.json', 'w') as f:
-                json.dump({'data': data}, f, indent=4)
+            self.archive.record_response('check_odds', game_id, data, response)
             
             response.raise_for_status()
 
@@ -156,6 +257,13 @@ class PinnacleBettingBot(BettingBot):
 
             game_id = game_info['id']
 
+            market = self.get_market(game_id, 's;0;m', selection)
+            if market is not None and 'maxRiskStake' in market['limits']:
+                min_stake = market['limits'].get('minRiskStake', min_stake)
+                max_stake = market['limits']['maxRiskStake']
+                logger.info(f"Minimum stake for game {game_info['home']} - {game_info['away']}: ${min_stake}")
+                return min_stake, max_stake
+
             url = f"{self.base_url}/bets/straight/quote"
             payload = {
                         "oddsFormat": "decimal", 
@@ -169,8 +277,7 @@ class PinnacleBettingBot(BettingBot):
             response = self.session.post(url, data=payload, headers=self.headers)
             data = response.json()
             
-            with open(f'{self.responses_directory_path}/get_min_max_stake_{game_id}.json', 'w') as f:
-                json.dump(data, f, indent=4)
+            self.archive.record_response('get_min_max_stake', game_id, data, response)
             
             response.raise_for_status()
 
@@ -227,8 +334,7 @@ class PinnacleBettingBot(BettingBot):
             payload = json.dumps(payload)
             response = self.session.post(bet_url, data=payload, headers=self.headers)
             data = response.json()
-            with open(f"{self.responses_directory_path}/place_bet_{game_id}.json", 'w') as f:
-                json.dump(data, f, indent=4)
+            self.archive.record_response('place_bet', game_id, data, response)
             
             response.raise_for_status()
         except requests.HTTPError as http_err:
@@ -251,8 +357,7 @@ class PinnacleBettingBot(BettingBot):
             response = self.session.delete(logout_url, headers=self.headers)
             data = response.json()
 
-            with open(f'{self.responses_directory_path}/logout.json', 'w') as f:
-                json.dump(data, f, indent=4)
+            self.archive.record_response('logout', None, data, response)
 
             response.raise_for_status()
 
@@ -23,7 +23,7 @@ WILLIAM_HILL_TRANSACT_API = os.environ['WILLIAM_HILL_TRANSACT_API']
 today = datetime.now().strftime('%Y-%m-%d')
 
 class WilliamHillBot(BettingBot):
-    def __init__(self, name):
+    def __init__(self, name, **kwargs):
         super().__init__(WILLIAM_HILL_BASE_URL)
         self.headers = {
             # 'Content-Type': 'application/json',
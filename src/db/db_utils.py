@@ -1,38 +1,107 @@
+import atexit
 import sqlite3
 import os
+import threading
 from dotenv import load_dotenv
 
+from helpers.replay import REPLAY_DATE, create_replay_db, get_replay_db_file
+
 load_dotenv(override=True)
 
-DB_FILE = os.environ['DB_FILE']
+LIVE_DB_FILE = os.environ['DB_FILE']
+DB_FILE = get_replay_db_file(LIVE_DB_FILE)
+DB_BUSY_TIMEOUT = float(os.environ.get('DB_BUSY_TIMEOUT', 30))
+
+# WAL lets the cron jobs read while another process writes bets, NORMAL is durable enough under WAL
+DB_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+]
+
+local = threading.local()
+connections = []
+connections_lock = threading.Lock()
+
+def connect(db_file: str = DB_FILE):
+    # Each thread only uses its own connection, the flag just lets close_connections run from the main thread
+    con = sqlite3.connect(db_file, timeout=DB_BUSY_TIMEOUT, cached_statements=256, check_same_thread=False)
+    con.row_factory = sqlite3.Row
+    for pragma in DB_PRAGMAS:
+        con.execute(pragma)
+    return con
+
+def get_connection():
+    # One connection per thread, reopened in a forked child since sqlite connections can't cross a fork
+    con = getattr(local, 'con', None)
+
+    if con is None or local.pid != os.getpid():
+        if REPLAY_DATE:
+            create_replay_db(LIVE_DB_FILE)
+        con = connect()
+        local.con, local.pid = con, os.getpid()
+        with connections_lock:
+            connections.append(con)
+
+    return con
+
+@atexit.register
+def close_connections():
+    with connections_lock:
+        for con in connections:
+            con.close()
+        connections.clear()
 
 def load_one(query, *args):
-    with sqlite3.connect(DB_FILE) as con:
-        con.row_factory = sqlite3.Row
-        cursor = con.cursor()
-        cursor.execute(query, args)
-        row = cursor.fetchone()
+    cursor = get_connection().execute(query, args)
+    row = cursor.fetchone()
+    cursor.close()
     return row
 
 def load_many(query, *args):
-    with sqlite3.connect(DB_FILE) as con:
-        con.row_factory = sqlite3.Row
-        cursor = con.cursor()
-        cursor.execute(query, args)
-        rows = cursor.fetchall()
-    return rows
+    return get_connection().execute(query, args).fetchall()
 
 def execute(query, data=None):
-    with sqlite3.connect(DB_FILE) as con:
-        cursor = con.cursor()
+    con = get_connection()
+    with con:
         if data:
-            cursor.execute(query, data)
+            con.execute(query, data)
         else:
-            cursor.execute(query)
-        con.commit()
+            con.execute(query)
 
 def execute_many(query, data):
-    with sqlite3.connect(DB_FILE) as con:
-        cursor = con.cursor()
-        cursor.executemany(query, data)
-        con.commit()
\ No newline at end of file
+    con = get_connection()
+    with con:
+        con.executemany(query, data)
+
+class Writer:
+    # Rows share one open transaction that is committed every commit_every rows, so a crash only loses the uncommitted tail
+    def __init__(self, query, commit_every: int = 1):
+        self.query = query
+        self.commit_every = commit_every
+        self.pending = 0
+        self.written = 0
+
+    def write(self, data):
+        get_connection().execute(self.query, data)
+        self.pending += 1
+        self.written += 1
+
+        if self.pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        if self.pending > 0:
+            get_connection().commit()
+            self.pending = 0
+
+    def close(self):
+        self.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
\ No newline at end of file
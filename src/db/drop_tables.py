@@ -17,5 +17,25 @@ cursor.execute("""
                DROP TABLE IF EXISTS match_ratings;
                """)
 
+cursor.execute("""
+               DROP TABLE IF EXISTS results;
+               """)
+
+cursor.execute("""
+               DROP TABLE IF EXISTS results_sources;
+               """)
+
+cursor.execute("""
+               DROP TABLE IF EXISTS run_journal;
+               """)
+
+cursor.execute("""
+               DROP TABLE IF EXISTS run_journal_leagues;
+               """)
+
+cursor.execute("""
+               DROP TABLE IF EXISTS schema_version;
+               """)
+
 con.commit()
 con.close()
\ No newline at end of file
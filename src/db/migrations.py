@@ -0,0 +1,181 @@
+import sqlite3
+
+# Append only, each step runs once per database in its own transaction and must be safe to re-run
+MIGRATIONS = [
+    (1, 'create upcoming_games and match_ratings', [
+        """
+        CREATE TABLE IF NOT EXISTS upcoming_games ( id INTEGER PRIMARY KEY, 
+                game_id INTEGER UNIQUE NOT NULL, 
+                game_date TEXT NOT NULL, 
+                home_team TEXT NOT NULL, 
+                away_team TEXT NOT NULL,
+                season TEXT NOT NULL, 
+                league_code TEXT NOT NULL, 
+                league_name TEXT NOT NULL, 
+                round TEXT NOT NULL,
+                home_rank INTEGER NOT NULL,
+                away_rank INTEGER NOT NULL,
+                created_at DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%S.%f', 'now', 'localtime')),
+                updated_at DATETIME NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS match_ratings ( id INTEGER PRIMARY KEY, 
+                game_id INTEGER UNIQUE NOT NULL,
+                game_date TEXT NOT NULL, 
+                home_team TEXT NOT NULL, 
+                away_team TEXT NOT NULL,
+                season TEXT NOT NULL, 
+                league_code INTEGER NOT NULL, 
+                league_name TEXT NOT NULL, 
+                round INTEGER NOT NULL,
+                home_rank INTEGER NOT NULL,
+                away_rank INTEGER NOT NULL,
+                fthg INTEGER NULL,
+                ftag INTEGER NULL,
+                ftr TEXT NULL,
+                bookmaker TEXT NOT NULL,
+                bookmaker_game_id TEXT NOT NULL,
+                home_odds REAL NOT NULL,
+                draw_odds REAL NOT NULL,
+                away_odds REAL NOT NULL,
+                home_proba REAL NOT NULL,
+                draw_proba REAL NOT NULL,
+                away_proba REAL NOT NULL,
+                vig REAL NOT NULL,
+                home_rating INTEGER NOT NULL,
+                away_rating INTEGER NOT NULL,
+                match_rating INTEGER NOT NULL,
+                hwto REAL NOT NULL,
+                tdo REAL NOT NULL,
+                awto REAL NOT NULL,
+                hwtp REAL NOT NULL,
+                dtp REAL NOT NULL,
+                awtp REAL NOT NULL,
+                hv REAL NOT NULL,
+                dv REAL NOT NULL,
+                av REAL NOT NULL,
+                h REAL NOT NULL,
+                d REAL NOT NULL,
+                a REAL NOT NULL,
+                bet TEXT NOT NULL,
+                bet_odds REAL NOT NULL,
+                value REAL NOT NULL,
+                stake REAL NOT NULL,
+                status TEXT NOT NULL,
+                bankroll REAL NOT NULL,
+                result TEXT NULL DEFAULT 'NB',
+                gl REAL NULL,
+                profit REAL NULL,
+                yield REAL NULL,
+                created_at DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%S.%f', 'now', 'localtime')),
+                updated_at DATETIME NULL
+        );
+        """,
+    ]),
+    (2, 'index the league/date, date/status and result/league lookups', [
+        'CREATE INDEX IF NOT EXISTS idx_upcoming_games_league_date ON upcoming_games (league_code, game_date)',
+        'CREATE INDEX IF NOT EXISTS idx_match_ratings_league_date ON match_ratings (league_code, game_date)',
+        'CREATE INDEX IF NOT EXISTS idx_match_ratings_date_status ON match_ratings (game_date, status)',
+        'CREATE INDEX IF NOT EXISTS idx_match_ratings_result_league ON match_ratings (result, league_code)',
+        # GENERATE_MATCH_RATINGS_REPORTS filters on status and sorts by created_at
+        'CREATE INDEX IF NOT EXISTS idx_match_ratings_status_created ON match_ratings (status, created_at)',
+    ]),
+    (3, 'create run_journal and run_journal_leagues for main.py resumes', [
+        """
+        CREATE TABLE IF NOT EXISTS run_journal (
+                run_date TEXT NOT NULL,
+                bookmaker TEXT NOT NULL,
+                strategy TEXT NOT NULL,
+                league TEXT NOT NULL,
+                game_id INTEGER NOT NULL,
+                stage TEXT NOT NULL,
+                data TEXT NULL,
+                created_at DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%S.%f', 'now', 'localtime')),
+                PRIMARY KEY (run_date, bookmaker, strategy, league, game_id, stage)
+        );
+        """,
+        # League wide entries (start bankroll and completion) have no game
+        """
+        CREATE TABLE IF NOT EXISTS run_journal_leagues (
+                run_date TEXT NOT NULL,
+                bookmaker TEXT NOT NULL,
+                strategy TEXT NOT NULL,
+                league TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                data TEXT NULL,
+                created_at DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%S.%f', 'now', 'localtime')),
+                PRIMARY KEY (run_date, bookmaker, strategy, league, stage)
+        );
+        """,
+    ]),
+    (4, 'create results with per team date indexes', [
+        """
+        CREATE TABLE IF NOT EXISTS results ( id INTEGER PRIMARY KEY,
+                league TEXT NOT NULL,
+                season TEXT NOT NULL,
+                game_date TEXT NOT NULL,
+                home_team TEXT NOT NULL,
+                away_team TEXT NOT NULL,
+                fthg INTEGER NOT NULL,
+                ftag INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                game_id INTEGER NULL,
+                created_at DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%S.%f', 'now', 'localtime')),
+                updated_at DATETIME NULL,
+                UNIQUE (league, game_date, home_team, away_team)
+        );
+        """,
+        'CREATE INDEX IF NOT EXISTS idx_results_home ON results (league, season, home_team, game_date)',
+        'CREATE INDEX IF NOT EXISTS idx_results_away ON results (league, season, away_team, game_date)',
+        """
+        CREATE TABLE IF NOT EXISTS results_sources (
+                file_path TEXT PRIMARY KEY,
+                signature TEXT NOT NULL,
+                loaded_at DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%S.%f', 'now', 'localtime'))
+        );
+        """,
+    ]),
+]
+
+def get_version(con: sqlite3.Connection):
+    con.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, description TEXT NOT NULL, applied_at DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%S.%f', 'now', 'localtime')))")
+    con.commit()
+    return con.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+def migrate(con: sqlite3.Connection, target: int = None):
+    target = MIGRATIONS[-1][0] if target is None else target
+    applied = []
+
+    if get_version(con) >= target:
+        return applied
+
+    for version, description, statements in MIGRATIONS:
+        if version > target:
+            break
+
+        # The write lock is taken before re-checking, so concurrent cron jobs apply each step once
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            if con.execute('SELECT 1 FROM schema_version WHERE version = ?', (version,)).fetchone() is None:
+                for statement in statements:
+                    con.execute(statement)
+                con.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)', (version, description))
+                applied.append(version)
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+
+    if applied:
+        con.execute('PRAGMA optimize')
+
+    return applied
+
+if __name__ == '__main__':
+    from db.db_utils import get_connection
+
+    con = get_connection()
+    print(f'Schema version {get_version(con)}')
+    print(f'Applied migrations: {migrate(con) or "none"}')
+    print(f'Schema version {get_version(con)}')
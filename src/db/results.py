@@ -0,0 +1,101 @@
+import os
+
+import dateutil.parser
+import dateutil.tz
+import pandas as pd
+from pandas import DataFrame
+
+import db.db_utils as db
+
+# The CSVs are the reference, a refreshed file overwrites what the settler appended for the same match
+UPSERT_CSV_RESULTS = """
+    INSERT INTO results (league, season, game_date, home_team, away_team, fthg, ftag, source) VALUES (?, ?, ?, ?, ?, ?, ?, 'csv')
+    ON CONFLICT (league, game_date, home_team, away_team) DO UPDATE SET season=excluded.season, fthg=excluded.fthg, ftag=excluded.ftag, source='csv',
+    updated_at=strftime('%Y-%m-%d %H:%M:%S.%f', 'now', 'localtime')
+"""
+# Legacy settler rows were dated in New York time, a CSV row for the same match a day off replaces them
+DELETE_SHIFTED_SETTLED_RESULTS = """
+    DELETE FROM results WHERE source = 'settler' AND league = ? AND season = ? AND home_team = ? AND away_team = ?
+    AND game_date BETWEEN date(?, '-1 day') AND date(?, '+1 day') AND game_date <> ?
+"""
+# A team pair meets once per season at home, so any row within a day either side is the same match
+INSERT_SETTLED_RESULTS = """
+    INSERT OR IGNORE INTO results (league, season, game_date, home_team, away_team, fthg, ftag, source, game_id)
+    SELECT :league, :season, :game_date, :home_team, :away_team, :fthg, :ftag, 'settler', :game_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM results WHERE league = :league AND season = :season AND home_team = :home_team AND away_team = :away_team
+        AND game_date BETWEEN date(:game_date, '-1 day') AND date(:game_date, '+1 day')
+    )
+"""
+SELECT_RESULTS_TEAMS = """
+    SELECT home_team FROM results WHERE league = ? AND season = ?
+    UNION SELECT away_team FROM results WHERE league = ? AND season = ?
+"""
+# Every team's last `limit` games in one pass, each half of the union walks one of the per team indexes
+SELECT_LAST_RESULTS = """
+    SELECT team, goal_diff FROM (
+        SELECT team, game_date, goal_diff, ROW_NUMBER() OVER (PARTITION BY team ORDER BY game_date DESC, id DESC) AS rn FROM (
+            SELECT id, home_team AS team, game_date, fthg - ftag AS goal_diff FROM results WHERE league = ? AND season = ?
+            UNION ALL
+            SELECT id, away_team AS team, game_date, ftag - fthg AS goal_diff FROM results WHERE league = ? AND season = ?
+        )
+    ) WHERE rn <= ? ORDER BY team, rn DESC
+"""
+COUNT_RESULTS = 'SELECT COUNT(*) FROM results WHERE league = ? AND season = ?'
+
+# football-data.co.uk dates its matches in UK time
+HIST_DATA_TIMEZONE = dateutil.tz.gettz('Europe/London')
+
+def get_source_signature(file_path: str):
+    stat = os.stat(file_path)
+    return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+def load_hist_results(data: DataFrame, league: str, season: str, file_path: str):
+    signature = get_source_signature(file_path)
+    loaded = db.load_one('SELECT signature FROM results_sources WHERE file_path = ?', os.path.abspath(file_path))
+
+    if loaded is not None and loaded[0] == signature:
+        return 0
+
+    df = data[['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']].dropna()
+    game_dates = pd.to_datetime(df['Date'], dayfirst=True, format='mixed').dt.strftime('%Y-%m-%d')
+    rows = [
+        (league, season, game_date, str(home), str(away), int(fthg), int(ftag))
+        for game_date, home, away, fthg, ftag in zip(game_dates, df['HomeTeam'], df['AwayTeam'], df['FTHG'], df['FTAG'])
+    ]
+
+    # The rows and the source signature land in the same transaction
+    con = db.get_connection()
+    with con:
+        con.executemany(DELETE_SHIFTED_SETTLED_RESULTS, [(league, season, home, away, game_date, game_date, game_date) for league, season, game_date, home, away, _, _ in rows])
+        con.executemany(UPSERT_CSV_RESULTS, rows)
+        con.execute('INSERT OR REPLACE INTO results_sources (file_path, signature) VALUES (?, ?)', (os.path.abspath(file_path), signature))
+
+    return len(rows)
+
+def to_hist_data_date(kickoff: str):
+    # The API dates fixtures in the requested timezone, the historical data in UK time
+    return dateutil.parser.parse(kickoff).astimezone(HIST_DATA_TIMEZONE).strftime('%Y-%m-%d')
+
+def append_results(league: str, season: str, rows):
+    # rows are (game_date, home, away, fthg, ftag, game_id) with team names as they appear in the historical data
+    columns = ['game_date', 'home_team', 'away_team', 'fthg', 'ftag', 'game_id']
+    rows = [{'league': league, 'season': season, **dict(zip(columns, row))} for row in rows]
+    con = db.get_connection()
+    with con:
+        before = con.total_changes
+        con.executemany(INSERT_SETTLED_RESULTS, rows)
+        return con.total_changes - before
+
+def get_results_teams(league: str, season: str):
+    return [row[0] for row in db.load_many(SELECT_RESULTS_TEAMS, league, season, league, season)]
+
+def get_last_results(league: str, season: str, limit: int):
+    # Goal differences of each team's last `limit` games, oldest first like the per team history built from the CSVs
+    results = {}
+    for team, goal_diff in db.load_many(SELECT_LAST_RESULTS, league, season, league, season, limit):
+        results.setdefault(team, []).append(goal_diff)
+    return results
+
+def count_results(league: str, season: str):
+    return db.load_one(COUNT_RESULTS, league, season)[0]
@@ -0,0 +1,99 @@
+from decimal import Decimal
+import json
+
+import numpy as np
+
+import db.db_utils as db
+
+# Stages each game goes through in main.py, placing is written right before the bookmaker call
+STAGES = ['matched', 'priced', 'scored', 'quoted', 'placing', 'placed']
+# A fresh run redoes every completed stage, but a placement that never reported back is kept so the game can't be bet twice
+CLEAR_COMPLETED_ENTRIES = """
+    DELETE FROM run_journal WHERE run_date = ? AND bookmaker = ? AND strategy = ? AND NOT (
+        stage = 'placing' AND NOT EXISTS (
+            SELECT 1 FROM run_journal placed WHERE placed.run_date = run_journal.run_date AND placed.bookmaker = run_journal.bookmaker
+            AND placed.strategy = run_journal.strategy AND placed.league = run_journal.league AND placed.game_id = run_journal.game_id AND placed.stage = 'placed'
+        )
+    )
+"""
+CLEAR_LEAGUE_ENTRIES = 'DELETE FROM run_journal_leagues WHERE run_date = ? AND bookmaker = ? AND strategy = ?'
+
+def to_native(value):
+    # Values come straight out of the numpy engine, store numbers and flags rather than their repr
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def dump(data: dict):
+    return json.dumps(data or {}, default=to_native)
+
+class RunJournal:
+    def __init__(self, run_date: str, bookmaker: str, strategy: str, resume: bool = False):
+        self.run_date = run_date
+        self.bookmaker = bookmaker
+        self.strategy = strategy
+        self.key = (run_date, bookmaker, strategy)
+
+        # Only --resume skips the work a previous run completed, interrupted placements block the game either way
+        if not resume:
+            db.execute(CLEAR_COMPLETED_ENTRIES, self.key)
+            db.execute(CLEAR_LEAGUE_ENTRIES, self.key)
+
+        self.entries = {}
+        self.bankrolls = {}
+        # Replaced rows get a new rowid, so rowid order is write order
+        for row in db.load_many('SELECT league, game_id, stage, data FROM run_journal WHERE run_date = ? AND bookmaker = ? AND strategy = ? ORDER BY rowid', *self.key):
+            self.remember(row[0], row[1], row[2], json.loads(row[3]) if row[3] else {})
+
+        self.leagues = {}
+        for row in db.load_many('SELECT league, stage, data FROM run_journal_leagues WHERE run_date = ? AND bookmaker = ? AND strategy = ?', *self.key):
+            self.leagues[(row[0], row[1])] = json.loads(row[2]) if row[2] else {}
+
+    def remember(self, league: str, game_id: int, stage: str, data: dict):
+        self.entries.setdefault((league, game_id), {})[stage] = data
+        if stage == 'placed' and 'bankroll' in data:
+            self.bankrolls[league] = data['bankroll']
+
+    def record(self, league: str, game_id: int, stage: str, data: dict = None):
+        payload = dump(data)
+        db.execute(
+            'INSERT OR REPLACE INTO run_journal (run_date, bookmaker, strategy, league, game_id, stage, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (*self.key, league, game_id, stage, payload)
+        )
+        # Kept as it reads back on resume
+        self.remember(league, game_id, stage, json.loads(payload))
+
+    def record_league(self, league: str, stage: str, data: dict = None):
+        payload = dump(data)
+        db.execute(
+            'INSERT OR REPLACE INTO run_journal_leagues (run_date, bookmaker, strategy, league, stage, data) VALUES (?, ?, ?, ?, ?, ?)',
+            (*self.key, league, stage, payload)
+        )
+        self.leagues[(league, stage)] = json.loads(payload)
+
+    def get(self, league: str, game_id: int, stage: str):
+        return self.entries.get((league, game_id), {}).get(stage, None)
+
+    def is_interrupted(self, league: str, game_id: int):
+        # The bookmaker was called but the outcome never made it here, the bet may or may not exist
+        return self.get(league, game_id, 'placing') is not None and self.get(league, game_id, 'placed') is None
+
+    def start_league(self, league: str, bankroll: float):
+        started = self.leagues.get((league, 'started'), None)
+        if started is not None:
+            return started['bankroll']
+        self.record_league(league, 'started', {'bankroll': bankroll})
+        return bankroll
+
+    def get_bankroll(self, league: str, default: float):
+        return self.bankrolls.get(league, default)
+
+    def finish_league(self, league: str, data: dict = None):
+        self.record_league(league, 'done', data)
+
+    def is_league_done(self, league: str):
+        return (league, 'done') in self.leagues
@@ -0,0 +1,18 @@
+#!/usr/bin/python3
+
+from optparse import OptionParser
+
+def args_parser():
+    parser = OptionParser('bet_bot_backtester -B <betting_strategy> [-S <staking_strategy>] [-s <seasons>] [-w <workers>]')
+    parser.add_option("-B", dest="betting_strategy", type='string', help="specify betting strategy")
+    parser.add_option("-S", dest="staking_strategy", type='string', default='kelly', help="specify staking strategy")
+    parser.add_option("-s", dest="seasons", type='string', help="specify comma separated seasons, defaults to every season in HIST_DATA_PATH")
+    parser.add_option("-w", dest="workers", type='int', help="specify number of worker processes")
+
+    (options, args) = parser.parse_args()
+
+    if (options.betting_strategy == None):
+        print(f'Usage: {parser.usage}')
+        exit(1)
+
+    return options
@@ -0,0 +1,19 @@
+#!/usr/bin/python3
+
+from optparse import OptionParser
+
+def args_parser():
+    parser = OptionParser('bet_bot_fitter -B <betting_strategy> [-s <seasons>] [-W <window>] [-w <workers>] [-n]')
+    parser.add_option("-B", dest="betting_strategy", type='string', help="specify betting strategy")
+    parser.add_option("-s", dest="seasons", type='string', help="specify comma separated seasons, defaults to every season in HIST_DATA_PATH")
+    parser.add_option("-W", dest="window", type='int', default=6, help="specify rolling window")
+    parser.add_option("-w", dest="workers", type='int', help="specify number of worker processes")
+    parser.add_option("-n", dest="dry_run", action='store_true', default=False, help="log the fitted coefficients without updating the config")
+
+    (options, args) = parser.parse_args()
+
+    if (options.betting_strategy == None):
+        print(f'Usage: {parser.usage}')
+        exit(1)
+
+    return options
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from filelock import FileLock
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Only GET requests whose url matches one of these patterns are cached, everything else goes to the network
+DEFAULT_TTLS = [
+    (r'/v3/standings', 24 * 60 * 60),
+    (r'/v3/fixtures', 2 * 60),
+    (r'/leagues/\d+/matchups', 5 * 60),
+    (r'/leagues/\d+/markets/straight', 10),
+    (r'/matchups/\d+/markets/related/straight', 10),
+]
+# Request headers that change the response (credentials, content negotiation), they are hashed into the cache key
+# so a response fetched with one account or format is never served to another
+VARY_HEADERS = ['Authorization', 'Accept', 'Accept-Language', 'Cookie', 'X-Session', 'x-api-key', 'x-rapidapi-key', 'x-rapidapi-host']
+# Keys share a fixed set of lock files, so the lock directory stays the same size however many urls are fetched
+LOCK_STRIPES = 64
+
+class CachingAdapter(HTTPAdapter):
+    __attrs__ = HTTPAdapter.__attrs__ + ['cache_file', 'ttls', 'vary_headers']
+
+    def __init__(self, cache_file: str, ttls=DEFAULT_TTLS, vary_headers=VARY_HEADERS, **kwargs):
+        self.cache_file = cache_file
+        self.ttls = ttls
+        self.vary_headers = vary_headers
+        super().__init__(**kwargs)
+        self.setup()
+
+    def __setstate__(self, state):
+        # Sessions pickled before the headers were part of the key
+        state.setdefault('vary_headers', VARY_HEADERS)
+        super().__setstate__(state)
+        self.setup()
+
+    def setup(self):
+        self.patterns = [(re.compile(pattern), ttl) for pattern, ttl in self.ttls]
+        self.local = threading.local()
+        self.connections = []
+        self.connections_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+
+        with self.connect() as con:
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, body BLOB, expires_at REAL)')
+
+    def connect(self):
+        # One connection per thread, reopened in a forked child since sqlite connections can't cross a fork
+        con = getattr(self.local, 'con', None)
+
+        if con is None or self.local.pid != os.getpid():
+            # Each thread only uses its own connection, the flag just lets close run from the main thread
+            con = sqlite3.connect(self.cache_file, timeout=30, check_same_thread=False)
+            self.local.con, self.local.pid = con, os.getpid()
+            with self.connections_lock:
+                self.connections.append(con)
+
+        return con
+
+    def close(self):
+        super().close()
+        with self.connections_lock:
+            for con in self.connections:
+                con.close()
+            self.connections.clear()
+        self.local = threading.local()
+
+    def get_lock_file(self, key):
+        # The key is a sha256 hex digest, unlike hash() it gives every process the same stripe
+        return f'{self.cache_file}.locks/{int(key[:8], 16) % LOCK_STRIPES}.lock'
+
+    def get_ttl(self, request):
+        if request.method != 'GET':
+            return None
+        for pattern, ttl in self.patterns:
+            if pattern.search(request.url):
+                return ttl
+        return None
+
+    def get_key(self, request):
+        varying = [f'{name.lower()}: {request.headers[name]}' for name in self.vary_headers if name in request.headers]
+        return hashlib.sha256('\n'.join([f'{request.method} {request.url}', *varying]).encode()).hexdigest()
+
+    def send(self, request, stream=False, **kwargs):
+        ttl = self.get_ttl(request)
+
+        if ttl is None or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        key = self.get_key(request)
+        response = self.lookup(key, request)
+        if response is not None:
+            return response
+
+        # Concurrent processes asking for the same url wait here and reuse the first one's response
+        with FileLock(self.get_lock_file(key)):
+            response = self.lookup(key, request)
+            if response is not None:
+                return response
+
+            response = super().send(request, stream=stream, **kwargs)
+            if response.status_code == 200:
+                self.store(key, response, ttl)
+
+        return response
+
+    def lookup(self, key, request):
+        with self.connect() as con:
+            row = con.execute('SELECT status, headers, body FROM responses WHERE key = ? AND expires_at > ?', (key, time.time())).fetchone()
+
+        if row is None:
+            return None
+
+        response = Response()
+        response.status_code = row[0]
+        response.headers = CaseInsensitiveDict(json.loads(row[1]))
+        response._content = row[2]
+        response.url = request.url
+        response.request = request
+        response.encoding = None
+        response.reason = 'OK'
+        response.connection = self
+        response.from_cache = True
+        return response
+
+    def store(self, key, response, ttl):
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in ('content-encoding', 'transfer-encoding', 'content-length')}
+
+        with self.connect() as con:
+            con.execute(
+                'INSERT OR REPLACE INTO responses (key, url, status, headers, body, expires_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, response.url, response.status_code, json.dumps(headers), response.content, time.time() + ttl)
+            )
+            con.execute('DELETE FROM responses WHERE expires_at <= ?', (time.time(),))
+        response.from_cache = False
@@ -0,0 +1,19 @@
+#!/usr/bin/python3
+
+from optparse import OptionParser
+
+def args_parser():
+    parser = OptionParser('bet_bot_load_tester [-N <leagues>] [-M <games>] [-l <latency_ms>] [-e <error_rate>] [-d <drift>] [-S <staking_strategy>] [-r <seed>] [-o <output>] [-p]')
+    parser.add_option("-N", dest="leagues", type='int', default=5, help="specify number of mocked leagues")
+    parser.add_option("-M", dest="games", type='int', default=10, help="specify number of games per mocked league")
+    parser.add_option("-l", dest="latency", type='string', default='20,80', help="specify comma separated min,max mock response latency in ms")
+    parser.add_option("-e", dest="error_rate", type='float', default=0., help="specify share of mock responses failing with a 5xx")
+    parser.add_option("-d", dest="drift", type='float', default=0., help="specify log price drift applied on every market read")
+    parser.add_option("-S", dest="staking_strategy", type='string', default='kelly', help="specify staking strategy")
+    parser.add_option("-r", dest="seed", type='int', help="specify random seed for fixtures and ratings")
+    parser.add_option("-o", dest="output", type='string', help="specify csv file the stage report is written to, defaults to the loadtests reports directory")
+    parser.add_option("-p", dest="pacing", action='store_true', default=False, help="keep the bot's human pacing between requests")
+
+    (options, args) = parser.parse_args()
+
+    return options
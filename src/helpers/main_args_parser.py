@@ -3,10 +3,11 @@
 from optparse import OptionParser
 
 def args_parser():
-    parser = OptionParser('bet_bot_main -B <betting_strategy> -S <staking_strategy> -K <bookmaker>')
+    parser = OptionParser('bet_bot_main -B <betting_strategy> -S <staking_strategy> -K <bookmaker> [-r]')
     parser.add_option("-B", dest="betting_strategy", type='string', help="specify betting strategy")
     parser.add_option("-S", dest="staking_strategy", type='string', help="specify staking strategy")
     parser.add_option("-K", dest="bookmaker", type='string', help="specify bookmaker")
+    parser.add_option("-r", "--resume", dest="resume", action='store_true', default=False, help="skip the leagues and games today's interrupted run already completed")
 
     (options, args) = parser.parse_args()
 
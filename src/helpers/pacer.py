@@ -0,0 +1,35 @@
+import random
+import threading
+import time
+
+class Pacer:
+    def __init__(self, min_gap: float = 1., max_gap: float = 3.):
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+        self.deadline = 0.
+        self.gap = 0.
+        self.saved = 0.
+        self.slept = 0.
+        self.lock = threading.Lock()
+
+    def on_response(self, response, *args, **kwargs):
+        # Cached responses never reached the bookmaker, so they don't move the deadline
+        if getattr(response, 'from_cache', False):
+            return response
+
+        with self.lock:
+            self.gap = random.uniform(self.min_gap, self.max_gap)
+            self.deadline = time.monotonic() + self.gap
+        return response
+
+    def wait(self):
+        with self.lock:
+            remaining = self.deadline - time.monotonic()
+            gap = self.gap
+            # Only the part of the gap not already spent on other work is slept
+            self.gap = 0.
+
+        if remaining > 0:
+            time.sleep(remaining)
+            self.slept += remaining
+        self.saved += gap - max(remaining, 0.)
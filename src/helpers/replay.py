@@ -0,0 +1,122 @@
+from collections import defaultdict
+import glob
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from dotenv import load_dotenv
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+load_dotenv(override=True)
+
+# Set to a past date (YYYY-MM-DD) to re-run the scripts against that day's archived responses
+REPLAY_DATE = os.environ.get('REPLAY_DATE', '')
+REPLAY_DIR = os.environ.get('REPLAY_DIR', 'replay')
+
+logger = logging.getLogger(__name__)
+
+class ReplayAdapter(HTTPAdapter):
+    def __init__(self, directory: str, date: str, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.date = date
+        self.lock = threading.Lock()
+        self.misses = []
+        self.load()
+
+    def load(self):
+        self.exact = defaultdict(list)
+        self.loose = defaultdict(list)
+        self.cursors = defaultdict(int)
+
+        # Every bookmaker's archive for the day, plus the fixtures/standings one
+        for segment_path in sorted(glob.glob(f'{self.directory}/*/{self.date}.jsonl.gz')):
+            with gzip.open(segment_path, 'rt') as f:
+                for line in f:
+                    record = json.loads(line)
+                    signature = record.get('request')
+                    if signature is None:
+                        continue
+                    self.exact[(signature['method'], signature['url'], signature['body'])].append(record)
+                    self.loose[(signature['method'], signature['url'])].append(record)
+
+        # Days archived before the jsonl segments were plain {bookmaker}/{date}/{method}.json files without the request,
+        # there is nothing to match a request against so they can't be replayed
+        if len(self.loose) == 0 and glob.glob(f'{self.directory}/*/{self.date}/*.json'):
+            logger.warning(f'Responses for {self.date} only exist in the old per call json layout, which replay does not support')
+
+    def get_record(self, request):
+        body = request.body.decode(errors='replace') if isinstance(request.body, bytes) else request.body
+
+        # Bodies with fresh uuids (bet request ids) never match exactly, so fall back to method and url
+        for index, key in (('exact', (request.method, request.url, body)), ('loose', (request.method, request.url))):
+            records = getattr(self, index).get(key, [])
+            if len(records) == 0:
+                continue
+            with self.lock:
+                # Repeated calls are served in recorded order, the last record sticks once exhausted
+                position = self.cursors[(index, key)]
+                self.cursors[(index, key)] = position + 1
+            return records[min(position, len(records) - 1)]
+
+        return None
+
+    def send(self, request, stream=False, **kwargs):
+        record = self.get_record(request)
+
+        response = Response()
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.encoding = 'utf-8'
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+        # Flagged like a cache hit so the pacer doesn't wait for a bookmaker that was never called
+        response.from_cache = True
+
+        if record is None:
+            with self.lock:
+                self.misses.append(f'{request.method} {request.url}')
+            response.status_code = 404
+            response.reason = 'Not Recorded'
+            response._content = json.dumps({'detail': 'No recorded response'}).encode()
+        else:
+            response.status_code = record['status'] or 200
+            response.reason = 'Replayed'
+            response._content = json.dumps(record['data']).encode()
+
+        return response
+
+def get_replay_db_file(db_file: str):
+    # Only the path, the scratch database is created on the first connection
+    if not REPLAY_DATE:
+        return db_file
+    return f'{REPLAY_DIR}/{REPLAY_DATE}/{os.path.basename(db_file)}'
+
+def create_replay_db(db_file: str):
+    replay_db_file = get_replay_db_file(db_file)
+
+    # Scratch database with the live schema and no rows, shared by every script replaying the same date
+    if replay_db_file == db_file or os.path.exists(replay_db_file):
+        return replay_db_file
+
+    os.makedirs(os.path.dirname(replay_db_file), exist_ok=True)
+
+    with sqlite3.connect(db_file) as con:
+        statements = [row[0] for row in con.execute("SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'")]
+
+    tmp_path = f'{replay_db_file}.{os.getpid()}.tmp'
+    con = sqlite3.connect(tmp_path)
+    try:
+        for statement in statements:
+            con.execute(statement)
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp_path, replay_db_file)
+
+    return replay_db_file
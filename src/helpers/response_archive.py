@@ -0,0 +1,161 @@
+import atexit
+from datetime import datetime, timedelta
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+
+from dotenv import load_dotenv
+from filelock import FileLock
+
+from helpers.replay import REPLAY_DATE
+
+load_dotenv(override=True)
+
+RESPONSES_RETENTION_DAYS = int(os.environ.get('RESPONSES_RETENTION_DAYS', 30))
+RESPONSES_MAX_BYTES = int(os.environ.get('RESPONSES_MAX_BYTES', 0))
+# Response fields holding credentials, blanked in redacted records
+REDACTED_FIELDS = {'token', 'accessToken', 'access_token', 'refreshToken', 'refresh_token', 'sessionId', 'session_id'}
+
+logger = logging.getLogger(__name__)
+
+archives = {}
+archives_lock = threading.Lock()
+
+class ResponseArchive:
+    def __init__(self, directory: str, retention_days: int = RESPONSES_RETENTION_DAYS, max_bytes: int = RESPONSES_MAX_BYTES):
+        self.directory = directory
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.queue = queue.Queue()
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.apply_retention()
+
+        self.thread = threading.Thread(target=self.run, name=f'response-archive-{os.path.basename(directory)}', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def record(self, method: str, key, data, request=None, status: int = None, redact: bool = False):
+        # Replayed runs would only archive copies of what they are reading
+        if REPLAY_DATE:
+            return
+
+        self.queue.put({
+            'ts': datetime.now().isoformat(),
+            'method': method,
+            'key': None if key is None else str(key),
+            'status': status,
+            'request': get_request_signature(request, redact),
+            'data': redact_data(data) if redact else data
+        })
+
+    def record_response(self, method: str, key, data, response, redact: bool = False):
+        # Responses served by the http cache were archived when they were first fetched
+        if getattr(response, 'from_cache', False):
+            return
+
+        self.record(method, key, data, response.request, response.status_code, redact)
+
+    def run(self):
+        while True:
+            record = self.queue.get()
+            try:
+                if record is None:
+                    return
+                self.write(record)
+            except Exception as err:
+                logger.warning(f'ResponseArchive: failed to archive {record.get("method")} response: {err}')
+            finally:
+                self.queue.task_done()
+
+    def write(self, record: dict):
+        date = record['ts'][:10]
+        segment_path, index_path = self.get_paths(date)
+        line = (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode()
+
+        # Each record is its own gzip member, so the index offset can be decompressed on its own
+        with FileLock(f'{segment_path}.lock'):
+            with open(segment_path, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                member = gzip.compress(line)
+                f.write(member)
+
+            with open(index_path, 'a') as f:
+                f.write(json.dumps({'method': record['method'], 'key': record['key'], 'ts': record['ts'], 'offset': offset, 'length': len(member)}) + '\n')
+
+    def get_paths(self, date: str):
+        return f'{self.directory}/{date}.jsonl.gz', f'{self.directory}/{date}.idx'
+
+    def lookup(self, method: str, key=None, date: str = None):
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        segment_path, index_path = self.get_paths(date)
+        key = None if key is None else str(key)
+
+        if not os.path.exists(index_path):
+            return []
+
+        with open(index_path) as f:
+            entries = [json.loads(line) for line in f]
+        entries = [entry for entry in entries if entry['method'] == method and (key is None or entry['key'] == key)]
+
+        records = []
+        with open(segment_path, 'rb') as f:
+            for entry in entries:
+                f.seek(entry['offset'])
+                records.append(json.loads(gzip.decompress(f.read(entry['length']))))
+        return records
+
+    def apply_retention(self):
+        segments = sorted(glob.glob(f'{self.directory}/*.jsonl.gz'))
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+
+        expired = [segment for segment in segments if os.path.basename(segment)[:10] < cutoff] if self.retention_days > 0 else []
+        kept = [segment for segment in segments if segment not in expired]
+
+        if self.max_bytes > 0:
+            size = sum(os.path.getsize(segment) for segment in kept)
+            while len(kept) > 1 and size > self.max_bytes:
+                size -= os.path.getsize(kept[0])
+                expired.append(kept.pop(0))
+
+        for segment in expired:
+            for path in (segment, segment.replace('.jsonl.gz', '.idx'), f'{segment}.lock'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+def get_archive(directory: str):
+    with archives_lock:
+        if directory not in archives:
+            archives[directory] = ResponseArchive(directory)
+        return archives[directory]
+
+def redact_data(data):
+    if isinstance(data, dict):
+        return {key: '[redacted]' if key in REDACTED_FIELDS else redact_data(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [redact_data(value) for value in data]
+    return data
+
+def get_request_signature(request, redact: bool = False):
+    if request is None:
+        return None
+
+    body = request.body
+    if redact:
+        body = None
+    elif isinstance(body, bytes):
+        body = body.decode(errors='replace')
+
+    return {'method': request.method, 'url': request.url, 'body': body}
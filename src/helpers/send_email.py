@@ -10,6 +10,8 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 
+from helpers.replay import REPLAY_DATE
+
 load_dotenv(override=True)
 
 context = ssl.create_default_context()
@@ -22,6 +24,10 @@ PERSONAL_EMAIL = os.environ['PERSONAL_EMAIL']
 EMAIL_SMS = os.environ['EMAIL_SMS']
 
 def send_email(messages, subject, logger: Logger, attachments=None):
+    if REPLAY_DATE:
+        logger.info(f'Replaying {REPLAY_DATE}, email not sent: {subject}')
+        return
+
     try:
         with smtplib.SMTP_SSL(EMAIL_HOST, EMAIL_PORT, context=context) as server:
             if len(messages) > 0:
@@ -3,14 +3,27 @@ import os
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util import Retry
+from dotenv import load_dotenv
+
+from helpers.http_cache import CachingAdapter
+from helpers.replay import REPLAY_DATE, ReplayAdapter
+
+load_dotenv(override=True)
+
+HTTP_CACHE_FILE = os.environ.get('HTTP_CACHE_FILE', 'http_cache.sqlite')
 
 class SessionManager:
-    def __init__(self, session_file='session.pkl'):
+    # Responses are only cached when a cache file is given, the data fetchers pass HTTP_CACHE_FILE and no session file
+    # so they never pick up the betting bot's pickled login, the betting bots cache nothing
+    def __init__(self, session_file='session.pkl', cache_file=None):
         self.session_file = session_file
+        self.cache_file = cache_file
         self.session = self.load_session()
 
     def load_session(self):
-        if os.path.exists(self.session_file):
+        if REPLAY_DATE:
+            return self.create_replay_session()
+        if self.session_file and os.path.exists(self.session_file):
             with open(self.session_file, 'rb') as f:
                 return pickle.load(f)
         return self.create_new_session()
@@ -18,7 +31,18 @@ class SessionManager:
     def create_new_session(self):
         session = requests.Session()
         retry = Retry(total=3, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retry)
+        # Sized for the odds fetcher's thread pool so concurrent requests reuse connections
+        if self.cache_file:
+            adapter = CachingAdapter(self.cache_file, max_retries=retry, pool_maxsize=16)
+        else:
+            adapter = HTTPAdapter(max_retries=retry, pool_maxsize=16)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def create_replay_session(self):
+        session = requests.Session()
+        adapter = ReplayAdapter(os.environ['RESPONSES_DIR'], REPLAY_DATE)
         session.mount('http://', adapter)
         session.mount('https://', adapter)
         return session
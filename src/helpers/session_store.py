@@ -0,0 +1,58 @@
+import json
+import os
+import time
+
+from cryptography.fernet import Fernet, InvalidToken
+from dotenv import load_dotenv
+
+from helpers.replay import REPLAY_DATE
+
+load_dotenv(override=True)
+
+SESSION_STORE_DIR = os.environ.get('SESSION_STORE_DIR', 'sessions')
+SESSION_STORE_KEY = os.environ.get('SESSION_STORE_KEY', '')
+
+class SessionStore:
+    def __init__(self, name: str, key: str, directory: str = SESSION_STORE_DIR):
+        self.name = name
+        self.fernet = Fernet(key)
+        self.directory = directory
+        self.file_path = f'{directory}/{name}.session'
+
+    @classmethod
+    def from_env(cls, name: str):
+        # Persisting tokens is opt-in, without a key every run logs in as before
+        if not SESSION_STORE_KEY or REPLAY_DATE:
+            return None
+        return cls(name, SESSION_STORE_KEY)
+
+    def load(self):
+        if not os.path.exists(self.file_path):
+            return None
+
+        try:
+            with open(self.file_path, 'rb') as f:
+                state = json.loads(self.fernet.decrypt(f.read()))
+        except (InvalidToken, ValueError):
+            self.clear()
+            return None
+
+        if state.get('expires_at', 0) <= time.time():
+            self.clear()
+            return None
+
+        return state
+
+    def save(self, state: dict, ttl: float):
+        os.makedirs(self.directory, exist_ok=True)
+        state = dict(state, expires_at=time.time() + ttl)
+
+        tmp_path = f'{self.file_path}.{os.getpid()}.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.fernet.encrypt(json.dumps(state).encode()))
+        os.replace(tmp_path, self.file_path)
+
+    def clear(self):
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
@@ -0,0 +1,21 @@
+#!/usr/bin/python3
+
+from optparse import OptionParser
+
+def args_parser():
+    parser = OptionParser('bet_bot_sweeper -B <betting_strategy> [-S <staking_strategy>] [-s <seasons>] [-W <windows>] [-c <coeff_scales>] [-k <kelly_fractions>] [-w <workers>]')
+    parser.add_option("-B", dest="betting_strategy", type='string', help="specify betting strategy")
+    parser.add_option("-S", dest="staking_strategy", type='string', default='kelly', help="specify staking strategy")
+    parser.add_option("-s", dest="seasons", type='string', help="specify comma separated seasons, defaults to every season in HIST_DATA_PATH")
+    parser.add_option("-W", dest="windows", type='string', default='4,5,6,7,8', help="specify comma separated rolling windows")
+    parser.add_option("-c", dest="coeff_scales", type='string', default='0.8,0.9,1.0,1.1,1.2', help="specify comma separated scales applied to the regression coefficients")
+    parser.add_option("-k", dest="fracs", type='string', default='0.25,0.5,0.75,1.0', help="specify comma separated kelly fractions")
+    parser.add_option("-w", dest="workers", type='int', help="specify number of worker processes")
+
+    (options, args) = parser.parse_args()
+
+    if (options.betting_strategy == None):
+        print(f'Usage: {parser.usage}')
+        exit(1)
+
+    return options
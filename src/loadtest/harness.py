@@ -0,0 +1,159 @@
+from collections import defaultdict
+from logging import Logger
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+from pandas import DataFrame
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from bot.bankroll_ledger import BankrollLedger
+from bot.pinnacle_bot import PinnacleBettingBot
+from loadtest.mock_server import MockBookmaker, start_mock_server
+from staking.staking_factory import StakingFactory
+from strategies.match_ratings import compute_probas, compute_values, select_bets
+
+# Scope: only the Pinnacle bookmaker flow of main.py (login, matchups, odds, limits, bet placement, logout) is
+# exercised, against the mock. run_league mirrors main.py's per league loop rather than calling it, since main.py
+# also needs the fixtures API, the historical data, the database and email. Ratings are random and nothing is stored,
+# the bot archives to a scratch directory and never touches session.pkl or the session store.
+POSSIBLE_RESULTS = ['home', 'draw', 'away']
+
+REPORT_COLUMNS = ['calls', 'total_s', 'throughput', 'p50_ms', 'p99_ms', 'max_ms']
+
+DEFAULT_COEFFS = (
+    {'beta_coeff': 1.6, 'constant': 45.0},
+    {'beta_squared_coeff': 0.02, 'beta_coeff': -1.1, 'constant': 29.0}
+)
+
+class StageTimer:
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def add(self, stage: str, duration: float):
+        with self.lock:
+            self.durations[stage].append(duration)
+
+    def time(self, stage: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def on_response(self, response, *args, **kwargs):
+        self.add(f'http {response.request.method}', response.elapsed.total_seconds())
+        return response
+
+    def report(self):
+        rows = {}
+        for stage, durations in self.durations.items():
+            durations = np.asarray(durations)
+            total = durations.sum()
+            rows[stage] = [len(durations), total, len(durations) / total if total > 0 else np.nan, np.percentile(durations, 50) * 1000, np.percentile(durations, 99) * 1000, durations.max() * 1000]
+        return DataFrame.from_dict(rows, orient='index', columns=REPORT_COLUMNS)
+
+def create_bot(url: str, pacing: bool, timer: StageTimer, responses_dir: str):
+    betting_bot = PinnacleBettingBot('pinnacle_loadtest', guest_api_url=url, api_url=url, responses_dir=responses_dir, session_file=None, session_store=False)
+
+    # Same retry policy as SessionManager, without the HTTP cache so every call reaches the mock
+    retry = Retry(total=3, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504])
+    betting_bot.session.mount('http://', HTTPAdapter(max_retries=retry, pool_maxsize=16))
+    betting_bot.session.hooks['response'].insert(0, timer.on_response)
+
+    if not pacing:
+        betting_bot.pacer.min_gap = betting_bot.pacer.max_gap = 0.
+
+    return betting_bot
+
+def score(odds: np.ndarray, bankroll: float, staking_strategy: str, rng: np.random.Generator):
+    # Ratings are random, the load test cares about the cost of the flow not the bets it picks
+    match_ratings = rng.integers(-20, 21, size=len(odds)).astype(float)
+    probas = compute_probas(match_ratings, *DEFAULT_COEFFS)
+    _, values = compute_values(probas, odds)
+    stakes = StakingFactory().select_staking_strategy(bankroll, staking_strategy, value=values, odds=odds).compute_batch()
+    return select_bets(stakes, values)
+
+def run_league(betting_bot: PinnacleBettingBot, ledger: BankrollLedger, league: int, today: str, bankroll: float, staking_strategy: str, timer: StageTimer, rng: np.random.Generator, logger: Logger):
+    counts = {'games': 0, 'flagged': 0, 'placed': 0, 'failed': 0}
+
+    games_url = timer.time('get_game_urls', betting_bot.get_game_urls, league, logger, today=today)
+    counts['games'] = len(games_url)
+
+    if len(games_url) == 0:
+        return counts
+
+    odds = timer.time('check_odds_many', betting_bot.check_odds_many, games_url, logger)
+    odds = np.array([odds[game_url['id']] for game_url in games_url], dtype=float)
+    games_url = [game_url for game_url, game_odds in zip(games_url, odds) if game_odds.all()]
+    odds = odds[odds.all(axis=1)]
+
+    bets, _, stakes, flags = timer.time('score', score, odds, bankroll, staking_strategy, rng)
+
+    candidates = [(game_url, POSSIBLE_RESULTS[bet], float(game_odds[bet])) for game_url, game_odds, bet, flag in zip(games_url, odds, bets, flags) if flag]
+    counts['flagged'] = len(candidates)
+    timer.time('prefetch_limits', betting_bot.prefetch_limits, candidates, logger, today=today)
+
+    for (game_url, selection, bet_odds), stake in zip(candidates, stakes[flags]):
+        min_stake, max_stake = timer.time('get_limits', betting_bot.get_limits, game_url, selection, bet_odds, logger, today=today)
+        stake = round(float(min(stake, max_stake)), 2)
+
+        if stake < min_stake or not ledger.can_afford(stake):
+            continue
+
+        betting_bot.simulate_human_behavior()
+
+        if timer.time('place_bet', betting_bot.place_bet, bet_odds, stake, selection, game_url, min_stake, logger):
+            ledger.debit(stake)
+            counts['placed'] += 1
+        else:
+            ledger.reconcile()
+            counts['failed'] += 1
+
+    return counts
+
+def run_load_test(leagues: int, games: int, logger: Logger, latency=(0.02, 0.08), error_rate: float = 0., drift: float = 0., pacing: bool = False, staking_strategy: str = 'kelly', bankroll: float = 1000., seed: int = None):
+    bookmaker = MockBookmaker(leagues, games, latency=latency, error_rate=error_rate, drift=drift, seed=seed)
+    server, url = start_mock_server(bookmaker)
+    logger.info(f'Mock bookmaker listening on {url} with {leagues} league(s) x {games} game(s)')
+
+    timer = StageTimer()
+    rng = np.random.default_rng(seed)
+    totals = defaultdict(int)
+    # The day the mock scheduled its games on, not today's date when a league runs, so a run across midnight still finds them
+    today = bookmaker.today.strftime('%Y-%m-%d')
+    responses_dir = tempfile.mkdtemp(prefix='bet_bot_loadtest_')
+    betting_bot = None
+
+    try:
+        betting_bot = create_bot(url, pacing, timer, responses_dir)
+
+        start = time.perf_counter()
+
+        if not timer.time('login', betting_bot.login, {'username': 'loadtest', 'password': 'loadtest'}, logger):
+            raise ValueError(f'Unable to log in to mock bookmaker at {url}')
+
+        ledger = BankrollLedger(betting_bot, logger)
+
+        for league in bookmaker.leagues:
+            counts = timer.time('league', run_league, betting_bot, ledger, league, today, bankroll, staking_strategy, timer, rng, logger)
+            for key, value in counts.items():
+                totals[key] += value
+
+        timer.time('logout', betting_bot.logout, logger)
+
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+        if betting_bot is not None:
+            betting_bot.archive.close()
+        shutil.rmtree(responses_dir, ignore_errors=True)
+
+    report = timer.report()
+    logger.info(f"Load test done in {elapsed:.2f}s: {dict(totals)}, {totals['games'] / elapsed:.1f} games/s, paced {betting_bot.pacer.slept:.2f}s")
+    return report, dict(totals, elapsed=elapsed)
@@ -0,0 +1,163 @@
+from datetime import datetime, time as dt_time, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from zoneinfo import ZoneInfo
+
+def to_american(odds: float):
+    return round((odds - 1) * 100) if odds >= 2 else round(-100 / (odds - 1))
+
+# Serves the Pinnacle guest and member API routes only, William Hill and BateryWin are not mocked
+class MockBookmaker:
+    def __init__(self, leagues: int, games: int, latency=(0.02, 0.08), error_rate: float = 0., drift: float = 0., balance: float = 10_000., seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.drift = drift
+        self.balance = balance
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = set()
+        self.bets = []
+        self.leagues = {}
+        self.matchups = {}
+
+        # The bot keeps the games of the current America/New_York day, so they all kick off late that day whatever
+        # the time of the run, and the harness asks for this same day
+        self.today = datetime.now(ZoneInfo('America/New_York')).date()
+        start_time = datetime.combine(self.today, dt_time(23, 30), tzinfo=ZoneInfo('America/New_York')).astimezone(timezone.utc).isoformat()
+        matchup_id = 1_000_000
+
+        for league in range(1, leagues + 1):
+            self.leagues[league] = []
+            for game in range(games):
+                matchup_id += 1
+                margin = 1.03 + self.random.random() * 0.04
+                probas = [self.random.uniform(0.25, 0.55), self.random.uniform(0.2, 0.3)]
+                probas.append(1 - sum(probas))
+                self.matchups[matchup_id] = {
+                    'id': matchup_id,
+                    'league': league,
+                    'home': f'League{league} Home{game}',
+                    'away': f'League{league} Away{game}',
+                    'startTime': start_time,
+                    'odds': [1 / (proba * margin) for proba in probas],
+                    'max_stake': float(self.random.choice([250, 500, 1000, 2500]))
+                }
+                self.leagues[league].append(matchup_id)
+
+    def get_market(self, matchup_id: int):
+        matchup = self.matchups[matchup_id]
+
+        with self.lock:
+            if self.drift > 0:
+                matchup['odds'] = [max(1.01, odds * math.exp(self.random.gauss(0, self.drift))) for odds in matchup['odds']]
+            odds = list(matchup['odds'])
+
+        return {
+            'matchupId': matchup_id,
+            'key': 's;0;m',
+            'isAlternate': False,
+            'status': 'open',
+            'type': 'moneyline',
+            'period': 0,
+            'limits': [{'type': 'maxRiskStake', 'amount': matchup['max_stake']}],
+            'prices': [{'designation': designation, 'price': to_american(price)} for designation, price in zip(('home', 'draw', 'away'), odds)]
+        }
+
+    def handle(self, method: str, path: str, headers, body: dict):
+        path = path.split('?')[0]
+
+        if method == 'POST' and path == '/sessions':
+            token = uuid.uuid4().hex
+            self.tokens.add(token)
+            return 200, {'token': token, 'username': body.get('username', '')}
+
+        if method == 'GET' and (match := re.fullmatch(r'/leagues/(\d+)/matchups', path)):
+            matchups = [self.matchups[matchup_id] for matchup_id in self.leagues.get(int(match.group(1)), [])]
+            return 200, [{'id': matchup['id'], 'parent': None, 'parlayRestriction': 'unique_matchups', 'startTime': matchup['startTime'],
+                          'participants': [{'name': matchup['home'], 'alignment': 'home'}, {'name': matchup['away'], 'alignment': 'away'}]} for matchup in matchups]
+
+        if method == 'GET' and (match := re.fullmatch(r'/leagues/(\d+)/markets/straight', path)):
+            return 200, [self.get_market(matchup_id) for matchup_id in self.leagues.get(int(match.group(1)), [])]
+
+        if method == 'GET' and (match := re.fullmatch(r'/matchups/(\d+)/markets/related/straight', path)):
+            matchup_id = int(match.group(1))
+            return (200, [self.get_market(matchup_id)]) if matchup_id in self.matchups else (404, {'detail': 'Not found'})
+
+        # Everything below needs a logged in session
+        if headers.get('X-Session') not in self.tokens:
+            return 401, {'detail': 'Unauthorized'}
+
+        if method == 'DELETE' and (match := re.fullmatch(r'/sessions/(\w+)', path)):
+            self.tokens.discard(match.group(1))
+            return 200, {}
+
+        if method == 'GET' and path == '/wallet/balance':
+            return 200, {'amount': round(self.balance, 2), 'currency': 'USD'}
+
+        if method == 'POST' and path == '/bets/straight/quote':
+            selection = body['selections'][0]
+            matchup = self.matchups.get(selection['matchupId'], None)
+            if matchup is None:
+                return 404, {'detail': 'Not found'}
+            return 200, {'limits': [{'type': 'minRiskStake', 'amount': 1.}, {'type': 'maxRiskStake', 'amount': matchup['max_stake']}]}
+
+        if method == 'POST' and path == '/bets/straight':
+            with self.lock:
+                if body['stake'] > self.balance:
+                    return 400, {'detail': 'Insufficient funds'}
+                self.balance -= body['stake']
+                self.bets.append(body)
+            return 200, {'requestId': body.get('requestId'), 'status': 'ACCEPTED'}
+
+        return 404, {'detail': 'Not found'}
+
+def make_handler(bookmaker: MockBookmaker):
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def dispatch(self, method: str):
+            length = int(self.headers.get('Content-Length', 0) or 0)
+            raw = self.rfile.read(length) if length > 0 else b''
+
+            time.sleep(bookmaker.random.uniform(*bookmaker.latency))
+
+            if bookmaker.random.random() < bookmaker.error_rate:
+                status, data = bookmaker.random.choice([500, 502, 503]), {'detail': 'Injected error'}
+            else:
+                try:
+                    status, data = bookmaker.handle(method, self.path, self.headers, json.loads(raw) if raw else {})
+                except Exception as err:
+                    status, data = 500, {'detail': str(err)}
+
+            payload = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self.dispatch('GET')
+
+        def do_POST(self):
+            self.dispatch('POST')
+
+        def do_DELETE(self):
+            self.dispatch('DELETE')
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockHandler
+
+def start_mock_server(bookmaker: MockBookmaker, host: str = '127.0.0.1', port: int = 0):
+    server = ThreadingHTTPServer((host, port), make_handler(bookmaker))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-bookmaker', daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
@@ -1,8 +1,10 @@
 from staking.staking import Staking
 
-from decimal import getcontext, Decimal
+from decimal import ROUND_DOWN, Context, Decimal, localcontext
 
-getcontext().prec = 3
+import numpy as np
+
+DECIMAL_CONTEXT = Context(prec=3, rounding=ROUND_DOWN)
 
 class KellyStaking(Staking):
     FRAC_KELLY = 0.5
@@ -11,8 +13,18 @@ class KellyStaking(Staking):
         super().__init__(bk)
         self.value = kwargs.get('value', 0)
         self.odds = kwargs.get('odds', 0)
+        self.frac = kwargs.get('frac', self.FRAC_KELLY)
     
     def compute(self):
-        if self.odds == 0:
+        # Nothing to size without a price above evens
+        if self.odds <= 1:
             return 0.0
-        return float(Decimal(self.bk) * Decimal(self.FRAC_KELLY) * (Decimal(self.value) / (Decimal(self.odds) - 1)))
+        with localcontext(DECIMAL_CONTEXT):
+            return float(Decimal(self.bk) * Decimal(self.frac) * (Decimal(self.value) / (Decimal(self.odds) - 1)))
+
+    def compute_batch(self):
+        odds = np.asarray(self.odds, dtype=float)
+        value = np.asarray(self.value, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stakes = self.bk * self.frac * (value / (odds - 1))
+        return np.where(odds > 1, stakes, 0.)
@@ -1,10 +1,16 @@
 from staking.staking import Staking
 
+import numpy as np
+
 class LevelStaking(Staking):
     AMOUNT = 10
 
     def __init__(self, bk, **kwargs) -> None:
         super().__init__(bk)
+        self.odds = kwargs.get('odds', 0)
     
     def compute(self):
-        return self.AMOUNT
\ No newline at end of file
+        return self.AMOUNT
+
+    def compute_batch(self):
+        return np.full(np.shape(self.odds), float(self.AMOUNT))
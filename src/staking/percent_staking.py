@@ -1,13 +1,21 @@
 from staking.staking import Staking
 
-from decimal import getcontext, Decimal
+from decimal import ROUND_DOWN, Context, Decimal, localcontext
+
+import numpy as np
+
+DECIMAL_CONTEXT = Context(prec=3, rounding=ROUND_DOWN)
 
 class PercentStaking(Staking):
     PERCENT = 0.1
 
     def __init__(self, bk, **kwargs) -> None:
         super().__init__(bk)
+        self.odds = kwargs.get('odds', 0)
     
     def compute(self):
-        getcontext().prec = 3
-        return float(Decimal(self.PERCENT) * Decimal(self.bk))
\ No newline at end of file
+        with localcontext(DECIMAL_CONTEXT):
+            return float(Decimal(self.PERCENT) * Decimal(self.bk))
+
+    def compute_batch(self):
+        return np.full(np.shape(self.odds), self.PERCENT * self.bk)
@@ -6,4 +6,8 @@ class Staking(object):
     
     @abstractmethod
     def compute(self):
+        raise NotImplementedError('Method is required!')
+
+    @abstractmethod
+    def compute_batch(self):
         raise NotImplementedError('Method is required!')
\ No newline at end of file
@@ -6,20 +6,33 @@ from dotenv import load_dotenv
 from typing import Dict, List
 
 from filelock import FileLock
+from db.results import count_results, get_last_results
 from staking.staking_factory import StakingFactory
+from strategies.rating_index import RatingIndex
 from strategies.strategy import Strategy
+from utils.utils import gen_file_sha512_hash
 
-from decimal import getcontext, Decimal
+from decimal import ROUND_DOWN, Context, Decimal, localcontext
 
+import numpy as np
+import pandas as pd
 from pandas import DataFrame
-import math
 
 load_dotenv(override=True)
 
 MISC_PATH = os.environ['MISC_PATH']
 
+DECIMAL_CONTEXT = Context(prec=3, rounding=ROUND_DOWN)
+
+rating_indexes: Dict[tuple, RatingIndex] = {}
+
+# Decimal places kept in the match_ratings table, shared by the live engine and the backtester
+ROUNDED_COLUMNS = {'hwto': 2, 'tdo': 2, 'awto': 2, 'hwtp': 3, 'dtp': 3, 'awtp': 3, 'hv': 3, 'dv': 3, 'av': 3, 'h': 2, 'd': 2, 'a': 2, 'value': 3, 'stake': 1}
+
 class MatchRatingsStrategy(Strategy):
     possible_results = ['home', 'draw', 'away']
+    engines = ['numpy', 'decimal']
+    columns = ['home_rating', 'away_rating', 'match_rating', 'hwto', 'tdo', 'awto', 'hwtp', 'dtp', 'awtp', 'hv', 'dv', 'av', 'h', 'd', 'a', 'bet', 'bet_odds', 'value', 'stake', 'flag']
     config_path = os.environ['MATCH_RATING_CONFIG_FILE']
     
     def __init__(self, data, league, strat_config, staking_strategy, **kwargs) -> None:
@@ -28,83 +41,75 @@ class MatchRatingsStrategy(Strategy):
         self.draw_odds = kwargs.get('draw_odds', 0)
         self.away_odds = kwargs.get('away_odds', 0)
         self.season = kwargs.get('season', '2024-2025')
+        self.rating_index: RatingIndex = kwargs.get('rating_index', None)
+        self.engine = kwargs.get('engine', 'numpy')
+
+        if self.engine not in self.engines:
+            raise ValueError(f'Wrong engine {self.engine} chosen')
 
     def compute(self, home: str, away: str, betting_strategy: str, logger: Logger):
-        try:
-            getcontext().prec = 3
+        if self.engine == 'decimal':
+            return self.compute_decimal(home, away, betting_strategy, logger)
 
-            r = {}
+        fixtures = DataFrame([{'home': home, 'away': away, 'home_odds': self.home_odds, 'draw_odds': self.draw_odds, 'away_odds': self.away_odds}])
+        values = self.compute_numpy(fixtures, betting_strategy, logger).to_dict('records')
+        return values[0] if values else {}
 
-            df: DataFrame = self.data.copy()
-            df = df[['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']]
-            df.set_index('Date', inplace=True)
-            lst = get_teams_list(df)
-            teams = group_data_by_teams(df, lst, self.league, self.season, f'{MISC_PATH}/{betting_strategy}')
-            self.home_rating, self.away_rating, self.match_rating = compute_ratings(teams, home, away)
-            home_win_coeffs, away_win_coeffs = get_coeffs(self.strat_config, self.league)
-            self.hwtp = (Decimal(home_win_coeffs['beta_coeff']) * Decimal(self.match_rating) + Decimal(home_win_coeffs['constant'])) / Decimal(100.)
-            self.awtp = (Decimal(away_win_coeffs['beta_squared_coeff']) * Decimal(self.match_rating**2) + Decimal(away_win_coeffs['beta_coeff']) * Decimal(self.match_rating) + Decimal(away_win_coeffs['constant'])) / Decimal(100.)
-            self.dtp = Decimal(1.) - (self.hwtp + self.awtp)
-            
-            if self.hwtp > 0:
-                self.hwto = float(Decimal(1.) / Decimal(self.hwtp))
-            else:
-                self.hwto = self.home_odds
-
-            if self.awtp > 0:
-                self.awto = float(Decimal(1.) / Decimal(self.awtp))
-            else:
-                self.awto = self.away_odds
-
-            if self.dtp > 0:
-                self.tdo = float(Decimal(1.) / Decimal(self.dtp))
-            else:
-                self.tdo = self.draw_odds
-
-            self.hv = float(Decimal(self.hwtp) * Decimal(self.home_odds) - 1)
-            self.dv = float(Decimal(self.dtp) * Decimal(self.draw_odds) - 1)
-            self.av = float(Decimal(self.awtp) * Decimal(self.away_odds) - 1)
-
-            staking_factory = StakingFactory()
-            self.h = staking_factory.select_staking_strategy(self.strat_config[self.league]['bankroll'], self.staking_strategy, odds=self.home_odds, value=self.hv).compute()
-            self.d = staking_factory.select_staking_strategy(self.strat_config[self.league]['bankroll'], self.staking_strategy, odds=self.draw_odds, value=self.dv).compute()
-            self.a = staking_factory.select_staking_strategy(self.strat_config[self.league]['bankroll'], self.staking_strategy, odds=self.away_odds, value=self.av).compute()
-            self.bet = get_value(self.possible_results, self.h, self.d, self.a)
-            self.bet_odds = self.home_odds if self.bet == 'home' else (self.away_odds if self.bet == 'away' else self.draw_odds)
-            self.value = max(self.hv, self.dv, self.av)
-            self.stake = max(self.h, self.d, self.a, 0)
-            self.flag = True if (self.bet == 'home' and (self.value > 0) and self.stake > 1) else False
+    def compute_batch(self, fixtures: DataFrame, betting_strategy: str, logger: Logger):
+        if self.engine == 'numpy':
+            return self.compute_numpy(fixtures, betting_strategy, logger)
+
+        rows = {}
+        for idx, fixture in zip(fixtures.index, fixtures.to_dict('records')):
+            self.home_odds, self.draw_odds, self.away_odds = fixture['home_odds'], fixture['draw_odds'], fixture['away_odds']
+            values = self.compute_decimal(fixture['home'], fixture['away'], betting_strategy, logger)
+            if values:
+                rows[idx] = values
+        return DataFrame.from_dict(rows, orient='index', columns=self.columns)
 
-            logger.info(
-                f"""{betting_strategy}:
-                {home} - {away}
-                {'-' * (len(home)+len(away)+2)}
+    def compute_decimal(self, home: str, away: str, betting_strategy: str, logger: Logger):
+        r = {}
 
-                {home} rating: {self.home_rating}
-                {away} rating: {self.away_rating}
-                Match rating: {self.match_rating}
+        try:
+            if self.rating_index is None:
+                self.rating_index = get_rating_index(self.data, self.league, self.season)
+            self.home_rating, self.away_rating, self.match_rating = compute_ratings(self.rating_index, home, away)
+            home_win_coeffs, away_win_coeffs = get_coeffs(self.strat_config, self.league)
 
-                True Home Win Proba: {self.hwtp*100:.2f}%
-                True Draw Proba: {self.dtp*100:.2f}%
-                True Away Proba: {self.awtp*100:.2f}%
+            with localcontext(DECIMAL_CONTEXT):
+                self.hwtp = (Decimal(home_win_coeffs['beta_coeff']) * Decimal(self.match_rating) + Decimal(home_win_coeffs['constant'])) / Decimal(100.)
+                self.awtp = (Decimal(away_win_coeffs['beta_squared_coeff']) * Decimal(self.match_rating**2) + Decimal(away_win_coeffs['beta_coeff']) * Decimal(self.match_rating) + Decimal(away_win_coeffs['constant'])) / Decimal(100.)
+                self.dtp = Decimal(1.) - (self.hwtp + self.awtp)
 
-                True Home Win Odds: {self.hwto}
-                True Draw Win Odds: {self.tdo}
-                True Away Win Odds: {self.awto}
+                if self.hwtp > 0:
+                    self.hwto = float(Decimal(1.) / Decimal(self.hwtp))
+                else:
+                    self.hwto = self.home_odds
 
-                Home Win Value: {self.hv}
-                Draw Value: {self.dv}
-                Away Win Value: {self.av}
+                if self.awtp > 0:
+                    self.awto = float(Decimal(1.) / Decimal(self.awtp))
+                else:
+                    self.awto = self.away_odds
 
-                Home Win Stake: {self.h}
-                Draw Stake: {self.d}
-                Away Win Stake: {self.a}
+                if self.dtp > 0:
+                    self.tdo = float(Decimal(1.) / Decimal(self.dtp))
+                else:
+                    self.tdo = self.draw_odds
 
-                Flag: {self.flag}
+                self.hv = float(Decimal(self.hwtp) * Decimal(self.home_odds) - 1)
+                self.dv = float(Decimal(self.dtp) * Decimal(self.draw_odds) - 1)
+                self.av = float(Decimal(self.awtp) * Decimal(self.away_odds) - 1)
 
-                Pre-bet BK: ${self.strat_config[self.league]['bankroll']:.2f}
-                
-                Bet: {self.bet}""")
+                staking_factory = StakingFactory()
+                self.h = staking_factory.select_staking_strategy(self.strat_config[self.league]['bankroll'], self.staking_strategy, odds=self.home_odds, value=self.hv).compute()
+                self.d = staking_factory.select_staking_strategy(self.strat_config[self.league]['bankroll'], self.staking_strategy, odds=self.draw_odds, value=self.dv).compute()
+                self.a = staking_factory.select_staking_strategy(self.strat_config[self.league]['bankroll'], self.staking_strategy, odds=self.away_odds, value=self.av).compute()
+
+            self.bet = get_value(self.possible_results, self.h, self.d, self.a)
+            self.bet_odds = self.home_odds if self.bet == 'home' else (self.away_odds if self.bet == 'away' else self.draw_odds)
+            self.value = max(self.hv, self.dv, self.av)
+            self.stake = max(self.h, self.d, self.a, 0)
+            self.flag = True if (self.bet == 'home' and (self.value > 0) and self.stake > 1) else False
 
             r = {
                 'home_rating': self.home_rating,
@@ -128,6 +133,71 @@ class MatchRatingsStrategy(Strategy):
                 'stake': round(self.stake, 1),
                 'flag': self.flag
             }
+
+            log_values(logger, betting_strategy, home, away, r, self.strat_config[self.league]['bankroll'])
+        except Exception as e:
+            e_type, e_object, e_traceback = sys.exc_info()
+            e_filename = os.path.split(
+                e_traceback.tb_frame.f_code.co_filename
+            )[1]
+            e_line_number = e_traceback.tb_lineno
+            logger.error(f'{e}, type: {e_type}, filename: {e_filename}, line: {e_line_number}')
+        finally:
+            return r
+
+    def compute_numpy(self, fixtures: DataFrame, betting_strategy: str, logger: Logger):
+        r = DataFrame(columns=self.columns)
+
+        try:
+            if self.rating_index is None:
+                self.rating_index = get_rating_index(self.data, self.league, self.season)
+
+            home_ratings = np.array([self.rating_index.get(team) for team in fixtures['home']], dtype=float)
+            away_ratings = np.array([self.rating_index.get(team) for team in fixtures['away']], dtype=float)
+            missing = np.isnan(home_ratings) | np.isnan(away_ratings)
+
+            for home, away, home_rating, away_rating in zip(fixtures['home'][missing], fixtures['away'][missing], home_ratings[missing], away_ratings[missing]):
+                logger.error(f'Not enough data to execute match_ratings strategy for {home} - {away}. Home rating: {home_rating}, Away rating: {away_rating}')
+
+            fixtures = fixtures[~missing]
+            home_ratings, away_ratings = home_ratings[~missing], away_ratings[~missing]
+            match_ratings = home_ratings - away_ratings
+
+            home_win_coeffs, away_win_coeffs = get_coeffs(self.strat_config, self.league)
+            odds = fixtures[['home_odds', 'draw_odds', 'away_odds']].to_numpy(dtype=float)
+            probas = compute_probas(match_ratings, home_win_coeffs, away_win_coeffs)
+            true_odds, values = compute_values(probas, odds)
+
+            bankroll = self.strat_config[self.league]['bankroll']
+            stakes = StakingFactory().select_staking_strategy(bankroll, self.staking_strategy, odds=odds, value=values).compute_batch()
+            bets, value, stake, flag = select_bets(stakes, values)
+
+            # Flag on full precision values, round only what goes into the match_ratings table
+            r = round_columns(DataFrame({
+                'home_rating': home_ratings,
+                'away_rating': away_ratings,
+                'match_rating': match_ratings,
+                'hwto': true_odds[:, 0],
+                'tdo': true_odds[:, 1],
+                'awto': true_odds[:, 2],
+                'hwtp': probas[:, 0],
+                'dtp': probas[:, 1],
+                'awtp': probas[:, 2],
+                'hv': values[:, 0],
+                'dv': values[:, 1],
+                'av': values[:, 2],
+                'h': stakes[:, 0],
+                'd': stakes[:, 1],
+                'a': stakes[:, 2],
+                'bet': np.array(self.possible_results)[bets],
+                'bet_odds': odds[np.arange(len(odds)), bets],
+                'value': value,
+                'stake': stake,
+                'flag': flag
+            }, index=fixtures.index))
+
+            for (home, away), values_ in zip(fixtures[['home', 'away']].itertuples(index=False), r.to_dict('records')):
+                log_values(logger, betting_strategy, home, away, values_, bankroll)
         except Exception as e:
             e_type, e_object, e_traceback = sys.exc_info()
             e_filename = os.path.split(
@@ -138,6 +208,78 @@ class MatchRatingsStrategy(Strategy):
         finally:
             return r
     
+def log_values(logger: Logger, betting_strategy: str, home: str, away: str, values: dict, bankroll: float):
+    logger.info(
+        f"""{betting_strategy}:
+        {home} - {away}
+        {'-' * (len(home)+len(away)+2)}
+
+        {home} rating: {values['home_rating']}
+        {away} rating: {values['away_rating']}
+        Match rating: {values['match_rating']}
+
+        True Home Win Proba: {values['hwtp']*100:.2f}%
+        True Draw Proba: {values['dtp']*100:.2f}%
+        True Away Proba: {values['awtp']*100:.2f}%
+
+        True Home Win Odds: {values['hwto']}
+        True Draw Win Odds: {values['tdo']}
+        True Away Win Odds: {values['awto']}
+
+        Home Win Value: {values['hv']}
+        Draw Value: {values['dv']}
+        Away Win Value: {values['av']}
+
+        Home Win Stake: {values['h']}
+        Draw Stake: {values['d']}
+        Away Win Stake: {values['a']}
+
+        Flag: {values['flag']}
+
+        Pre-bet BK: ${bankroll:.2f}
+        
+        Bet: {values['bet']}""")
+
+def get_rating_index(data: DataFrame, league: str, season: str):
+    key = (season, league)
+    rating_index = rating_indexes.get(key, None)
+
+    if rating_index is None or rating_index.n_games != len(data):
+        df = data[['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']].set_index('Date')
+        lst = get_teams_list(df)
+        teams = group_data_by_teams(df, lst, league, season)
+        rating_index = RatingIndex.from_teams(teams, league, season, n_games=len(data))
+        rating_indexes[key] = rating_index
+
+    return rating_index
+
+def get_results_rating_index(league: str, season: str, window: int = 6):
+    # Only the last `window` games of each team are read from the results table
+    history = {team: np.asarray(goal_diffs, dtype=float) for team, goal_diffs in get_last_results(league, season, window).items()}
+    return RatingIndex(league, season, history, window, n_games=count_results(league, season))
+
+def compute_probas(match_ratings: np.ndarray, home_win_coeffs: dict, away_win_coeffs: dict):
+    hwtp = (home_win_coeffs['beta_coeff'] * match_ratings + home_win_coeffs['constant']) / 100.
+    awtp = (away_win_coeffs['beta_squared_coeff'] * match_ratings**2 + away_win_coeffs['beta_coeff'] * match_ratings + away_win_coeffs['constant']) / 100.
+    dtp = 1. - (hwtp + awtp)
+    return np.column_stack([hwtp, dtp, awtp])
+
+def compute_values(probas: np.ndarray, odds: np.ndarray):
+    with np.errstate(divide='ignore'):
+        true_odds = np.where(probas > 0, 1. / probas, odds)
+    values = probas * odds - 1
+    return true_odds, values
+
+def round_columns(df: DataFrame):
+    return df.round(ROUNDED_COLUMNS)
+
+def select_bets(stakes: np.ndarray, values: np.ndarray):
+    bets = stakes.argmax(axis=1)
+    value = values.max(axis=1)
+    stake = np.maximum(stakes.max(axis=1), 0)
+    flag = (bets == 0) & (value > 0) & (stake > 1)
+    return bets, value, stake, flag
+
 def get_coeffs(strat_config: dict, league: str):
     home_win_coeffs = strat_config[league]['home']
     away_win_coeffs = strat_config[league]['away']
@@ -147,43 +289,69 @@ def get_teams_list(df: DataFrame):
     lst = list(df.HomeTeam.unique())
     return lst
 
-def group_data_by_teams(df: DataFrame, lst: List[str], league: str, curr_season: str, path: str):
-    teams = {}
-    for el in lst:
-        teams[el] = df[(df.HomeTeam == el) | (df.AwayTeam == el)].copy()
-        teams[el]['Season'] = curr_season
-        teams[el]['Team'] = el
-        teams[el]['League'] = league
-        games = [i for i in range(1, int(teams[el].count().iloc[0]) + 1)]
-        teams[el]['Round'] = games.copy()
-        teams[el].sort_values(by='Round', inplace=True)
-        teams[el].loc[teams[el].HomeTeam == el, 'Rating'] = teams[el]['FTHG'] - teams[el]['FTAG']
-        teams[el].loc[teams[el].AwayTeam == el, 'Rating'] = teams[el]['FTAG'] - teams[el]['FTHG']
-        teams[el]['Rolling Average'] = teams[el]['Rating'].shift().rolling(6).sum()
-
-        transformed_hist_data = f'{path}/transformed_hist_data/{curr_season}/{league}'
-        # if not os.path.exists(transformed_hist_data):
-        os.makedirs(transformed_hist_data, exist_ok=True)
-
-        file_path = f'{transformed_hist_data}/{el}.csv'
-        lock_path = f'{path}/locks/{league}/{el}.csv.lock'  # Create a lock file path
-
-        # Use a lock to ensure only one instance writes to the file at a time
-        with FileLock(lock_path):
-            teams[el].to_csv(file_path)
-    return teams
-    
-def compute_ratings(teams: Dict[str, DataFrame], home, away):
-    # home_rating = Decimal(teams[home]['Rolling Average'].iloc[-1])
-    # away_rating = Decimal(teams[away]['Rolling Average'].iloc[-1])
-    home_rating = Decimal(teams[home]['Rating'].rolling(6).sum().iloc[-1])
-    away_rating = Decimal(teams[away]['Rating'].rolling(6).sum().iloc[-1])
-
-    if math.isnan(home_rating) or math.isnan(away_rating):
-        raise ValueError(f'Not enough data to execute match_ratings strategy for {home} - {away}. Home rating: {home_rating}, Away rating: {away_rating}')
-    
-    match_rating = home_rating - away_rating
-    return float(home_rating), float(away_rating), float(match_rating)
+def compute_team_ratings(df: DataFrame, league: str, curr_season: str, window: int = 6):
+    home = df.assign(Team=df['HomeTeam'], Rating=(df['FTHG'] - df['FTAG']).astype(float))
+    away = df.assign(Team=df['AwayTeam'], Rating=(df['FTAG'] - df['FTHG']).astype(float))
+    home['_pos'] = away['_pos'] = np.arange(len(df))
+
+    ratings = pd.concat([home, away]).sort_values(by=['Team', '_pos'], kind='stable')
+
+    ratings['Season'] = curr_season
+    ratings['League'] = league
+    ratings['Round'] = ratings.groupby('Team', sort=False, observed=True).cumcount() + 1
+
+    # Rolling sum of the previous `window` games as a difference of cumulative sums,
+    # NaN whenever a missing result falls inside the window like rolling().sum()
+    rating = ratings['Rating'].fillna(0.)
+    missing = ratings['Rating'].isna().astype(int)
+    previous = rating.groupby(ratings['Team'], sort=False, observed=True).cumsum() - rating
+    previous_missing = missing.groupby(ratings['Team'], sort=False, observed=True).cumsum() - missing
+    rolling = previous - previous.groupby(ratings['Team'], sort=False, observed=True).shift(window)
+    rolling_missing = previous_missing - previous_missing.groupby(ratings['Team'], sort=False, observed=True).shift(window)
+    ratings['Rolling Average'] = rolling.where(rolling_missing == 0)
+
+    columns = list(df.columns) + ['Season', 'Team', 'League', 'Round', 'Rating', 'Rolling Average']
+    return ratings[columns]
+
+def group_data_by_teams(df: DataFrame, lst: List[str], league: str, curr_season: str):
+    ratings = compute_team_ratings(df, league, curr_season)
+    grouped = dict(tuple(ratings.groupby('Team', sort=False, observed=True)))
+    return {el: grouped[el] for el in lst if el in grouped}
+
+def export_team_ratings(data: DataFrame, league: str, season: str, path: str, source_path: str):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('pyarrow is required to export transformed historical data')
+
+    transformed_hist_data = f'{path}/transformed_hist_data/{season}'
+    os.makedirs(transformed_hist_data, exist_ok=True)
+
+    file_path = f'{transformed_hist_data}/{league}.parquet'
+    lock_path = f'{path}/locks/{season}/{league}.parquet.lock'
+    source_hash = gen_file_sha512_hash(source_path)
+
+    with FileLock(lock_path):
+        # Another run may have exported the same source while we waited for the lock
+        if os.path.exists(file_path):
+            metadata = pq.read_schema(file_path).metadata or {}
+            if metadata.get(b'source_hash', b'').decode() == source_hash:
+                return False
+
+        df = data[['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']].set_index('Date')
+        ratings = compute_team_ratings(df, league, season).reset_index()
+        table = pa.Table.from_pandas(ratings, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'source_hash': source_hash.encode()})
+
+        tmp_path = f'{file_path}.{os.getpid()}.tmp'
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, file_path)
+
+    return True
+
+def compute_ratings(rating_index: RatingIndex, home, away):
+    return rating_index.match_ratings(home, away)
 
 def get_value(values, *args):
     val = max(args)
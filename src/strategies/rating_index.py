@@ -0,0 +1,40 @@
+from typing import Dict
+
+import numpy as np
+from pandas import DataFrame
+
+class RatingIndex(object):
+    def __init__(self, league: str, season: str, history: Dict[str, np.ndarray], window: int = 6, n_games: int = 0) -> None:
+        self.league = league
+        self.season = season
+        self.window = window
+        self.n_games = n_games
+        self.history = history
+        self.ratings = {team: rolling_sum(goal_diffs, window) for team, goal_diffs in history.items()}
+
+    @classmethod
+    def from_teams(cls, teams: Dict[str, DataFrame], league: str, season: str, window: int = 6, n_games: int = 0):
+        history = {team: df['Rating'].to_numpy(dtype=float) for team, df in teams.items()}
+        return cls(league, season, history, window, n_games)
+
+    def __contains__(self, team: str):
+        return team in self.ratings
+
+    def __len__(self):
+        return len(self.ratings)
+
+    def get(self, team: str, default: float = float('nan')):
+        return self.ratings.get(team, default)
+
+    def match_ratings(self, home: str, away: str):
+        home_rating, away_rating = self.ratings[home], self.ratings[away]
+
+        if np.isnan(home_rating) or np.isnan(away_rating):
+            raise ValueError(f'Not enough data to execute match_ratings strategy for {home} - {away}. Home rating: {home_rating}, Away rating: {away_rating}')
+
+        return home_rating, away_rating, home_rating - away_rating
+
+def rolling_sum(goal_diffs: np.ndarray, window: int):
+    if len(goal_diffs) < window:
+        return float('nan')
+    return float(goal_diffs[-window:].sum())
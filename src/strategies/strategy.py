@@ -10,4 +10,8 @@ class Strategy(object):
     @abstractmethod
     def compute(self, home: str, away: str, betting_strategy, logger):
         raise NotImplementedError('Method is required!')
+
+    @abstractmethod
+    def compute_batch(self, fixtures, betting_strategy, logger):
+        raise NotImplementedError('Method is required!')
     
\ No newline at end of file
@@ -0,0 +1,120 @@
+from collections import defaultdict
+import difflib
+import os
+import unicodedata
+
+from filelock import FileLock
+
+from utils.utils import MAPPINGS_FILE, PENDING_MAPPINGS_FILE, read_config, write_config
+
+def normalize(name: str):
+    name = unicodedata.normalize('NFKD', str(name))
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return ' '.join(name.casefold().replace('-', ' ').replace('.', ' ').split())
+
+class NameResolver:
+    # Minimum difflib ratio for an unmapped name to be matched to a known team
+    cutoff = 0.8
+    margin = 0.1
+
+    def __init__(self, mappings_file: str = MAPPINGS_FILE, pending_file: str = PENDING_MAPPINGS_FILE):
+        self.mappings_file = mappings_file
+        self.pending_file = pending_file
+        self.mappings = read_config(mappings_file)
+        self.lookups = {}
+        self.matches = {}
+        self.learned = defaultdict(dict)
+
+    def get_lookup(self, section: str, league: str):
+        key = (section, league)
+
+        if key not in self.lookups:
+            values = self.mappings.get(section, {}).get(league, {})
+            if not values:
+                raise ValueError(f'League {league} is missing from {section} in mappings file.')
+            lookup = {normalize(source): target for source, target in values.items()}
+            lookup.update(values)
+            self.lookups[key] = lookup
+
+        return self.lookups[key]
+
+    def resolve(self, section: str, league: str, name: str, candidates=None):
+        lookup = self.get_lookup(section, league)
+
+        if name in lookup:
+            return lookup[name]
+        if normalize(name) in lookup:
+            return lookup[normalize(name)]
+        if candidates is None:
+            return name
+
+        candidates = {normalize(candidate): candidate for candidate in candidates}
+        if normalize(name) in candidates:
+            return candidates[normalize(name)]
+
+        key = (section, league, name)
+        if key not in self.matches:
+            self.matches[key] = self.match(normalize(name), candidates, set(lookup.values()))
+
+            if self.matches[key] is not None:
+                self.learned[(section, league)][name] = self.matches[key]
+                lookup[name] = self.matches[key]
+
+        return name if self.matches[key] is None else self.matches[key]
+
+    def match(self, name: str, candidates: dict, claimed: set):
+        # Teams another name already maps to are off limits, and the best match has to clearly beat the runner up
+        scores = sorted(((difflib.SequenceMatcher(None, name, normalized).ratio(), candidate) for normalized, candidate in candidates.items() if candidate not in claimed), reverse=True)
+
+        if len(scores) == 0 or scores[0][0] < self.cutoff:
+            return None
+        if len(scores) > 1 and scores[0][0] - scores[1][0] < self.margin:
+            return None
+        return scores[0][1]
+
+    def to_bookmaker(self, home: str, away: str, league: str, bookmaker: str, candidates=None):
+        section = f'rapidapi_to_{bookmaker}'
+        return self.resolve(section, league, home, candidates), self.resolve(section, league, away, candidates)
+
+    def to_hist_data(self, home: str, away: str, league: str, candidates=None):
+        section = 'rapidapi_to_hist_data'
+        return self.resolve(section, league, home, candidates), self.resolve(section, league, away, candidates)
+
+    def index_games(self, games_url):
+        return {(normalize(game_url['home']), normalize(game_url['away'])): game_url for game_url in games_url}
+
+    def find_game(self, games_index: dict, home: str, away: str, league: str, bookmaker: str):
+        home_, away_ = self.to_bookmaker(home, away, league, bookmaker)
+        game_url = games_index.get((normalize(home_), normalize(away_)), None)
+
+        if game_url is None:
+            # Only unmapped names pay for the fuzzy fallback, and only once per name
+            candidates = {team for game_url_ in games_index.values() for team in (game_url_['home'], game_url_['away'])}
+            home_, away_ = self.to_bookmaker(home, away, league, bookmaker, candidates)
+            game_url = games_index.get((normalize(home_), normalize(away_)), None)
+
+        return game_url
+
+    def get_learned(self):
+        return {f'{section} {league}': dict(matches) for (section, league), matches in self.learned.items() if matches}
+
+    def save(self):
+        if not any(self.learned.values()):
+            return 0
+
+        saved = 0
+
+        # Matches go to the pending file for review, the curated mappings are never written here.
+        # Re-read under the lock so concurrent runs don't drop each other's matches
+        with FileLock(f'{self.pending_file}.lock'):
+            pending = read_config(self.pending_file) if os.path.exists(self.pending_file) else {}
+            for (section, league), matches in self.learned.items():
+                values = pending.setdefault(section, {}).setdefault(league, {})
+                for name, match in matches.items():
+                    if name not in values:
+                        values[name] = match
+                        saved += 1
+            write_config(pending, self.pending_file)
+
+        self.learned.clear()
+        return saved
@@ -7,7 +7,7 @@ import os
 import sys
 import csv
 from datetime import datetime, timedelta, timezone
-from decimal import ROUND_DOWN, Decimal, getcontext
+from decimal import ROUND_DOWN, Context, Decimal, localcontext
 from typing import Dict, List
 
 import dateutil
@@ -19,27 +19,43 @@ import uuid
 import pandas as pd
 import matplotlib.pyplot as plt
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 from dotenv import load_dotenv
+from filelock import FileLock
 from jproperties import Properties
 
 import db.db_utils as db
+from helpers.replay import REPLAY_DATE, REPLAY_DIR, get_replay_db_file
+from helpers.response_archive import get_archive
 
 load_dotenv(override=True)
 
 API_KEY = os.environ['X_RAPIDAPI_KEY']
 RAPIDAPI_HOST = os.environ["RAPIDAPI_HOST"]
-DB_FILE = os.environ["DB_FILE"]
+DB_FILE = get_replay_db_file(os.environ["DB_FILE"])
 SQL_PROPERTIES = os.environ["SQL_PROPERTIES"]
 CONFIG_FILE = os.environ["CONFIG_FILE"]
 MAPPINGS_FILE = os.environ["MAPPINGS_FILE"]
+# Fuzzy team name matches wait here for review, only the curated MAPPINGS_FILE is read back
+PENDING_MAPPINGS_FILE = os.environ.get("PENDING_MAPPINGS_FILE", f'{os.path.splitext(MAPPINGS_FILE)[0]}.pending.json')
 LOGS = os.environ["LOGS"]
 REPORTS_DIR = os.environ["REPORTS_DIR"]
 RESPONSES_DIR = os.environ["RESPONSES_DIR"]
-BANKROLL_DIR = os.environ["BANKROLL_DIR"]
+BANKROLL_DIR = f'{REPLAY_DIR}/{REPLAY_DATE}/bankroll' if REPLAY_DATE else os.environ["BANKROLL_DIR"]
 CREDENTIALS_FILE = os.environ['CREDENTIALS_FILE']
 HIST_DATA_PATH = os.environ['HIST_DATA_PATH']
 BETTING_CRAWLER_PATH = os.environ['BETTING_CRAWLER_PATH']
 DEVICE_UUID = os.environ['DEVICE_UUID']
+MISC_PATH = os.environ['MISC_PATH']
+HIST_CACHE_PATH = f'{MISC_PATH}/hist_cache'
+API_FOOTBALL_RESPONSES_DIR = f'{RESPONSES_DIR}/api_football'
+
+HIST_DATA_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']
+HIST_ODDS_COLUMNS = ['PSCH', 'PSCD', 'PSCA', 'AvgCH', 'AvgCD', 'AvgCA', 'PSH', 'PSD', 'PSA', 'AvgH', 'AvgD', 'AvgA']
 
 configs = Properties()
 with open(SQL_PROPERTIES, 'rb') as config_file:
@@ -50,8 +66,7 @@ headers = {
 	"x-rapidapi-host": RAPIDAPI_HOST
 }
 
-getcontext().prec = 4
-getcontext().rounding = ROUND_DOWN
+ODDS_CONTEXT = Context(prec=4, rounding=ROUND_DOWN)
 
 def convert_odds(odds, from_type, to_type):
     """
@@ -62,44 +77,42 @@ def convert_odds(odds, from_type, to_type):
     :param to_type: The desired output format ('american', 'fraction', or 'decimal').
     :return: The converted odds in the desired format.
     """
-    getcontext().prec = 4
-    getcontext().rounding = ROUND_DOWN
-
-    # Convert from American to Decimal
-    if from_type == 'american':
-        american_odds = Decimal(odds)
-        if american_odds > 0:
-            decimal_odds = (american_odds / 100) + 1
-        else:
-            decimal_odds = (100 / abs(american_odds)) + 1
+    with localcontext(ODDS_CONTEXT):
+        # Convert from American to Decimal
+        if from_type == 'american':
+            american_odds = Decimal(odds)
+            if american_odds > 0:
+                decimal_odds = (american_odds / 100) + 1
+            else:
+                decimal_odds = (100 / abs(american_odds)) + 1
     
-    # Convert from Fractional to Decimal
-    elif from_type == 'fraction':
-        fraction_odds = Fraction(odds)
-        decimal_odds = fraction_odds.numerator / fraction_odds.denominator + 1
+        # Convert from Fractional to Decimal
+        elif from_type == 'fraction':
+            fraction_odds = Fraction(odds)
+            decimal_odds = fraction_odds.numerator / fraction_odds.denominator + 1
     
-    # If already decimal
-    elif from_type == 'decimal':
-        decimal_odds = Decimal(odds)
+        # If already decimal
+        elif from_type == 'decimal':
+            decimal_odds = Decimal(odds)
 
-    # Convert Decimal to the desired format
-    if to_type == 'decimal':
-        return round(decimal_odds, 2)
+        # Convert Decimal to the desired format
+        if to_type == 'decimal':
+            return round(decimal_odds, 2)
 
-    elif to_type == 'american':
-        if decimal_odds >= 2:
-            american_odds = (decimal_odds - 1) * 100
-        else:
-            american_odds = -100 / (decimal_odds - 1)
-        return round(american_odds)
+        elif to_type == 'american':
+            if decimal_odds >= 2:
+                american_odds = (decimal_odds - 1) * 100
+            else:
+                american_odds = -100 / (decimal_odds - 1)
+            return round(american_odds)
 
-    elif to_type == 'fraction':
-        fraction_odds = Fraction(decimal_odds - 1).limit_denominator(1000)
-        # return f"{fraction_odds.numerator}/{fraction_odds.denominator}"
-        return fraction_odds
+        elif to_type == 'fraction':
+            fraction_odds = Fraction(decimal_odds - 1).limit_denominator(1000)
+            # return f"{fraction_odds.numerator}/{fraction_odds.denominator}"
+            return fraction_odds
 
-    else:
-        raise ValueError("Invalid conversion type. Use 'american', 'fraction', or 'decimal'.")
+        else:
+            raise ValueError("Invalid conversion type. Use 'american', 'fraction', or 'decimal'.")
 
 def generate_uuid():
     return str(uuid.uuid4())
@@ -109,6 +122,13 @@ def gen_sha512_hash(msg):
     sha512_hash = hashlib.sha512(msg)
     return sha512_hash.hexdigest()
 
+def gen_file_sha512_hash(file_path: str, chunk_size: int = 1 << 20):
+    sha512_hash = hashlib.sha512()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha512_hash.update(chunk)
+    return sha512_hash.hexdigest()
+
 def gen_hmac_sha512_hash(key, msg):
     key = key.encode() if isinstance(key, str) else key
     msg = msg.encode() if isinstance(msg, str) else msg
@@ -124,7 +144,8 @@ def gen_pbkdf2_sha512_hash(pwd, salt, iterations=10000, dklen=64):
     return derived_key.hex()
 
 def calculate_vig(*args):
-    commission = float(Decimal(1) - (Decimal(1) / Decimal(sum(args))))
+    with localcontext(ODDS_CONTEXT):
+        commission = float(Decimal(1) - (Decimal(1) / Decimal(sum(args))))
     return commission if commission > 0 else 0.
 
 def read_config(file_path: str):
@@ -132,9 +153,23 @@ def read_config(file_path: str):
         config = json.load(f)
     return config
 
-def update_config(obj: dict, file_path: str):
-    with open(file_path, 'w') as f:
+def write_config(obj: dict, file_path: str):
+    # Write next to the target and swap it in, readers never see a half written config
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
         json.dump(obj, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+def update_config(obj: dict, file_path: str, keys: List[str]):
+    # Merge only the keys the caller owns into the file as it is now, so runs writing other keys keep their changes
+    with FileLock(f'{file_path}.lock'):
+        config = read_config(file_path)
+        for section, values in obj.items():
+            config.setdefault(section, {}).update({key: values[key] for key in keys if key in values})
+        write_config(config, file_path)
+    return config
 
 def create_dir(path: str):
     if not os.path.exists(path):
@@ -167,6 +202,58 @@ def read_csv_file(file_path: str):
     df = pd.read_csv(file_path)
     return df
 
+def read_hist_data(file_path: str, columns: List[str] = HIST_DATA_COLUMNS):
+    if pa is None:
+        df = parse_hist_data(file_path)
+        return df[[column for column in columns if column in df.columns]]
+
+    stat = os.stat(file_path)
+    source = f'{stat.st_mtime_ns}:{stat.st_size}'.encode()
+    cache_path = get_hist_cache_path(file_path)
+    table = None
+
+    if os.path.exists(cache_path):
+        try:
+            reader = pa.ipc.open_file(pa.memory_map(cache_path, 'r'))
+            if (reader.schema.metadata or {}).get(b'source') == source:
+                table = reader.read_all()
+        except (pa.ArrowInvalid, OSError):
+            table = None
+
+    if table is None:
+        table = pa.Table.from_pandas(parse_hist_data(file_path), preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'source': source})
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, cache_path)
+
+    return table.select([column for column in columns if column in table.column_names]).to_pandas()
+
+def parse_hist_data(file_path: str):
+    usecols = set(HIST_DATA_COLUMNS + HIST_ODDS_COLUMNS)
+    df = pd.read_csv(file_path, usecols=lambda column: column in usecols, dtype={'HomeTeam': 'string', 'AwayTeam': 'string'})
+    df = df.dropna(subset=['HomeTeam', 'AwayTeam']).reset_index(drop=True)
+
+    # Both team columns share one dictionary so home and away names compare and concat as categories
+    teams = sorted(set(df['HomeTeam']) | set(df['AwayTeam']))
+    df['HomeTeam'] = pd.Categorical(df['HomeTeam'].astype(object), categories=teams)
+    df['AwayTeam'] = pd.Categorical(df['AwayTeam'].astype(object), categories=teams)
+
+    for column in ['FTHG', 'FTAG']:
+        df[column] = df[column].astype('int8') if df[column].notna().all() else df[column].astype('Int8')
+
+    return df
+
+def get_hist_cache_path(file_path: str):
+    rel_path = os.path.relpath(os.path.abspath(file_path), os.path.abspath(HIST_DATA_PATH))
+    if rel_path.startswith('..'):
+        rel_path = gen_sha512_hash(os.path.abspath(file_path))[:32]
+    return f'{HIST_CACHE_PATH}/{os.path.splitext(rel_path)[0]}.arrow'
+
 def generate_chart(csv_file, output_file, **kwargs):
     league = kwargs.get('league', '')
     season = kwargs.get('season', '')
@@ -218,16 +305,20 @@ def extract_time(time_string):
     # Format the result to 'HH:MM'
     return dt_est.strftime('%H:%M')
 
-def fetch_upcoming_games(league: str, league_code: str, date: datetime, season: str, logger: Logger):
+def fetch_upcoming_games(session: requests.Session, league: str, league_code: str, date: datetime, season: str, logger: Logger):
     try:
+        archive = get_archive(API_FOOTBALL_RESPONSES_DIR)
+
         def fetch_teams_rank():
             try:
                 url = f"https://{RAPIDAPI_HOST}/v3/standings"
                 params = {"league":league,"season":season.split('-')[0]}
-                res = requests.get(url, headers=headers, params=params)
+                res = session.get(url, headers=headers, params=params)
 
                 data = res.json()
 
+                archive.record_response('fetch_teams_rank', league, data, res)
+
                 res.raise_for_status()
 
                 teams: List[dict] = data['response'][0]['league']['standings'][0]
@@ -250,12 +341,14 @@ def fetch_upcoming_games(league: str, league_code: str, date: datetime, season:
 
         url = f"https://{RAPIDAPI_HOST}/v3/fixtures"
         params = {"league":league,"season":season.split('-')[0],"date": date,"timezone":"America/New_York"}
-        response = requests.get(url, headers=headers, params=params)
+        response = session.get(url, headers=headers, params=params)
 
         # print(response.json())
 
         data = response.json()
 
+        archive.record_response('fetch_upcoming_games', league, data, response)
+
         response.raise_for_status()
 
         fixtures = [
@@ -292,24 +385,6 @@ def fetch_upcoming_games(league: str, league_code: str, date: datetime, season:
 def fetch_odds():
     pass
         
-def map_from_rapidapi_to_bookmaker(home, away, league, bookmaker):
-    config_ = read_config(MAPPINGS_FILE)
-    values = config_.get(f'rapidapi_to_{bookmaker}', {}).get(league, {})
-
-    if not values:
-        raise ValueError('League values are is missing from mappings file.')
-    
-    return values.get(home, home), values.get(away, away)
-
-def map_from_rapidapi_to_hist_data(home, away, league):
-    config_ = read_config(MAPPINGS_FILE)
-    values: dict = config_.get(f'rapidapi_to_hist_data').get(league, {})
-
-    if not values:
-        raise ValueError('League values are is missing from mappings file.')
-    
-    return values.get(home, home), values.get(away, away)
-
 def load_one(q, *args):
     return db.load_one(q, *args)
 
@@ -325,5 +400,8 @@ def execute_many(q, data):
 def delete_some(q, data):
     db.execute(q, data)
 
+def get_writer(q, commit_every: int = 1):
+    return db.Writer(q, commit_every)
+
 def delete_all(q):
     db.execute(q)
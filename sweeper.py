@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+
+import sys
+import os
+from datetime import datetime
+
+from backtesting.sweep import run_sweep
+from helpers.logger import setup_logger
+from helpers.sweeper_args_parser import args_parser
+from strategies.strategy_factory import StrategyFactory
+from utils.utils import CONFIG_FILE, HIST_DATA_PATH, LOGS, REPORTS_DIR, create_dir, read_config
+
+def main(args):
+    try:
+        betting_strategy = args.betting_strategy.lower()
+        staking_strategy = args.staking_strategy.lower()
+
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        config = read_config(CONFIG_FILE)
+        strategies_list = config.get('strategies', [])
+        leagues = config.get('leagues', {})
+
+        if betting_strategy in strategies_list:
+            log_path = f'{LOGS}/{betting_strategy}/sweeper'
+            create_dir(log_path)
+            logger = setup_logger('sweeper', f'{log_path}/{today}_sweeper.log')
+
+            logger.info(f'Starting bet_bot:sweeper {betting_strategy} with {staking_strategy} staking')
+
+            match betting_strategy:
+                case 'match_ratings':
+                    pass
+                case _:
+                    raise ValueError('Unknown betting strategy selected')
+
+            strategy_factory = StrategyFactory()
+            strat_config = read_config(strategy_factory.get_config(betting_strategy))
+
+            if args.seasons:
+                seasons = args.seasons.split(',')
+            else:
+                seasons = sorted(el for el in os.listdir(HIST_DATA_PATH) if os.path.isdir(os.path.join(HIST_DATA_PATH, el)))
+
+            windows = [int(el) for el in args.windows.split(',')]
+            coeff_scales = [float(el) for el in args.coeff_scales.split(',')]
+            fracs = [float(el) for el in args.fracs.split(',')]
+
+            tasks = []
+            for season in seasons:
+                for league in leagues:
+                    file_path = os.path.join(HIST_DATA_PATH, f'{season}/{league}.csv')
+                    if not os.path.exists(file_path) or league not in strat_config:
+                        logger.warning(f'No historical data or config for {league} {season}')
+                        continue
+                    tasks.append((file_path, league, season))
+
+            logger.info(f'Sweeping {len(windows) * len(coeff_scales) * len(fracs)} grid points over {len(tasks)} league seasons')
+
+            start = datetime.now()
+            results = run_sweep(tasks, strat_config, staking_strategy, windows, coeff_scales, fracs, args.workers)
+
+            logger.info(f'Sweep completed in {(datetime.now() - start).total_seconds():.2f}s')
+            logger.info(f"Best parameters:\n{results[results['rank'] == 1].to_string(index=False)}")
+
+            report_path = f'{REPORTS_DIR}/{betting_strategy}/sweeps'
+            create_dir(report_path)
+
+            results.to_csv(f'{report_path}/{today}_{staking_strategy}_sweep.csv', index=False)
+        else:
+            print('Unknown betting strategy or empty strategies list from config')
+            exit(1)
+    except Exception as e:
+        e_type, e_object, e_traceback = sys.exc_info()
+        e_filename = os.path.split(
+            e_traceback.tb_frame.f_code.co_filename
+        )[1]
+        e_line_number = e_traceback.tb_lineno
+        logger.error(f'{e}, type: {e_type}, filename: {e_filename}, line: {e_line_number}')
+    else:
+        logger.info('Mission accomplished.')
+
+if __name__ == '__main__':
+    args = args_parser()
+    main(args)
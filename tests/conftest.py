@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The modules read their settings from the environment at import time, so point everything at a scratch directory first
+TMP_DIR = tempfile.mkdtemp(prefix='bet_bot_tests_')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for name in ['X_RAPIDAPI_KEY', 'RAPIDAPI_HOST', 'BETTING_CRAWLER_PATH', 'DEVICE_UUID', 'DEVICE_ID', 'PINNACLE_TRUST_CODE', 'PINNACLE_API_KEY',
+             'EMAIL_ADDRESS', 'EMAIL_PASSWORD', 'EMAIL_HOST', 'EMAIL_PORT', 'PERSONAL_EMAIL', 'EMAIL_SMS']:
+    os.environ.setdefault(name, 'test')
+
+for name in ['PINNACLE_GUEST_API_URL', 'PINNACLE_API_URL', 'BATERY_WIN_API_URL', 'WILLIAM_HILL_BASE_URL', 'WILLIAM_HILL_SPORTS_URL',
+             'WILLIAM_HILL_AUTH_URL1', 'WILLIAM_HILL_AUTH_URL2', 'WILLIAM_HILL_TRANSACT_API']:
+    os.environ.setdefault(name, 'http://127.0.0.1:9')
+
+for name, path in [('DB_FILE', 'bets.db'), ('CONFIG_FILE', 'config.json'), ('MAPPINGS_FILE', 'mappings.json'), ('CREDENTIALS_FILE', 'credentials.json'),
+                   ('MATCH_RATING_CONFIG_FILE', 'match_ratings.json'), ('LOGS', 'logs'), ('REPORTS_DIR', 'reports'), ('RESPONSES_DIR', 'responses'),
+                   ('BANKROLL_DIR', 'bankroll'), ('HIST_DATA_PATH', 'hist_data'), ('MISC_PATH', 'misc'), ('HTTP_CACHE_FILE', 'http_cache.sqlite'), ('SESSION_STORE_DIR', 'sessions')]:
+    os.environ.setdefault(name, os.path.join(TMP_DIR, path))
+
+os.environ.setdefault('SQL_PROPERTIES', os.path.join(ROOT, 'src', 'db', 'sql.properties'))
+os.environ['REPLAY_DATE'] = ''
+
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+@pytest.fixture
+def database():
+    # A fresh, fully migrated database file per test
+    import db.db_utils as db
+    from db.migrations import migrate
+
+    def reset():
+        db.close_connections()
+        db.local.con = None
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(f'{db.DB_FILE}{suffix}'):
+                os.remove(f'{db.DB_FILE}{suffix}')
+
+    reset()
+    migrate(db.get_connection())
+    yield db
+    reset()
+
+@pytest.fixture
+def pinnacle(tmp_path):
+    # A Pinnacle bot logged in to the load test's mock bookmaker, bot.calls keeps the method and path of every request
+    import logging
+    from bot.pinnacle_bot import PinnacleBettingBot
+    from loadtest.mock_server import MockBookmaker, start_mock_server
+
+    bookmaker = MockBookmaker(2, 6, latency=(0., 0.), seed=7)
+    server, url = start_mock_server(bookmaker)
+    bot = PinnacleBettingBot('pinnacle', guest_api_url=url, api_url=url, responses_dir=str(tmp_path / 'responses'), session_file=None, session_store=False)
+    bot.pacer.min_gap = bot.pacer.max_gap = 0.
+    bot.calls = []
+    bot.session.hooks['response'].insert(0, lambda response, *args, **kwargs: bot.calls.append((response.request.method, response.request.path_url.split('?')[0])))
+    bot.login({'username': 'test', 'password': 'test'}, logging.getLogger('pinnacle'))
+
+    yield bot, bookmaker
+
+    server.shutdown()
+    server.server_close()
+    bot.archive.close()
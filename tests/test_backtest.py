@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+from backtesting.backtest import MATCH_RATINGS_COLUMNS, backtest_league, run_backtest, simulate, summarize
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham']
+LEAGUE_CONFIG = {'home': {'beta_coeff': 1.6, 'constant': 45.0}, 'away': {'beta_squared_coeff': 0.02, 'beta_coeff': -1.1, 'constant': 29.0}, 'bankroll': 100., 'name': 'Premier League'}
+
+def make_csv(path, n_rounds: int = 4, seed: int = 0):
+    # 4 teams playing each other home and away n_rounds times, two games a matchday, closing prices only from round 2
+    rng = np.random.default_rng(seed)
+    pairings = [[(0, 1), (2, 3)], [(0, 2), (1, 3)], [(0, 3), (1, 2)]]
+    pairings += [[(away, home) for home, away in games] for games in pairings]
+
+    rows = []
+    for matchday in range(n_rounds * len(pairings)):
+        date = (pd.Timestamp('2023-08-12') + pd.Timedelta(weeks=matchday)).strftime('%d/%m/%Y')
+        for home, away in pairings[matchday % len(pairings)]:
+            odds = np.round(rng.uniform([1.6, 3.0, 2.2], [3.2, 3.8, 5.5]), 2)
+            closing = odds if matchday >= len(pairings) else [None] * 3
+            rows.append({'Date': date, 'HomeTeam': TEAMS[home], 'AwayTeam': TEAMS[away], 'FTHG': rng.poisson(1.6), 'FTAG': rng.poisson(1.1),
+                         'PSCH': closing[0], 'PSCD': closing[1], 'PSCA': closing[2], 'AvgH': odds[0], 'AvgD': odds[1], 'AvgA': odds[2]})
+
+    DataFrame(rows).to_csv(path, index=False)
+    return path
+
+def test_simulate_settles_each_slate_before_the_next():
+    odds = np.array([[2.0, 3.5, 4.0], [2.5, 3.2, 3.0], [3.0, 3.3, 2.4]])
+    values = np.array([[0.2, -0.1, -0.2], [0.3, -0.05, -0.1], [0.4, -0.3, -0.1]])
+    outcomes = np.array([0, 2, 0])
+
+    stakes, balances, bankroll = simulate(odds, values, outcomes, [np.array([0, 1]), np.array([2])], 100., 'kelly')
+
+    # Half Kelly off the bankroll at kick-off: 100 * 0.5 * value / (odds - 1)
+    np.testing.assert_allclose(stakes[:, 0], [10., 10., 10.])
+    np.testing.assert_allclose(balances, [90., 80., 90.])
+    assert bankroll == pytest.approx(120.)
+
+def test_backtest_pnl(tmp_path):
+    results = backtest_league(make_csv(tmp_path / 'E0.csv'), 'E0', '2023-2024', LEAGUE_CONFIG, 'kelly', window=2)
+
+    assert list(results.columns) == MATCH_RATINGS_COLUMNS
+    # Teams need two games behind them before they are rated
+    assert 0 < len(results) < 48 and results['game_id'].min() >= 4
+    assert set(results['bookmaker']) == {'PSC', 'Avg'}
+
+    placed = results[results['status'] == 'SUCCESS']
+    assert len(placed) > 0 and (placed['bet'] == 'home').all()
+    won = placed['bet'] == placed['ftr']
+    np.testing.assert_allclose(placed['gl'], np.where(won, placed['stake'] * placed['bet_odds'], 0.), atol=0.01)
+    np.testing.assert_allclose(placed['profit'], np.where(won, placed['stake'] * (placed['bet_odds'] - 1), -placed['stake']), atol=0.01)
+    assert (results.loc[results['status'] != 'SUCCESS', 'result'] == 'NB').all()
+
+    # The bankroll column walks the slates: stakes come off before kick-off, the slate's profit lands after it
+    bankroll = LEAGUE_CONFIG['bankroll']
+    for _, slate in results.groupby('game_date', sort=False):
+        stakes = np.where(slate['status'] == 'SUCCESS', slate['stake'], 0.)
+        np.testing.assert_allclose(slate['bankroll'], bankroll - np.cumsum(stakes), atol=0.01)
+        bankroll += slate.loc[slate['status'] == 'SUCCESS', 'profit'].sum()
+
+    summary = summarize(results)
+    assert summary.loc[('2023-2024', 'E0'), 'bets'] == len(placed)
+    assert summary.loc[('2023-2024', 'E0'), 'profit'] == pytest.approx(placed['profit'].sum(), abs=0.01)
+
+def test_run_backtest_concatenates_leagues(tmp_path):
+    tasks = [(str(make_csv(tmp_path / f'{league}.csv', seed=seed)), league, '2023-2024') for seed, league in enumerate(['E0', 'SP1'])]
+    strat_config = {'E0': LEAGUE_CONFIG, 'SP1': dict(LEAGUE_CONFIG, name='La Liga')}
+
+    results = run_backtest(tasks, strat_config, 'kelly', workers=2, window=2)
+
+    assert set(results['league_code']) == {'E0', 'SP1'}
+    assert results.equals(pd.concat([backtest_league(file_path, league, season, strat_config[league], 'kelly', 2) for file_path, league, season in tasks], ignore_index=True))
+    assert run_backtest([], strat_config, 'kelly').empty
@@ -0,0 +1,74 @@
+import logging
+
+import pytest
+
+from bot.bankroll_ledger import BankrollLedger
+
+logger = logging.getLogger('test_bankroll_ledger')
+
+class FakeBot:
+    def __init__(self, balance: float):
+        self.balance = balance
+        self.balance_calls = 0
+
+    def check_balance(self, logger, **kwargs):
+        self.balance_calls += 1
+        return self.balance
+
+    def simulate_human_behavior(self):
+        pass
+
+def test_balance_checked_once_then_tracked_locally():
+    bot = FakeBot(100.)
+    ledger = BankrollLedger(bot, logger)
+
+    for stake in [10., 20., 5.5]:
+        assert ledger.can_afford(stake)
+        ledger.debit(stake)
+
+    assert ledger.get_balance() == pytest.approx(64.5)
+    assert bot.balance_calls == 1
+
+def test_overdraft_refused():
+    ledger = BankrollLedger(FakeBot(30.), logger)
+
+    assert ledger.can_afford(29.99)
+    assert not ledger.can_afford(30.)
+    with pytest.raises(ValueError):
+        ledger.debit(30.)
+    assert ledger.balance == 30. and ledger.placed == 0
+
+    # Nothing to debit before the first balance call
+    with pytest.raises(ValueError):
+        BankrollLedger(FakeBot(30.), logger).debit(1.)
+
+def test_reconciled_every_n_bets(caplog):
+    bot = FakeBot(100.)
+    ledger = BankrollLedger(bot, logger, reconcile_every=2)
+
+    ledger.get_balance()
+    ledger.debit(10.)
+    ledger.debit(10.)
+    # A bet settled or a deposit made meanwhile, the remote balance wins
+    bot.balance = 95.
+
+    with caplog.at_level(logging.WARNING, logger='test_bankroll_ledger'):
+        assert ledger.get_balance() == 95.
+
+    assert bot.balance_calls == 2 and ledger.placed == 0
+    assert 'differs from remote balance' in caplog.text
+
+def test_ledger_follows_the_bookmaker(pinnacle):
+    bot, bookmaker = pinnacle
+    ledger = BankrollLedger(bot, logger)
+    start = ledger.get_balance()
+    matchup_id = bookmaker.leagues[1][0]
+
+    assert bot.place_bet(2.5, 25., 'home', {'id': matchup_id, 'home': 'Home', 'away': 'Away'}, 1, logger)
+    ledger.debit(25.)
+    assert ledger.balance == pytest.approx(bookmaker.balance)
+
+    # The bookmaker took a bet the ledger never heard about, like a placement that timed out but went through
+    bookmaker.balance -= 40.
+
+    assert ledger.reconcile() == pytest.approx(start - 65.)
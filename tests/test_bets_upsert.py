@@ -0,0 +1,60 @@
+import sqlite3
+
+from utils.utils import configs, get_writer
+
+UPSERT_INTO_MATCH_RATINGS = configs.get('UPSERT_INTO_MATCH_RATINGS').data.replace('\"', '')
+
+def make_bet(game_id: int, status: str = 'SUCCESS', stake: float = 10.):
+    return [game_id, '2024-05-01', 'Arsenal', 'Chelsea', '2023-2024', 39, 'Premier League', 36, 2, 9, None, None, None, 'pinnacle', f'pin-{game_id}',
+            1.8, 3.6, 4.5, 0.53, 0.26, 0.21, 0.04, 6, -2, 8, 1.7, 3.7, 4.4, 0.58, 0.24, 0.18, 0.04, -0.13, -0.19, 1, 0, 0, 'home', 1.8, 0.04, stake, status, 1000.]
+
+def select_bets(db):
+    return db.load_many('SELECT id, game_id, status, stake, result, gl, created_at, updated_at FROM match_ratings ORDER BY game_id')
+
+def test_upsert_is_idempotent(database):
+    database.execute(UPSERT_INTO_MATCH_RATINGS, make_bet(1))
+    first = select_bets(database)
+    database.execute(UPSERT_INTO_MATCH_RATINGS, make_bet(1))
+    second = select_bets(database)
+
+    assert len(second) == 1
+    assert [tuple(row)[:-1] for row in second] == [tuple(row)[:-1] for row in first]
+    assert first[0]['updated_at'] is None and second[0]['updated_at'] is not None
+
+def test_failed_bet_replaced_in_place(database):
+    database.execute(UPSERT_INTO_MATCH_RATINGS, make_bet(1, status='FAILED', stake=12.))
+    failed = select_bets(database)[0]
+
+    database.execute(UPSERT_INTO_MATCH_RATINGS, make_bet(1, status='SUCCESS', stake=9.5))
+    placed = select_bets(database)[0]
+
+    assert (placed['id'], placed['created_at']) == (failed['id'], failed['created_at'])
+    assert (placed['status'], placed['stake']) == ('SUCCESS', 9.5)
+
+def test_settlement_survives_a_rewrite(database):
+    database.execute(UPSERT_INTO_MATCH_RATINGS, make_bet(1))
+    database.execute("UPDATE match_ratings SET result = 'W', gl = 18.0 WHERE game_id = 1")
+
+    database.execute(UPSERT_INTO_MATCH_RATINGS, make_bet(1))
+
+    assert tuple(select_bets(database)[0])[4:6] == ('W', 18.0)
+
+def test_writer_commits_every_n_rows(database):
+    other = sqlite3.connect(database.DB_FILE)
+
+    def count():
+        return other.execute('SELECT COUNT(*) FROM match_ratings').fetchone()[0]
+
+    with get_writer(UPSERT_INTO_MATCH_RATINGS, commit_every=2) as writer:
+        writer.write(make_bet(1))
+        assert count() == 0
+        writer.write(make_bet(2))
+        assert count() == 2
+        writer.write(make_bet(3))
+        writer.write(make_bet(3, status='FAILED'))
+        writer.write(make_bet(4))
+        assert count() == 3
+
+    assert count() == 4 and writer.written == 5
+    assert [row['status'] for row in select_bets(database)] == ['SUCCESS', 'SUCCESS', 'FAILED', 'SUCCESS']
+    other.close()
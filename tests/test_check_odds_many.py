@@ -0,0 +1,50 @@
+import logging
+import time
+
+import pytest
+
+logger = logging.getLogger('test_check_odds_many')
+
+def get_games(bot, bookmaker, league: int = 1):
+    return bot.get_game_urls(league, logger, today=bookmaker.today.strftime('%Y-%m-%d'), snapshot=False)
+
+def test_matches_one_call_per_game(pinnacle):
+    bot, bookmaker = pinnacle
+    games_url = get_games(bot, bookmaker)
+    bot.calls.clear()
+
+    odds = bot.check_odds_many(games_url, logger)
+
+    assert list(odds.keys()) == [game_url['id'] for game_url in games_url]
+    assert sorted(bot.calls) == sorted(('GET', f"/matchups/{game_url['id']}/markets/related/straight") for game_url in games_url)
+    for game_url in games_url:
+        assert odds[game_url['id']] == bot.check_odds(game_url['url'], logger, game_id=game_url['id'])
+        assert odds[game_url['id']] == pytest.approx(bookmaker.matchups[game_url['id']]['odds'], rel=0.01)
+
+def test_games_fetched_concurrently(pinnacle):
+    bot, bookmaker = pinnacle
+    games_url = get_games(bot, bookmaker)
+    bookmaker.latency = (0.1, 0.1)
+
+    start = time.perf_counter()
+    bot.check_odds_many(games_url, logger)
+
+    # 6 games at 100ms each, one after the other would take 600ms
+    assert time.perf_counter() - start < 0.4
+
+def test_a_failed_game_does_not_sink_the_slate(pinnacle):
+    bot, bookmaker = pinnacle
+    games_url = get_games(bot, bookmaker)
+    missing = dict(games_url[0], id=1, url=games_url[0]['url'].replace(str(games_url[0]['id']), '1'))
+
+    odds = bot.check_odds_many([missing] + games_url[1:], logger)
+
+    assert odds[1] == (0., 0., 0.)
+    assert all(all(price > 1 for price in odds[game_url['id']]) for game_url in games_url[1:])
+
+def test_empty_slate(pinnacle):
+    bot, _ = pinnacle
+    bot.calls.clear()
+
+    assert bot.check_odds_many([], logger) == {}
+    assert bot.calls == []
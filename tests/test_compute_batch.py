@@ -0,0 +1,64 @@
+import logging
+
+import numpy as np
+import pytest
+from pandas import DataFrame
+
+from strategies.match_ratings import MatchRatingsStrategy
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham', 'Leeds', 'Wolves', 'Burnley', 'Luton']
+STRAT_CONFIG = {'E0': {'home': {'beta_coeff': 1.6, 'constant': 45.0}, 'away': {'beta_squared_coeff': 0.02, 'beta_coeff': -1.1, 'constant': 29.0}, 'bankroll': 750.}}
+
+logger = logging.getLogger('test_compute_batch')
+
+def make_results(n_games: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_games):
+        home, away = rng.choice(len(TEAMS), 2, replace=False)
+        rows.append({'Date': f'{1 + i % 28:02d}/{8 + i // 28 % 5:02d}/2023', 'HomeTeam': TEAMS[home], 'AwayTeam': TEAMS[away], 'FTHG': rng.poisson(1.5), 'FTAG': rng.poisson(1.1)})
+    return DataFrame(rows)
+
+def make_slate(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    rows = [{'home': TEAMS[i], 'away': TEAMS[-1 - i], 'home_odds': round(rng.uniform(1.3, 4.5), 2), 'draw_odds': round(rng.uniform(2.9, 4.), 2), 'away_odds': round(rng.uniform(1.5, 7.), 2)} for i in range(4)]
+    # A team without history and a game quoted without a usable price
+    rows.append({'home': 'Ipswich', 'away': 'Arsenal', 'home_odds': 2.5, 'draw_odds': 3.3, 'away_odds': 2.8})
+    rows.append({'home': 'Chelsea', 'away': 'Leeds', 'home_odds': 1.0, 'draw_odds': 0., 'away_odds': 0.})
+    return DataFrame(rows, index=[10, 11, 12, 13, 14, 15])
+
+@pytest.fixture(scope='module')
+def data():
+    return make_results(120, seed=3)
+
+def test_batch_matches_per_game(data):
+    slate = make_slate()
+    batch = MatchRatingsStrategy(data, 'E0', STRAT_CONFIG, 'kelly', season='batch-parity').compute_batch(slate, 'match_ratings', logger)
+
+    # Unrated fixtures are left out, the others keep their slate index and order
+    assert list(batch.index) == [10, 11, 12, 13, 15]
+    assert list(batch.columns) == MatchRatingsStrategy.columns
+
+    for idx, fixture in slate.iterrows():
+        odds = {'home_odds': fixture['home_odds'], 'draw_odds': fixture['draw_odds'], 'away_odds': fixture['away_odds']}
+        values = MatchRatingsStrategy(data, 'E0', STRAT_CONFIG, 'kelly', season='batch-parity', **odds).compute(fixture['home'], fixture['away'], 'match_ratings', logger)
+
+        if idx not in batch.index:
+            assert values == {}
+            continue
+        assert values == batch.loc[idx].to_dict()
+
+    # Sizing a slate leaves the league bankroll alone
+    assert STRAT_CONFIG['E0']['bankroll'] == 750.
+
+def test_unpriced_games_are_never_staked(data):
+    batch = MatchRatingsStrategy(data, 'E0', STRAT_CONFIG, 'kelly', season='batch-parity').compute_batch(make_slate(), 'match_ratings', logger)
+
+    assert not batch[['h', 'd', 'a', 'stake']].isna().any().any()
+    assert batch.loc[15, ['h', 'd', 'a', 'stake']].tolist() == [0., 0., 0., 0.]
+    assert not batch.loc[15, 'flag']
+
+def test_empty_slate(data):
+    batch = MatchRatingsStrategy(data, 'E0', STRAT_CONFIG, 'kelly', season='batch-parity').compute_batch(make_slate().iloc[:0], 'match_ratings', logger)
+
+    assert batch.empty and list(batch.columns) == MatchRatingsStrategy.columns
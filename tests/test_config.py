@@ -0,0 +1,56 @@
+import os
+import threading
+
+import pytest
+
+from backtesting.fitting import write_coeffs
+from utils.utils import read_config, update_config, write_config
+
+FITTED = {'home': {'beta_coeff': 1.7, 'constant': 44.0}, 'away': {'beta_squared_coeff': 0.03, 'beta_coeff': -1.2, 'constant': 28.0}}
+
+@pytest.fixture
+def config_path(tmp_path):
+    config_path = os.path.join(tmp_path, 'match_ratings.json')
+    write_config({
+        league: {'name': league, 'bankroll': 1000., 'home': {'beta_coeff': 1.6, 'constant': 45.0}, 'away': {'beta_squared_coeff': 0.02, 'beta_coeff': -1.1, 'constant': 29.0}}
+        for league in ('E0', 'SP1')
+    }, config_path)
+    return config_path
+
+def test_refit_during_a_run_keeps_the_new_coefficients(config_path):
+    # main.py and bet_settler.py read their snapshot at startup
+    strat_config = read_config(config_path)
+
+    write_coeffs({'E0': dict(FITTED, games=380)}, config_path)
+
+    strat_config['E0']['bankroll'] = 975.5
+    update_config({'E0': strat_config['E0']}, config_path, ['bankroll'])
+
+    config = read_config(config_path)
+    assert config['E0']['bankroll'] == 975.5
+    assert config['E0']['home'] == FITTED['home'] and config['E0']['away'] == FITTED['away']
+    assert 'games' not in config['E0']
+
+def test_bankroll_update_during_a_fit_is_kept(config_path):
+    update_config({'SP1': {'bankroll': 1020.}}, config_path, ['bankroll'])
+    write_coeffs({'E0': FITTED, 'SP1': FITTED}, config_path)
+
+    config = read_config(config_path)
+    assert config['SP1']['bankroll'] == 1020.
+    assert config['E0']['bankroll'] == 1000.
+    assert config['SP1']['home'] == FITTED['home']
+
+def test_concurrent_writers_keep_each_others_keys(config_path):
+    def write(league: str, key: str, value):
+        for i in range(20):
+            update_config({league: {key: value + i}}, config_path, [key])
+
+    threads = [threading.Thread(target=write, args=args) for args in (('E0', 'bankroll', 100), ('SP1', 'bankroll', 200), ('E0', 'window', 6))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    config = read_config(config_path)
+    assert (config['E0']['bankroll'], config['SP1']['bankroll'], config['E0']['window']) == (119, 219, 25)
+    assert config['E0']['name'] == 'E0'
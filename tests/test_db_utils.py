@@ -0,0 +1,51 @@
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+def test_one_connection_per_thread(database):
+    con = database.get_connection()
+    assert database.get_connection() is con
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        others = list(executor.map(lambda _: id(database.get_connection()), range(4)))
+
+    assert id(con) not in others
+    assert len(database.connections) == 1 + len(set(others))
+
+def test_connections_use_wal(database):
+    con = database.get_connection()
+
+    assert con.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert con.execute('PRAGMA synchronous').fetchone()[0] == 1
+    assert con.execute('PRAGMA temp_store').fetchone()[0] == 2
+
+def test_connecting_leaves_the_schema_alone(database):
+    database.close_connections()
+    database.local.con = None
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(f'{database.DB_FILE}{suffix}'):
+            os.remove(f'{database.DB_FILE}{suffix}')
+
+    assert database.load_many("SELECT name FROM sqlite_master WHERE type = 'table'") == []
+
+def test_concurrent_writers(database):
+    database.execute('CREATE TABLE writes (thread INTEGER, n INTEGER)')
+
+    def write(thread):
+        for n in range(50):
+            database.execute('INSERT INTO writes (thread, n) VALUES (?, ?)', (thread, n))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(write, range(8)))
+
+    assert database.load_one('SELECT COUNT(*) FROM writes')[0] == 400
+
+def test_close_connections(database):
+    con = database.get_connection()
+    database.close_connections()
+
+    assert database.connections == []
+    with pytest.raises(sqlite3.ProgrammingError):
+        con.execute('SELECT 1')
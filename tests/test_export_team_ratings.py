@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from pandas import DataFrame
+
+from strategies.match_ratings import compute_team_ratings, export_team_ratings
+from utils.utils import read_hist_data
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham', 'Leeds', 'Wolves']
+
+def make_csv(path, n_games: int = 30, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_games):
+        home, away = rng.choice(len(TEAMS), 2, replace=False)
+        rows.append({'Div': 'E0', 'Date': f'{1 + i % 28:02d}/08/2023', 'HomeTeam': TEAMS[home], 'AwayTeam': TEAMS[away], 'FTHG': rng.poisson(1.5), 'FTAG': rng.poisson(1.1),
+                     'Referee': 'M Oliver', 'PSCH': 2.1, 'PSCD': 3.4, 'PSCA': 3.6})
+    DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+def test_export_only_when_the_source_changes(tmp_path):
+    file_path = make_csv(tmp_path / 'E0.csv')
+    data = read_hist_data(file_path)
+    path = str(tmp_path / 'misc')
+
+    assert export_team_ratings(data, 'E0', '2023-2024', path, file_path)
+    assert not export_team_ratings(data, 'E0', '2023-2024', path, file_path)
+
+    exported = pq.read_table(f'{path}/transformed_hist_data/2023-2024/E0.parquet').to_pandas()
+    expected = compute_team_ratings(data.set_index('Date'), 'E0', '2023-2024').reset_index()
+    pd.testing.assert_frame_equal(exported, expected, check_categorical=False)
+
+    make_csv(tmp_path / 'E0.csv', n_games=34, seed=1)
+    assert export_team_ratings(read_hist_data(file_path), 'E0', '2023-2024', path, file_path)
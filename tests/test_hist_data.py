@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+import utils.utils as utils
+from utils.utils import HIST_DATA_COLUMNS, HIST_ODDS_COLUMNS, get_hist_cache_path, parse_hist_data, read_hist_data
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham', 'Leeds', 'Wolves']
+
+def make_csv(path, n_games: int = 30, missing_goals: bool = False, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_games):
+        home, away = rng.choice(len(TEAMS), 2, replace=False)
+        rows.append({'Div': 'E0', 'Date': f'{1 + i % 28:02d}/08/2023', 'HomeTeam': TEAMS[home], 'AwayTeam': TEAMS[away], 'FTHG': rng.poisson(1.5), 'FTAG': rng.poisson(1.1),
+                     'Referee': 'M Oliver', 'PSCH': 2.1, 'PSCD': 3.4, 'PSCA': 3.6})
+    df = DataFrame(rows)
+    if missing_goals:
+        # Postponed games are listed without a score
+        df.loc[[3, 17], ['FTHG', 'FTAG']] = None
+    df.to_csv(path, index=False)
+    return str(path)
+
+def test_cache_round_trip(tmp_path):
+    file_path = make_csv(tmp_path / 'E0.csv')
+
+    first = read_hist_data(file_path, HIST_DATA_COLUMNS + HIST_ODDS_COLUMNS)
+    cache_path = get_hist_cache_path(file_path)
+    assert os.path.exists(cache_path)
+
+    # The second read comes from the arrow file, projected to the asked columns and typed like the parsed csv
+    os.utime(cache_path, (0, 0))
+    second = read_hist_data(file_path, HIST_DATA_COLUMNS + HIST_ODDS_COLUMNS)
+    projected = read_hist_data(file_path, ['HomeTeam', 'FTHG'])
+
+    pd.testing.assert_frame_equal(first, second)
+    pd.testing.assert_frame_equal(second, parse_hist_data(file_path)[list(second.columns)])
+    assert list(second.columns) == HIST_DATA_COLUMNS + ['PSCH', 'PSCD', 'PSCA']
+    assert list(projected.columns) == ['HomeTeam', 'FTHG']
+    assert str(second['FTHG'].dtype) == 'int8' and isinstance(second['HomeTeam'].dtype, pd.CategoricalDtype)
+    assert list(second['HomeTeam'].cat.categories) == list(second['AwayTeam'].cat.categories)
+
+def test_int8_fallback_for_missing_goals(tmp_path):
+    file_path = make_csv(tmp_path / 'E0.csv', missing_goals=True)
+
+    parsed = read_hist_data(file_path)
+    cached = read_hist_data(file_path)
+
+    assert str(cached['FTHG'].dtype) == str(cached['FTAG'].dtype) == 'Int8'
+    assert cached['FTHG'].isna().sum() == 2
+    pd.testing.assert_frame_equal(parsed, cached)
+
+def test_cache_refreshed_when_the_csv_changes(tmp_path):
+    file_path = make_csv(tmp_path / 'E0.csv', n_games=30)
+    assert len(read_hist_data(file_path)) == 30
+
+    make_csv(tmp_path / 'E0.csv', n_games=34, seed=1)
+    assert len(read_hist_data(file_path)) == 34
+
+    # A broken cache file is rebuilt rather than trusted
+    with open(get_hist_cache_path(file_path), 'wb') as f:
+        f.write(b'not arrow')
+    assert len(read_hist_data(file_path)) == 34
+
+def test_parse_without_pyarrow(tmp_path, monkeypatch):
+    file_path = make_csv(tmp_path / 'E0.csv', missing_goals=True)
+    cached = read_hist_data(file_path)
+
+    monkeypatch.setattr(utils, 'pa', None)
+    pd.testing.assert_frame_equal(read_hist_data(file_path), cached)
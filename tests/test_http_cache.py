@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import helpers.http_cache as http_cache
+from helpers.http_cache import CachingAdapter
+
+@pytest.fixture
+def server():
+    # Answers every GET with the number of requests it has served so far
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.server.hits += 1
+            body = json.dumps({'hits': self.server.hits, 'authorization': self.headers.get('Authorization')}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.hits = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def session(tmp_path):
+    session = requests.Session()
+    session.mount('http://', CachingAdapter(str(tmp_path / 'cache.sqlite'), ttls=[(r'/v3/fixtures', 60)]))
+    return session
+
+def get_url(server, path):
+    return f'http://127.0.0.1:{server.server_address[1]}{path}'
+
+def test_cached_until_expiry(server, session, monkeypatch):
+    url = get_url(server, '/v3/fixtures')
+
+    first = session.get(url, params={'league': 39})
+    second = session.get(url, params={'league': 39})
+
+    assert not first.from_cache and second.from_cache
+    assert second.json() == first.json() and server.hits == 1
+
+    # Another query string is another entry
+    session.get(url, params={'league': 140})
+    assert server.hits == 2
+
+    now = time.time()
+    monkeypatch.setattr(http_cache.time, 'time', lambda: now + 61)
+    third = session.get(url, params={'league': 39})
+
+    assert not third.from_cache and third.json()['hits'] == 3
+
+def test_key_varies_with_credentials(server, session):
+    url = get_url(server, '/v3/fixtures')
+
+    first = session.get(url, headers={'Authorization': 'Bearer a'})
+    other = session.get(url, headers={'Authorization': 'Bearer b'})
+    again = session.get(url, headers={'Authorization': 'Bearer a'})
+    json_only = session.get(url, headers={'Authorization': 'Bearer a', 'Accept': 'application/xml'})
+
+    assert other.json()['authorization'] == 'Bearer b' and not other.from_cache
+    assert again.from_cache and again.json() == first.json()
+    assert not json_only.from_cache
+    assert server.hits == 3
+
+def test_uncached_urls_and_methods(server, session):
+    url = get_url(server, '/v3/odds')
+
+    session.get(url)
+    response = session.get(url)
+
+    assert server.hits == 2 and not getattr(response, 'from_cache', False)
+    assert not os.path.exists(f'{session.get_adapter(url).cache_file}.locks')
+
+def test_lock_files_are_striped(server, session):
+    for league in range(200):
+        session.get(get_url(server, '/v3/fixtures'), params={'league': league})
+
+    cache_file = session.get_adapter(get_url(server, '/')).cache_file
+    assert server.hits == 200
+    assert len(os.listdir(f'{cache_file}.locks')) <= http_cache.LOCK_STRIPES
+
+def test_one_connection_per_thread(server, session):
+    adapter = session.get_adapter(get_url(server, '/'))
+    url = get_url(server, '/v3/fixtures')
+
+    for _ in range(3):
+        session.get(url)
+    worker = threading.Thread(target=lambda: session.get(url))
+    worker.start()
+    worker.join()
+
+    assert len(adapter.connections) == 2
+    adapter.close()
+    assert adapter.connections == []
+
+def test_sessions_cache_only_when_asked(tmp_path):
+    from helpers.session import SessionManager
+
+    plain = SessionManager(session_file=None).get_session()
+    cached = SessionManager(session_file=None, cache_file=str(tmp_path / 'cache.sqlite')).get_session()
+
+    assert not isinstance(plain.get_adapter('https://api.arcadia.pinnacle.com'), CachingAdapter)
+    assert isinstance(cached.get_adapter('https://v3.football.api-sports.io'), CachingAdapter)
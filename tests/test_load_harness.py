@@ -0,0 +1,15 @@
+import logging
+import os
+
+from loadtest.harness import run_load_test
+from utils.utils import RESPONSES_DIR
+
+def test_load_test_leaves_no_state_behind(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    report, totals = run_load_test(2, 5, logging.getLogger(__name__), latency=(0.001, 0.002), seed=1)
+
+    assert totals['games'] == 10 and totals['placed'] + totals['failed'] == totals['flagged']
+    assert 'place_bet' in report.index or totals['flagged'] == 0
+    assert os.listdir(tmp_path) == []
+    assert not os.path.exists(f'{RESPONSES_DIR}/pinnacle_loadtest')
@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+
+logger = logging.getLogger('test_markets_snapshot')
+
+def get_games(bot, bookmaker, league: int = 1, **kwargs):
+    return bot.get_game_urls(league, logger, today=bookmaker.today.strftime('%Y-%m-%d'), **kwargs)
+
+def test_odds_and_limits_served_from_the_snapshot(pinnacle):
+    bot, bookmaker = pinnacle
+    bot.calls.clear()
+    games_url = get_games(bot, bookmaker)
+
+    assert bot.calls == [('GET', '/leagues/1/matchups'), ('GET', '/leagues/1/markets/straight')]
+
+    odds = bot.check_odds_many(games_url, logger)
+    limits = [bot.get_max_min_stake(game_url, 'home', odds[game_url['id']][0], logger) for game_url in games_url]
+
+    # One request for the whole league instead of an odds call and a quote per game
+    assert len(bot.calls) == 2
+    for game_url, game_limits in zip(games_url, limits):
+        assert odds[game_url['id']] == pytest.approx(bookmaker.matchups[game_url['id']]['odds'], rel=0.01)
+        assert game_limits == (1, bookmaker.matchups[game_url['id']]['max_stake'])
+
+def test_snapshot_matches_per_matchup_odds(pinnacle):
+    bot, bookmaker = pinnacle
+    games_url = get_games(bot, bookmaker)
+    snapshot = bot.check_odds_many(games_url, logger)
+
+    bot.snapshots.clear()
+    bot.calls.clear()
+
+    assert bot.check_odds_many(games_url, logger) == snapshot
+    assert len(bot.calls) == len(games_url)
+
+def test_stale_snapshot_falls_back_to_requests(pinnacle, monkeypatch):
+    bot, bookmaker = pinnacle
+    games_url = get_games(bot, bookmaker)
+    monkeypatch.setattr(bot, 'markets_ttl', -1)
+    bot.calls.clear()
+
+    bot.check_odds_many(games_url, logger)
+    bot.get_max_min_stake(games_url[0], 'home', 2., logger)
+
+    assert sorted(path for _, path in bot.calls) == sorted([f"/matchups/{game_url['id']}/markets/related/straight" for game_url in games_url] + ['/bets/straight/quote'])
+
+def test_reload_replaces_only_that_league(pinnacle):
+    bot, bookmaker = pinnacle
+    get_games(bot, bookmaker, league=1)
+    get_games(bot, bookmaker, league=2)
+    removed = bookmaker.leagues[1].pop()
+
+    assert bot.load_markets(1, logger)
+    assert bot.get_market(removed, 's;0;m', 'home') is None
+    assert all(bot.get_market(matchup_id, 's;0;m', 'home') is not None for matchup_id in bookmaker.leagues[1] + bookmaker.leagues[2])
@@ -0,0 +1,124 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+from strategies.match_ratings import MatchRatingsStrategy, get_rating_index
+
+TEAMS = [f'Team {i}' for i in range(20)]
+
+COEFFS = {
+    'default': ({'beta_coeff': 1.6, 'constant': 45.0}, {'beta_squared_coeff': 0.02, 'beta_coeff': -1.1, 'constant': 29.0}),
+    # Coefficients whose binary value sits just under the decimal one, Decimal(1.4) * 5 truncates to 6.99 in the decimal engine
+    'below': ({'beta_coeff': 1.4, 'constant': 44.7}, {'beta_squared_coeff': 0.03, 'beta_coeff': -0.7, 'constant': 28.3}),
+    'fitted': ({'beta_coeff': 1.634217, 'constant': 44.87121}, {'beta_squared_coeff': 0.018843, 'beta_coeff': -1.212935, 'constant': 28.66172}),
+}
+
+logger = logging.getLogger('test_match_ratings_parity')
+
+def make_season(seed: int):
+    # Double round robin between 20 teams, one matchday a week, with bookmaker odds quoted to 2 decimals
+    rng = np.random.default_rng(seed)
+    strength = rng.normal(0, 0.4, len(TEAMS))
+    rounds, n = [], len(TEAMS)
+    teams = list(range(n))
+    for _ in range(n - 1):
+        rounds.append([(teams[i], teams[n - 1 - i]) for i in range(n // 2)])
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+    rounds += [[(away, home) for home, away in matchday] for matchday in rounds]
+
+    rows = []
+    for matchday, games in enumerate(rounds):
+        date = pd.Timestamp('2023-08-12') + pd.Timedelta(weeks=matchday)
+        for home, away in games:
+            diff = strength[home] - strength[away]
+            home_goals, away_goals = rng.poisson(np.exp(0.35 + diff / 2)), rng.poisson(np.exp(0.1 - diff / 2))
+            probas = np.array([0.45 + diff / 3, 0.27, 0.28 - diff / 3]).clip(0.05, 0.9)
+            odds = np.round(1 / (probas / probas.sum() * 1.05), 2)
+            rows.append({'Date': date.strftime('%d/%m/%Y'), 'Matchday': matchday, 'HomeTeam': TEAMS[home], 'AwayTeam': TEAMS[away],
+                         'FTHG': home_goals, 'FTAG': away_goals, 'home_odds': odds[0], 'draw_odds': odds[1], 'away_odds': odds[2]})
+    return DataFrame(rows)
+
+def run_engines(season: DataFrame, coeffs, bankroll: float):
+    strat_config = {'E0': {'home': coeffs[0], 'away': coeffs[1], 'bankroll': bankroll}}
+    numpy_rows, decimal_rows = [], []
+
+    # Every matchday is scored with the ratings of the games played before it, like main.py does
+    for matchday in range(6, season['Matchday'].max() + 1):
+        played = season[season['Matchday'] < matchday]
+        fixtures = season[season['Matchday'] == matchday].rename(columns={'HomeTeam': 'home', 'AwayTeam': 'away'})
+        rating_index = get_rating_index(played, 'E0', f'parity-{matchday}')
+
+        for engine, rows in (('numpy', numpy_rows), ('decimal', decimal_rows)):
+            strategy = MatchRatingsStrategy(played, 'E0', strat_config, 'kelly', rating_index=rating_index, engine=engine)
+            rows.append(strategy.compute_batch(fixtures[['home', 'away', 'home_odds', 'draw_odds', 'away_odds']], 'match_ratings', logger))
+
+    return pd.concat(numpy_rows), pd.concat(decimal_rows)
+
+# The decimal engine truncates every step to 3 significant digits, the float engine doesn't
+PROBA_TOLERANCE = 0.005
+VALUE_TOLERANCE = 0.03
+FRAC_KELLY = 0.5
+
+@pytest.fixture(scope='module')
+def season():
+    return make_season(seed=2024)
+
+@pytest.mark.parametrize('coeffs', COEFFS.values(), ids=COEFFS.keys())
+@pytest.mark.parametrize('bankroll', [1000., 523.47, 87.3])
+def test_numpy_engine_matches_decimal_engine(season, coeffs, bankroll):
+    numpy_values, decimal_values = run_engines(season, coeffs, bankroll)
+
+    assert len(decimal_values) > 250
+    assert list(numpy_values.index) == list(decimal_values.index)
+
+    for column in ['hwtp', 'dtp', 'awtp']:
+        np.testing.assert_allclose(numpy_values[column].astype(float), decimal_values[column].astype(float), rtol=0, atol=PROBA_TOLERANCE, err_msg=column)
+
+    # Compared as probabilities, a true odds error grows with the odds. Storing them to 2 places moves 1 / odds by up to 0.01 more
+    for column in ['hwto', 'tdo', 'awto']:
+        np.testing.assert_allclose(1 / numpy_values[column].astype(float), 1 / decimal_values[column].astype(float), rtol=0, atol=PROBA_TOLERANCE + 0.01, err_msg=column)
+
+    for column in ['hv', 'dv', 'av', 'value']:
+        np.testing.assert_allclose(numpy_values[column].astype(float), decimal_values[column].astype(float), rtol=0, atol=VALUE_TOLERANCE, err_msg=column)
+
+    # A value error is scaled by the Kelly stake, on top of the 3 digit truncation of the stake itself and the stored rounding
+    odds = season.loc[decimal_values.index, ['home_odds', 'draw_odds', 'away_odds']].to_numpy()
+    stakes = numpy_values[['h', 'd', 'a']].to_numpy(dtype=float), decimal_values[['h', 'd', 'a']].to_numpy(dtype=float)
+    stake_tolerance = bankroll * FRAC_KELLY * VALUE_TOLERANCE / (odds - 1) + 0.01 * np.abs(stakes[1]) + 0.1
+    assert (np.abs(stakes[0] - stakes[1]) <= stake_tolerance).all()
+
+    # Bets and flags may only differ where the decimal engine sits within the tolerance of a decision boundary
+    ranked = np.sort(stakes[1], axis=1)
+    max_tolerance = stake_tolerance.max(axis=1)
+    borderline = (
+        (ranked[:, -1] - ranked[:, -2] <= 2 * max_tolerance)
+        | (np.abs(decimal_values['value'].to_numpy(dtype=float)) <= VALUE_TOLERANCE)
+        | (np.abs(decimal_values['stake'].to_numpy(dtype=float) - 1) <= max_tolerance)
+    )
+    differs = (numpy_values['bet'] != decimal_values['bet']).to_numpy() | (numpy_values['flag'].astype(bool) != decimal_values['flag'].astype(bool)).to_numpy()
+
+    assert not (differs & ~borderline).any()
+    assert differs.sum() <= 0.02 * len(differs)
+
+def test_compute_matches_compute_batch(season):
+    played, fixtures = season[season['Matchday'] < 10], season[season['Matchday'] == 10].rename(columns={'HomeTeam': 'home', 'AwayTeam': 'away'})
+    strat_config = {'E0': {'home': COEFFS['below'][0], 'away': COEFFS['below'][1], 'bankroll': 523.47}}
+
+    for engine in MatchRatingsStrategy.engines:
+        batch = MatchRatingsStrategy(played, 'E0', strat_config, 'kelly', season='parity-compute', engine=engine).compute_batch(fixtures[['home', 'away', 'home_odds', 'draw_odds', 'away_odds']], 'match_ratings', logger)
+
+        for idx, fixture in fixtures.iterrows():
+            odds = {'home_odds': fixture['home_odds'], 'draw_odds': fixture['draw_odds'], 'away_odds': fixture['away_odds']}
+            values = MatchRatingsStrategy(played, 'E0', strat_config, 'kelly', season='parity-compute', engine=engine, **odds).compute(fixture['home'], fixture['away'], 'match_ratings', logger)
+
+            # Fixtures without enough history are left out of the batch
+            if idx not in batch.index:
+                assert values == {}
+                continue
+
+            assert values.keys() == set(MatchRatingsStrategy.columns)
+            for column in MatchRatingsStrategy.columns:
+                assert values[column] == batch.loc[idx, column], (engine, column)
@@ -0,0 +1,38 @@
+import re
+import sqlite3
+
+from db.migrations import MIGRATIONS, get_version, migrate
+
+LATEST = MIGRATIONS[-1][0]
+CREATED_AT = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{2}\.\d{3}$')
+
+def test_migrations_applied_twice(tmp_path):
+    con = sqlite3.connect(tmp_path / 'bets.db')
+
+    assert migrate(con) == [version for version, _, _ in MIGRATIONS]
+    schema = con.execute('SELECT type, name, sql FROM sqlite_master ORDER BY name').fetchall()
+
+    assert migrate(con) == []
+    assert get_version(con) == LATEST
+    assert con.execute('SELECT COUNT(*) FROM schema_version').fetchone()[0] == len(MIGRATIONS)
+    assert con.execute('SELECT type, name, sql FROM sqlite_master ORDER BY name').fetchall() == schema
+
+def test_steps_rerun_on_a_partially_migrated_database(tmp_path):
+    con = sqlite3.connect(tmp_path / 'bets.db')
+    migrate(con)
+
+    # A step whose version row is missing runs again over its own tables
+    con.execute('DELETE FROM schema_version WHERE version > 1')
+    con.commit()
+
+    assert migrate(con) == [version for version, _, _ in MIGRATIONS if version > 1]
+    assert get_version(con) == LATEST
+
+def test_created_at_shares_one_format(tmp_path):
+    con = sqlite3.connect(tmp_path / 'bets.db')
+    migrate(con)
+
+    con.execute("INSERT INTO run_journal (run_date, bookmaker, strategy, league, game_id, stage) VALUES ('2024-05-02', 'pinnacle', 'match_ratings', 'E0', 4, 'placing')")
+    con.execute("INSERT INTO results (league, season, game_date, home_team, away_team, fthg, ftag, source) VALUES ('E0', '2023-2024', '2024-05-02', 'A', 'B', 1, 0, 'csv')")
+    assert CREATED_AT.match(con.execute('SELECT created_at FROM run_journal').fetchone()[0])
+    assert CREATED_AT.match(con.execute('SELECT created_at FROM results').fetchone()[0])
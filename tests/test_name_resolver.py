@@ -0,0 +1,27 @@
+import json
+
+from utils.name_resolver import NameResolver
+
+MAPPINGS = {'rapidapi_to_pinnacle': {'39': {'Manchester United': 'Manchester Utd'}}}
+
+def make_resolver(tmp_path):
+    mappings_file = tmp_path / 'mappings.json'
+    mappings_file.write_text(json.dumps(MAPPINGS))
+    return NameResolver(str(mappings_file), str(tmp_path / 'mappings.pending.json'))
+
+def test_fuzzy_matches_saved_for_review(tmp_path):
+    resolver = make_resolver(tmp_path)
+    candidates = ['Manchester Utd', 'Wolves', 'Brighton and Hove Albion']
+
+    assert resolver.to_bookmaker('Manchester United', 'Brighton & Hove Albion', '39', 'pinnacle', candidates) == ('Manchester Utd', 'Brighton and Hove Albion')
+    assert resolver.save() == 1
+
+    # The curated file is left as it was, the match waits in the pending file
+    assert json.loads((tmp_path / 'mappings.json').read_text()) == MAPPINGS
+    assert json.loads((tmp_path / 'mappings.pending.json').read_text()) == {'rapidapi_to_pinnacle': {'39': {'Brighton & Hove Albion': 'Brighton and Hove Albion'}}}
+
+    # A later run does not trust the pending match without a review and saves it once
+    resolver = make_resolver(tmp_path)
+    assert resolver.to_bookmaker('Manchester United', 'Brighton & Hove Albion', '39', 'pinnacle') == ('Manchester Utd', 'Brighton & Hove Albion')
+    resolver.to_bookmaker('Manchester United', 'Brighton & Hove Albion', '39', 'pinnacle', candidates)
+    assert resolver.save() == 0
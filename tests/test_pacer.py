@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from requests import Response
+
+import helpers.pacer as pacer_module
+from helpers.pacer import Pacer
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Stands in for the time module inside pacer only
+    clock = Clock()
+    monkeypatch.setattr(pacer_module, 'time', clock)
+    return clock
+
+def make_response(from_cache: bool = None):
+    response = Response()
+    if from_cache is not None:
+        response.from_cache = from_cache
+    return response
+
+def test_only_the_rest_of_the_gap_is_slept(clock):
+    pacer = Pacer(2., 2.)
+
+    pacer.on_response(make_response())
+    clock.now += 0.5
+    pacer.wait()
+
+    assert clock.sleeps == [pytest.approx(1.5)]
+    assert (pacer.slept, pacer.saved) == (pytest.approx(1.5), pytest.approx(0.5))
+
+def test_work_longer_than_the_gap_never_sleeps(clock):
+    pacer = Pacer(1., 3.)
+
+    pacer.on_response(make_response())
+    clock.now += 3.5
+    pacer.wait()
+
+    assert clock.sleeps == []
+    assert 1. <= pacer.saved <= 3. and pacer.slept == 0.
+
+def test_a_gap_is_only_spent_once(clock):
+    pacer = Pacer(2., 2.)
+
+    pacer.on_response(make_response())
+    pacer.wait()
+    pacer.wait()
+
+    assert clock.sleeps == [pytest.approx(2.)]
+    assert pacer.saved == pytest.approx(0.)
+
+def test_cached_responses_leave_the_deadline(clock):
+    pacer = Pacer(2., 2.)
+
+    pacer.on_response(make_response(from_cache=True))
+    pacer.wait()
+    assert clock.sleeps == []
+
+    pacer.on_response(make_response(from_cache=False))
+    clock.now += 1.
+    pacer.on_response(make_response(from_cache=True))
+    pacer.wait()
+    assert clock.sleeps == [pytest.approx(1.)]
+
+def test_gaps_drawn_in_range():
+    pacer = Pacer(1., 3.)
+
+    gaps = []
+    for _ in range(200):
+        pacer.on_response(make_response())
+        gaps.append(pacer.gap)
+
+    assert all(1. <= gap <= 3. for gap in gaps) and max(gaps) - min(gaps) > 1.
+    assert pacer.deadline <= time.monotonic() + 3.
@@ -0,0 +1,97 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from cryptography.fernet import Fernet
+
+from helpers.session_store import SessionStore
+
+logger = logging.getLogger(__name__)
+
+@pytest.fixture
+def server():
+    # A bookmaker that issues a new token per login and only accepts the tokens it still knows
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, status, data):
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def authorized(self):
+            return self.headers.get('X-Session') in self.server.tokens
+
+        def do_GET(self):
+            self.server.calls.append(('GET', self.path))
+            if not self.authorized():
+                return self.reply(401, {'status': 401})
+            self.reply(200, {'amount': 250.0})
+
+        def do_POST(self):
+            self.server.calls.append(('POST', self.path))
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self.path == '/sessions':
+                self.server.logins += 1
+                token = f'token-{self.server.logins}'
+                self.server.tokens.add(token)
+                return self.reply(200, {'token': token})
+            if not self.authorized():
+                return self.reply(401, {'status': 401})
+            self.reply(200, {'status': 'ACCEPTED'})
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.tokens = set()
+    httpd.logins = 0
+    httpd.calls = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def bot(server, tmp_path):
+    from bot.pinnacle_bot import PinnacleBettingBot
+
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    bot = PinnacleBettingBot('pinnacle', guest_api_url=url, api_url=url)
+    bot.pacer.min_gap = bot.pacer.max_gap = 0.
+    bot.session_store = SessionStore('pinnacle', Fernet.generate_key(), str(tmp_path))
+    return bot
+
+def test_revoked_stored_session_logs_in_again(server, bot):
+    bot.session_store.save({'auth': {'token': 'revoked', 'base_url': bot.api_url}, 'cookies': []}, 60)
+
+    assert bot.login({'username': 'user', 'password': 'secret'}, logger)
+    assert bot.headers['X-Session'] == 'token-1'
+    assert server.calls == [('GET', '/wallet/balance'), ('POST', '/sessions')]
+    assert bot.session_store.load()['auth']['token'] == 'token-1'
+
+def test_valid_stored_session_is_reused(server, bot):
+    server.tokens.add('stored')
+    bot.session_store.save({'auth': {'token': 'stored', 'base_url': bot.api_url}, 'cookies': []}, 60)
+
+    assert bot.login({'username': 'user', 'password': 'secret'}, logger)
+    assert bot.headers['X-Session'] == 'stored'
+    assert server.calls == [('GET', '/wallet/balance')]
+
+def test_only_reads_are_replayed_after_a_401(server, bot):
+    bot.login({'username': 'user', 'password': 'secret'}, logger)
+
+    server.tokens.clear()
+    placed = bot.session.post(f'{bot.base_url}/bets/straight', data='{}', headers=bot.headers)
+
+    # The bet is not resent, the next read goes out with the new token
+    assert placed.status_code == 401
+    assert server.calls.count(('POST', '/bets/straight')) == 1 and bot.headers['X-Session'] == 'token-2'
+
+    server.tokens.clear()
+    assert bot.check_balance(logger) == 250.0
+    assert server.calls[-3:] == [('GET', '/wallet/balance'), ('POST', '/sessions'), ('GET', '/wallet/balance')]
@@ -0,0 +1,56 @@
+import logging
+
+logger = logging.getLogger('test_prefetch_limits')
+
+def get_candidates(bot, bookmaker, league: int = 1):
+    # Without the market snapshot every limit is a quote request
+    games_url = bot.get_game_urls(league, logger, today=bookmaker.today.strftime('%Y-%m-%d'), snapshot=False)
+    return [(game_url, 'home', 2.1) for game_url in games_url]
+
+def count_quotes(bot):
+    return bot.calls.count(('POST', '/bets/straight/quote'))
+
+def test_prefetched_limits_used_once(pinnacle):
+    bot, bookmaker = pinnacle
+    candidates = get_candidates(bot, bookmaker)
+
+    bot.prefetch_limits(candidates, logger)
+    assert count_quotes(bot) == len(candidates)
+
+    for game_url, selection, odds in candidates:
+        assert bot.get_limits(game_url, selection, odds, logger) == (1., bookmaker.matchups[game_url['id']]['max_stake'])
+    assert count_quotes(bot) == len(candidates) and bot.limits == {}
+
+    # Consumed entries are fetched again
+    game_url, selection, odds = candidates[0]
+    bot.get_limits(game_url, selection, odds, logger)
+    assert count_quotes(bot) == len(candidates) + 1
+
+def test_expired_limits_fetched_again(pinnacle):
+    bot, bookmaker = pinnacle
+    candidates = get_candidates(bot, bookmaker)
+    bot.prefetch_limits(candidates, logger)
+
+    # Age the first entry past the TTL, the rest stay fresh
+    key = (candidates[0][0]['id'], 'home', 2.1)
+    min_stake, max_stake, fetched_at = bot.limits[key]
+    bot.limits[key] = (min_stake, max_stake, fetched_at - bot.limits_ttl - 1)
+    bookmaker.matchups[candidates[0][0]['id']]['max_stake'] = 75.
+
+    assert bot.get_limits(candidates[0][0], 'home', 2.1, logger) == (1., 75.)
+    assert count_quotes(bot) == len(candidates) + 1
+
+    bot.get_limits(candidates[1][0], 'home', 2.1, logger)
+    assert count_quotes(bot) == len(candidates) + 1
+
+def test_limits_keyed_by_selection_and_price(pinnacle):
+    bot, bookmaker = pinnacle
+    candidates = get_candidates(bot, bookmaker)[:1]
+    bot.prefetch_limits(candidates, logger)
+    game_url = candidates[0][0]
+
+    # The price moved or another outcome is bet, the prefetched quote doesn't apply
+    bot.get_limits(game_url, 'home', 2.2, logger)
+    bot.get_limits(game_url, 'away', 2.1, logger)
+
+    assert count_quotes(bot) == 3 and (game_url['id'], 'home', 2.1) in bot.limits
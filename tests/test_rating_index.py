@@ -0,0 +1,69 @@
+from decimal import Decimal
+import math
+
+import numpy as np
+import pytest
+from pandas import DataFrame
+
+from strategies.match_ratings import get_rating_index, rating_indexes
+from strategies.rating_index import RatingIndex
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham', 'Leeds', 'Wolves', 'Burnley', 'Luton']
+
+def make_results(n_games: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_games):
+        home, away = rng.choice(len(TEAMS), 2, replace=False)
+        rows.append({'Date': f'{1 + i % 28:02d}/{8 + i // 28 % 5:02d}/2023', 'HomeTeam': TEAMS[home], 'AwayTeam': TEAMS[away], 'FTHG': rng.poisson(1.5), 'FTAG': rng.poisson(1.1)})
+    return DataFrame(rows)
+
+def legacy_ratings(data: DataFrame, home: str, away: str):
+    # What compute used to do for every fixture, regroup the season and sum each team's last 6 ratings
+    ratings = []
+    for team in (home, away):
+        games = data[(data.HomeTeam == team) | (data.AwayTeam == team)].copy()
+        games.loc[games.HomeTeam == team, 'Rating'] = games['FTHG'] - games['FTAG']
+        games.loc[games.AwayTeam == team, 'Rating'] = games['FTAG'] - games['FTHG']
+        ratings.append(Decimal(games['Rating'].rolling(6).sum().iloc[-1]))
+
+    if math.isnan(ratings[0]) or math.isnan(ratings[1]):
+        raise ValueError(f'Not enough data for {home} - {away}')
+    return float(ratings[0]), float(ratings[1]), float(ratings[0] - ratings[1])
+
+@pytest.mark.parametrize('n_games', [10, 40, 120])
+def test_match_ratings_match_the_per_fixture_regrouping(n_games):
+    data = make_results(n_games, seed=n_games)
+    rating_index = get_rating_index(data, 'E0', f'index-{n_games}')
+
+    for home in TEAMS:
+        for away in TEAMS:
+            if home == away:
+                continue
+            try:
+                expected = legacy_ratings(data, home, away)
+            except (ValueError, IndexError):
+                with pytest.raises((ValueError, KeyError)):
+                    rating_index.match_ratings(home, away)
+            else:
+                assert rating_index.match_ratings(home, away) == expected
+
+def test_index_is_cached_until_the_data_grows():
+    data = make_results(60)
+
+    rating_index = get_rating_index(data, 'E0', 'cached')
+    assert get_rating_index(data, 'E0', 'cached') is rating_index
+    assert rating_indexes[('cached', 'E0')] is rating_index
+
+    grown = make_results(61)
+    rebuilt = get_rating_index(grown, 'E0', 'cached')
+    assert rebuilt is not rating_index and rebuilt.n_games == 61
+
+def test_missing_result_inside_the_window():
+    rating_index = RatingIndex('E0', 'missing', {'A': np.array([1., 2., np.nan, 0., 1., -1.]), 'B': np.array([3., 1., 0., 0., -2., 1., 2.])})
+
+    assert np.isnan(rating_index.get('A'))
+    assert rating_index.get('B') == 2.
+    assert np.isnan(rating_index.get('C'))
+    with pytest.raises(ValueError):
+        rating_index.match_ratings('A', 'B')
@@ -0,0 +1,50 @@
+import json
+import logging
+import os
+import sqlite3
+
+import requests
+
+import helpers.replay as replay
+from helpers.replay import ReplayAdapter, create_replay_db, get_replay_db_file
+from helpers.response_archive import ResponseArchive
+
+def test_replay_db_created_on_demand(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, 'REPLAY_DATE', '2024-05-02')
+    monkeypatch.setattr(replay, 'REPLAY_DIR', str(tmp_path / 'replay'))
+    live_db_file = str(tmp_path / 'bets.db')
+    with sqlite3.connect(live_db_file) as con:
+        con.execute('CREATE TABLE bets (id INTEGER PRIMARY KEY, stake REAL)')
+        con.execute('INSERT INTO bets (stake) VALUES (10.)')
+
+    replay_db_file = get_replay_db_file(live_db_file)
+    assert replay_db_file == str(tmp_path / 'replay' / '2024-05-02' / 'bets.db')
+    assert not os.path.exists(tmp_path / 'replay')
+
+    assert create_replay_db(live_db_file) == replay_db_file
+    with sqlite3.connect(replay_db_file) as con:
+        assert con.execute('SELECT COUNT(*) FROM bets').fetchone()[0] == 0
+
+def test_archived_responses_replayed(tmp_path):
+    archive = ResponseArchive(str(tmp_path / 'pinnacle'))
+    request = requests.Request('GET', 'https://api.example.com/wallet/balance').prepare()
+    archive.record('check_balance', None, {'amount': 250.0}, request, 200)
+    archive.close()
+    date = os.listdir(tmp_path / 'pinnacle')[0][:10]
+
+    session = requests.Session()
+    adapter = ReplayAdapter(str(tmp_path), date)
+    session.mount('https://', adapter)
+
+    assert session.get('https://api.example.com/wallet/balance').json() == {'amount': 250.0}
+    assert session.get('https://api.example.com/wallet/other').status_code == 404
+    assert adapter.misses == ['GET https://api.example.com/wallet/other']
+
+def test_old_json_layout_reported(tmp_path, caplog):
+    os.makedirs(tmp_path / 'pinnacle' / '2023-11-04')
+    (tmp_path / 'pinnacle' / '2023-11-04' / 'check_balance.json').write_text(json.dumps({'amount': 250.0}))
+
+    with caplog.at_level(logging.WARNING, logger='helpers.replay'):
+        ReplayAdapter(str(tmp_path), '2023-11-04')
+
+    assert 'old per call json layout' in caplog.text
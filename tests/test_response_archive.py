@@ -0,0 +1,36 @@
+import requests
+from requests import Response
+
+from helpers.response_archive import ResponseArchive
+
+def make_response(url: str, from_cache: bool = None):
+    response = Response()
+    response.status_code = 200
+    response.request = requests.Request('POST', url, data='{"username": "user", "password": "secret"}').prepare()
+    if from_cache is not None:
+        response.from_cache = from_cache
+    return response
+
+def test_cached_responses_not_archived(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+
+    archive.record_response('check_odds', 1, {'price': 2.1}, make_response('https://api.example.com/odds/1', from_cache=False))
+    archive.record_response('check_odds', 1, {'price': 2.1}, make_response('https://api.example.com/odds/1', from_cache=True))
+    archive.record_response('check_odds', 2, {'price': 3.4}, make_response('https://api.example.com/odds/2'))
+    archive.flush()
+
+    assert [record['key'] for record in archive.lookup('check_odds')] == ['1', '2']
+    archive.close()
+
+def test_login_redacted(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+
+    data = {'token': 'secret-token', 'username': 'user', 'session': {'refreshToken': 'secret-refresh', 'expires': 3600}}
+    archive.record_response('login', None, data, make_response('https://api.example.com/sessions'), redact=True)
+    archive.flush()
+
+    record = archive.lookup('login')[0]
+    assert record['data'] == {'token': '[redacted]', 'username': 'user', 'session': {'refreshToken': '[redacted]', 'expires': 3600}}
+    assert record['request'] == {'method': 'POST', 'url': 'https://api.example.com/sessions', 'body': None}
+    assert data['token'] == 'secret-token'
+    archive.close()
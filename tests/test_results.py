@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham', 'Leeds', 'Wolves']
+
+def make_results(seed: int = 0):
+    # Double round robin, one matchday a week with kickoffs spread over three days
+    rng = np.random.default_rng(seed)
+    rounds, n = [], len(TEAMS)
+    teams = list(range(n))
+    for _ in range(n - 1):
+        rounds.append([(teams[i], teams[n - 1 - i]) for i in range(n // 2)])
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+    rounds += [[(away, home) for home, away in matchday] for matchday in rounds]
+
+    rows = []
+    for matchday, games in enumerate(rounds):
+        for i, (home, away) in enumerate(games):
+            date = pd.Timestamp('2023-08-12') + pd.Timedelta(weeks=matchday, days=i)
+            rows.append({'Date': date.strftime('%d/%m/%Y'), 'HomeTeam': TEAMS[home], 'AwayTeam': TEAMS[away], 'FTHG': rng.poisson(1.5), 'FTAG': rng.poisson(1.1)})
+    return DataFrame(rows)
+
+def write_csv(data: DataFrame, tmp_path):
+    file_path = tmp_path / 'E0.csv'
+    data.to_csv(file_path, index=False)
+    return str(file_path)
+
+def select_results(db):
+    return db.load_many('SELECT game_date, home_team, away_team, fthg, ftag, source FROM results ORDER BY game_date, home_team')
+
+def test_csv_load_is_idempotent(database, tmp_path):
+    from db.results import count_results, load_hist_results
+
+    data = make_results()
+    file_path = write_csv(data, tmp_path)
+
+    assert load_hist_results(data, 'E0', '2023-2024', file_path) == len(data)
+    # Unchanged file, skipped on its signature
+    assert load_hist_results(data, 'E0', '2023-2024', file_path) == 0
+
+    # A refreshed file upserts over the same rows
+    data.loc[0, 'FTHG'] = 7
+    file_path = write_csv(data, tmp_path)
+    assert load_hist_results(data, 'E0', '2023-2024', file_path) == len(data)
+    assert count_results('E0', '2023-2024') == len(data)
+    assert database.load_one('SELECT fthg FROM results WHERE home_team = ? AND away_team = ?', data.HomeTeam[0], data.AwayTeam[0])[0] == 7
+
+def test_kickoff_dates_follow_the_historical_data():
+    from db.results import to_hist_data_date
+
+    # A 20:00 New York kickoff is already the next day in the UK
+    assert to_hist_data_date('2024-05-01T20:00:00-04:00') == '2024-05-02'
+    assert to_hist_data_date('2024-05-01T15:00:00-04:00') == '2024-05-01'
+    assert to_hist_data_date('2024-01-13T23:30:00+00:00') == '2024-01-13'
+
+def test_settled_results_are_not_duplicated(database, tmp_path):
+    from db.results import append_results, count_results, load_hist_results
+
+    data = make_results()
+    load_hist_results(data, 'E0', '2023-2024', write_csv(data, tmp_path))
+    before = select_results(database)
+
+    game = data.iloc[3]
+    game_date = pd.to_datetime(game.Date, dayfirst=True)
+    shifted = [((game_date + pd.Timedelta(days=days)).strftime('%Y-%m-%d'), game.HomeTeam, game.AwayTeam, int(game.FTHG), int(game.FTAG), 100 + days) for days in (-1, 0, 1)]
+
+    assert append_results('E0', '2023-2024', shifted) == 0
+    assert select_results(database) == before
+
+    # Only the same pair the same way round counts as the same match
+    new = [('2024-06-01', game.AwayTeam, game.HomeTeam, 0, 0, 200), ('2024-06-01', 'Leeds', 'Luton', 1, 2, 201), ('2024-06-02', 'Leeds', 'Luton', 1, 2, 201)]
+    assert append_results('E0', '2023-2024', new) == 2
+    assert count_results('E0', '2023-2024') == len(data) + 2
+
+def test_csv_replaces_settled_results_a_day_off(database, tmp_path):
+    from db.results import append_results, load_hist_results
+
+    data = make_results()
+    game_dates = pd.to_datetime(data.Date, dayfirst=True)
+
+    # Settled before the CSV caught up, with the previous day's New York date
+    settled = [((game_date - pd.Timedelta(days=1)).strftime('%Y-%m-%d'), home, away, int(fthg), int(ftag), i)
+               for i, (game_date, home, away, fthg, ftag) in enumerate(zip(game_dates, data.HomeTeam, data.AwayTeam, data.FTHG, data.FTAG)) if i < 5]
+    assert append_results('E0', '2023-2024', settled) == 5
+
+    load_hist_results(data, 'E0', '2023-2024', write_csv(data, tmp_path))
+
+    rows = select_results(database)
+    assert len(rows) == len(data) and {row['source'] for row in rows} == {'csv'}
+    assert [row['game_date'] for row in rows] == sorted(game_dates.dt.strftime('%Y-%m-%d'))
+
+def test_last_results_match_the_per_team_history(database, tmp_path):
+    from db.results import get_last_results, load_hist_results
+
+    data = make_results()
+    load_hist_results(data, 'E0', '2023-2024', write_csv(data, tmp_path))
+
+    for limit in (1, 6, 100):
+        last_results = get_last_results('E0', '2023-2024', limit)
+
+        assert sorted(last_results) == sorted(TEAMS)
+        for team in TEAMS:
+            games = data[(data.HomeTeam == team) | (data.AwayTeam == team)]
+            goal_diffs = np.where(games.HomeTeam == team, games.FTHG - games.FTAG, games.FTAG - games.FTHG)
+            assert last_results[team] == list(goal_diffs[-limit:])
+
+def test_results_rating_index_matches_the_csv_index(database, tmp_path):
+    from db.results import load_hist_results
+    from strategies.match_ratings import get_rating_index, get_results_rating_index
+
+    data = make_results()
+    load_hist_results(data, 'E0', '2023-2024', write_csv(data, tmp_path))
+
+    results_index = get_results_rating_index('E0', '2023-2024')
+    csv_index = get_rating_index(data, 'E0', 'results-2023-2024')
+
+    assert results_index.n_games == len(data)
+    assert results_index.ratings == csv_index.ratings
@@ -0,0 +1,81 @@
+from db.run_journal import RunJournal
+
+KEY = ('2024-10-19', 'pinnacle', 'match_ratings')
+
+def crashed_run(resume: bool = False):
+    # Game 1 was bet and recorded, the process died after the bookmaker call for game 2
+    journal = RunJournal(*KEY, resume=resume)
+    journal.start_league('E0', 1000.)
+    for game_id in (1, 2):
+        journal.record('E0', game_id, 'matched', {'id': game_id * 10})
+        journal.record('E0', game_id, 'scored', {'bet': 'home', 'stake': 12.5, 'flag': True})
+        journal.record('E0', game_id, 'placing', {'stake': 12.5, 'bet_odds': 2.1})
+    journal.record('E0', 1, 'placed', {'status': 'SUCCESS', 'stake': 12.5, 'bankroll': 987.5})
+    return journal
+
+def test_interrupted_placement_blocks_a_fresh_rerun(database):
+    crashed_run()
+
+    # cron reruns main.py without --resume
+    journal = RunJournal(*KEY)
+
+    assert journal.is_interrupted('E0', 2)
+    assert not journal.is_interrupted('E0', 1)
+    # Everything that completed is redone, only the unresolved placement survives
+    assert journal.get('E0', 1, 'placed') is None
+    assert journal.get('E0', 2, 'matched') is None
+    assert journal.get_bankroll('E0', 1000.) == 1000.
+
+    # and it keeps blocking on every later fresh run
+    assert RunJournal(*KEY).is_interrupted('E0', 2)
+
+def test_resume_skips_completed_work(database):
+    crashed_run()
+    journal = RunJournal(*KEY, resume=True)
+
+    assert journal.is_interrupted('E0', 2)
+    assert journal.get('E0', 1, 'placed')['status'] == 'SUCCESS'
+    assert journal.start_league('E0', 900.) == 1000.
+    assert journal.get_bankroll('E0', 1000.) == 987.5
+    assert not journal.is_league_done('E0')
+
+    journal.finish_league('E0', {'bankroll': 987.5})
+    assert RunJournal(*KEY, resume=True).is_league_done('E0')
+    assert not RunJournal(*KEY).is_league_done('E0')
+
+def test_recorded_outcome_clears_the_placement(database):
+    journal = crashed_run()
+    journal.record('E0', 2, 'placed', {'status': 'FAILED', 'stake': 12.5, 'bankroll': 987.5})
+
+    assert not RunJournal(*KEY).is_interrupted('E0', 2)
+
+def test_journals_are_kept_per_run(database):
+    crashed_run()
+
+    assert not RunJournal('2024-10-20', 'pinnacle', 'match_ratings').is_interrupted('E0', 2)
+    assert not RunJournal('2024-10-19', 'william_hill', 'match_ratings').is_interrupted('E0', 2)
+    assert RunJournal(*KEY).is_interrupted('E0', 2)
+
+def test_numpy_values_stored_as_json_values(database):
+    import numpy as np
+
+    journal = RunJournal(*KEY)
+    journal.record('E0', 3, 'scored', {'bet': np.str_('home'), 'bet_odds': np.float64(2.1), 'stake': np.float64(12.5), 'flag': np.bool_(True), 'round': np.int64(7)})
+    journal.record('E0', 3, 'priced', {'odds': np.array([2.1, 3.4, 3.6])})
+
+    expected = {'bet': 'home', 'bet_odds': 2.1, 'stake': 12.5, 'flag': True, 'round': 7}
+    assert journal.get('E0', 3, 'scored') == expected
+    assert RunJournal(*KEY, resume=True).get('E0', 3, 'scored') == expected
+    assert RunJournal(*KEY, resume=True).get('E0', 3, 'priced') == {'odds': [2.1, 3.4, 3.6]}
+
+def test_league_entries_kept_apart_from_games(database):
+    journal = RunJournal(*KEY)
+    journal.start_league('E0', 1000.)
+    journal.record('E0', 0, 'placed', {'status': 'SUCCESS', 'stake': 5., 'bankroll': 995.})
+    journal.finish_league('E0', {'bankroll': 995.})
+
+    # Game id 0 is an ordinary game now
+    assert [tuple(row) for row in database.load_many('SELECT game_id, stage FROM run_journal')] == [(0, 'placed')]
+    assert [tuple(row) for row in database.load_many('SELECT league, stage FROM run_journal_leagues ORDER BY stage')] == [('E0', 'done'), ('E0', 'started')]
+    assert RunJournal(*KEY, resume=True).get('E0', 0, 'placed')['stake'] == 5.
+    assert RunJournal(*KEY, resume=True).is_league_done('E0')
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from staking.staking_factory import StakingFactory
+
+ODDS = np.array([[2.1, 3.4, 3.6], [1.0, 0.5, 0.], [1.01, 12.0, 1.45]])
+VALUES = np.array([[0.05, -0.1, 0.02], [0.3, 0.2, 0.1], [-0.01, 0.4, 0.12]])
+
+def test_kelly_batch_matches_per_bet():
+    staking_factory = StakingFactory()
+    stakes = staking_factory.select_staking_strategy(523.47, 'kelly', odds=ODDS, value=VALUES).compute_batch()
+
+    assert stakes.shape == ODDS.shape and not np.isnan(stakes).any()
+    for i, j in np.ndindex(ODDS.shape):
+        stake = staking_factory.select_staking_strategy(523.47, 'kelly', odds=float(ODDS[i, j]), value=float(VALUES[i, j])).compute()
+        # The per bet path truncates to 3 significant digits
+        assert stakes[i, j] == pytest.approx(stake, rel=0.01, abs=0.01)
+
+def test_kelly_without_a_price_above_evens():
+    staking_factory = StakingFactory()
+    stakes = staking_factory.select_staking_strategy(1000., 'kelly', odds=ODDS[1], value=VALUES[1]).compute_batch()
+
+    assert stakes.tolist() == [0., 0., 0.]
+    for odds, value in zip(ODDS[1], VALUES[1]):
+        assert staking_factory.select_staking_strategy(1000., 'kelly', odds=float(odds), value=float(value)).compute() == 0.
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+from backtesting.backtest import backtest_league, load_hist_data
+from backtesting.sweep import SWEEP_COLUMNS, max_drawdown, prior_rolling_sums, rank_results, run_sweep
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham']
+LEAGUE_CONFIG = {'home': {'beta_coeff': 1.6, 'constant': 45.0}, 'away': {'beta_squared_coeff': 0.02, 'beta_coeff': -1.1, 'constant': 29.0}, 'bankroll': 100.}
+
+def make_csv(path, n_rounds: int = 4, seed: int = 0):
+    # 4 teams playing each other home and away n_rounds times, two games a matchday
+    rng = np.random.default_rng(seed)
+    pairings = [[(0, 1), (2, 3)], [(0, 2), (1, 3)], [(0, 3), (1, 2)]]
+    pairings += [[(away, home) for home, away in games] for games in pairings]
+
+    rows = []
+    for matchday in range(n_rounds * len(pairings)):
+        date = (pd.Timestamp('2023-08-12') + pd.Timedelta(weeks=matchday)).strftime('%d/%m/%Y')
+        for home, away in pairings[matchday % len(pairings)]:
+            odds = np.round(rng.uniform([1.6, 3.0, 2.2], [3.2, 3.8, 5.5]), 2)
+            rows.append({'Date': date, 'HomeTeam': TEAMS[home], 'AwayTeam': TEAMS[away], 'FTHG': rng.poisson(1.6), 'FTAG': rng.poisson(1.1),
+                         'PSCH': odds[0], 'PSCD': odds[1], 'PSCA': odds[2]})
+
+    DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+@pytest.fixture
+def tasks(tmp_path):
+    return [(make_csv(tmp_path / 'E0.csv', seed=1), 'E0', '2023-2024'), (make_csv(tmp_path / 'SP1.csv', seed=2), 'SP1', '2023-2024')]
+
+def test_rolling_sums_match_the_backtest_ratings(tasks):
+    file_path, league, season = tasks[0]
+    home, away = prior_rolling_sums(load_hist_data(file_path), league, season, [2, 3])
+
+    for i, window in enumerate([2, 3]):
+        results = backtest_league(file_path, league, season, LEAGUE_CONFIG, 'kelly', window=window)
+        np.testing.assert_allclose(home[i, results['game_id']], results['home_rating'])
+        np.testing.assert_allclose(away[i, results['game_id']], results['away_rating'])
+
+def test_grid_point_matches_the_backtest(tasks):
+    strat_config = {'E0': LEAGUE_CONFIG, 'SP1': LEAGUE_CONFIG}
+    sweep = run_sweep(tasks, strat_config, 'kelly', windows=[2, 3], coeff_scales=[0.8, 1.0], fracs=[0.25, 0.5], workers=2)
+
+    assert list(sweep.columns) == SWEEP_COLUMNS
+    assert len(sweep) == 2 * 2 * 2 * 2
+    assert (sweep.groupby('league_code')['rank'].apply(list) == [list(range(1, 9))] * 2).all()
+    assert (sweep.groupby('league_code')['yield'].apply(lambda yields: yields.is_monotonic_decreasing)).all()
+
+    # With the fitted coefficients and the live Kelly fraction a grid point is a plain backtest
+    for file_path, league, season in tasks:
+        for window in [2, 3]:
+            results = backtest_league(file_path, league, season, LEAGUE_CONFIG, 'kelly', window=window)
+            placed = results[results['status'] == 'SUCCESS']
+            row = sweep[(sweep['league_code'] == league) & (sweep['window'] == window) & (sweep['coeff_scale'] == 1.0) & (sweep['frac_kelly'] == 0.5)].iloc[0]
+
+            assert row['bets'] == len(placed)
+            assert row['staked'] == pytest.approx(placed['stake'].sum(), abs=0.01)
+            assert row['profit'] == pytest.approx(placed['profit'].sum(), abs=0.05)
+
+def test_drawdown_and_empty_ranking():
+    assert max_drawdown(np.array([100., 120., 90., 130., 65.])) == pytest.approx(50.)
+    assert max_drawdown(np.array([])) == 0.
+    assert list(rank_results(DataFrame()).columns) == SWEEP_COLUMNS
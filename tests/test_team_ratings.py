@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+from strategies.match_ratings import compute_team_ratings, get_teams_list, group_data_by_teams
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham', 'Leeds', 'Wolves', 'Burnley', 'Luton']
+
+def make_results(n_games: int, seed: int = 0, missing: float = 0.):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_games):
+        home, away = rng.choice(len(TEAMS), 2, replace=False)
+        fthg, ftag = (np.nan, np.nan) if rng.random() < missing else (rng.poisson(1.5), rng.poisson(1.1))
+        rows.append({'Date': (pd.Timestamp('2023-08-12') + pd.Timedelta(days=i)).strftime('%d/%m/%Y'), 'HomeTeam': TEAMS[home], 'AwayTeam': TEAMS[away], 'FTHG': fthg, 'FTAG': ftag})
+    return DataFrame(rows).set_index('Date')
+
+def legacy_group_data_by_teams(df: DataFrame, lst, league: str, curr_season: str):
+    # group_data_by_teams before it was vectorized, without the CSV export
+    teams = {}
+    for el in lst:
+        teams[el] = df[(df.HomeTeam == el) | (df.AwayTeam == el)].copy()
+        teams[el]['Season'] = curr_season
+        teams[el]['Team'] = el
+        teams[el]['League'] = league
+        games = [i for i in range(1, int(teams[el].count().iloc[0]) + 1)]
+        teams[el]['Round'] = games.copy()
+        teams[el].sort_values(by='Round', inplace=True)
+        teams[el].loc[teams[el].HomeTeam == el, 'Rating'] = teams[el]['FTHG'] - teams[el]['FTAG']
+        teams[el].loc[teams[el].AwayTeam == el, 'Rating'] = teams[el]['FTAG'] - teams[el]['FTHG']
+        teams[el]['Rolling Average'] = teams[el]['Rating'].shift().rolling(6).sum()
+    return teams
+
+@pytest.mark.parametrize('n_games,missing', [(5, 0.), (60, 0.), (150, 0.), (150, 0.05)])
+def test_matches_the_per_team_loop(n_games, missing):
+    df = make_results(n_games, seed=n_games, missing=missing)
+    lst = get_teams_list(df)
+
+    expected = legacy_group_data_by_teams(df, lst, 'E0', '2023-2024')
+    teams = group_data_by_teams(df, lst, 'E0', '2023-2024')
+
+    assert list(teams) == list(expected)
+    for team in lst:
+        pd.testing.assert_frame_equal(teams[team], expected[team], check_dtype=False)
+
+def test_every_team_in_one_frame():
+    df = make_results(80, seed=3)
+    ratings = compute_team_ratings(df, 'E0', '2023-2024')
+
+    # Each game shows up once for the home side and once for the away side
+    assert len(ratings) == 2 * len(df)
+    assert list(ratings.columns) == list(df.columns) + ['Season', 'Team', 'League', 'Round', 'Rating', 'Rolling Average']
+    for team, games in ratings.groupby('Team'):
+        assert list(games['Round']) == list(range(1, len(games) + 1))